@@ -1,51 +1,57 @@
-from .preprocessor import TextPreprocessor
-from .narrative_analyzer import NarrativeAnalyzer
-from .cultural_processor import CulturalProcessor
-from .graph_builder import GraphBuilder
-
-class ANARSystem:
-    """Main ANAR system class combining all components."""
-    
-    def __init__(self, config: Dict = None):
-        self.config = config or {}
-        self.preprocessor = TextPreprocessor(config)
-        self.narrative_analyzer = NarrativeAnalyzer(config)
-        self.cultural_processor = CulturalProcessor(config)
-        self.graph_builder = GraphBuilder(config)
-        
-    def process_text(self, text: str) -> Dict:
-        """Process Arabic text through the complete ANAR pipeline.
-        
-        Args:
-            text: Raw Arabic text input
-            
-        Returns:
-            Dictionary containing complete analysis results
-        """
-        # Preprocess text
-        processed = self.preprocessor.process(text)
-        
-        # Analyze narrative structure
-        narrative_analysis = self.narrative_analyzer.analyze(processed)
-        
-        # Process cultural elements
-        cultural_analysis = self.cultural_processor.process(processed)
-        
-        # Build comprehensive graph
-        narrative_graph = self.graph_builder.build_narrative_graph(
-            narrative_analysis,
-            cultural_analysis
-        )
-        
-        # Build character network
-        character_graph = self.graph_builder.build_character_graph(
-            narrative_analysis
-        )
-        
-        return {
-            'processed_text': processed,
-            'narrative_analysis': narrative_analysis,
-            'cultural_analysis': cultural_analysis,
-            'narrative_graph': narrative_graph,
-            'character_graph': character_graph
-        }
+"""Arabic Narrative Analysis and Recognition System.
+
+Public names are imported on first access, so ``import anar`` stays cheap
+and heavy dependencies (camel_tools, networkx, NumPy, SciPy) are only
+loaded by the components that need them.
+"""
+import importlib
+
+__version__ = '0.1.0'
+
+# Public name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    'ANARSystem': 'system',
+    'AsyncANARSystem': 'aio',
+    'OverloadedError': 'aio',
+    'TextPreprocessor': 'preprocessor',
+    'FRAME_PATTERNS': 'preprocessor',
+    'CULTURAL_MARKER_PATTERNS': 'preprocessor',
+    'NarrativeAnalyzer': 'narrative_analyzer',
+    'CHARACTER_PATTERNS': 'narrative_analyzer',
+    'EVENT_PATTERNS': 'narrative_analyzer',
+    'CulturalProcessor': 'cultural_processor',
+    'CATEGORY_MARKERS': 'cultural_processor',
+    'PatternRegistry': 'patterns',
+    'get_registry': 'patterns',
+    'GraphBuilder': 'graph_builder',
+    'CompactGraph': 'compact_graph',
+    'CooccurrenceEngine': 'cooccurrence',
+    'Stage': 'pipeline',
+    'StageScheduler': 'pipeline',
+    'StreamAnalyzer': 'streaming',
+    'ResultCache': 'cache',
+    'content_key': 'cache',
+    'process_corpus': 'corpus',
+    'CorpusReader': 'file_reader',
+    'MappedTextFile': 'file_reader',
+    'CorpusIndex': 'corpus_index',
+    'StoredResult': 'serialization',
+    'result_to_dict': 'serialization',
+    'Neo4jCSVExporter': 'neo4j_export',
+    'Neo4jCypherWriter': 'neo4j_export',
+}
+
+__all__ = ['__version__', *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,164 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .corpus import _init_worker, _process_text
+from .system import ANARSystem
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a request arrives while the admission queue is full."""
+
+
+class AsyncANARSystem:
+    """Asyncio front end that runs the pipeline in a managed process pool.
+
+    Documents are analysed by worker processes that each hold a copy of
+    one ANARSystem, so the event loop is never blocked by CPU-bound
+    stages. At most ``max_in_flight`` documents are in the pool at once
+    (default: one per worker); up to ``max_queue`` further requests wait
+    for a slot. Once that queue is full, new requests either wait for
+    room (backpressure on the caller) or, with ``reject_when_full``, fail
+    immediately with OverloadedError.
+
+    Each request may carry a timeout. A timed out or cancelled request
+    raises in the caller at once. A document that a worker has already
+    started keeps its slot until the worker finishes, so the in-flight
+    bound holds even then.
+
+    Use as ``async with AsyncANARSystem(config) as anar:`` or call
+    ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        config: Dict = None,
+        workers: int = None,
+        max_in_flight: int = None,
+        max_queue: int = 64,
+        reject_when_full: bool = False,
+        timeout: float = None
+    ):
+        self.system = ANARSystem(config)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers
+        self.max_queue = max_queue
+        self.reject_when_full = reject_when_full
+        self.timeout = timeout
+        self.completed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._pool = None
+        self._futures = set()
+        self._slots = None
+        self._admission = None
+        self._pending = 0
+        self._in_flight = 0
+
+    def _start(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self.system,)
+            )
+            # Created on first use so they bind to the running event loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._admission = asyncio.Semaphore(self.max_in_flight + self.max_queue)
+
+    async def process_text(self, text: str, timeout: Optional[float] = None) -> Dict:
+        """Analyze one document without blocking the event loop.
+
+        Args:
+            text: Raw Arabic text input
+            timeout: Seconds before the request fails with
+                asyncio.TimeoutError (defaults to the instance timeout)
+
+        Returns:
+            Result dictionary as returned by ANARSystem.process_text
+
+        Raises:
+            OverloadedError: If reject_when_full is set and the queue is full
+            asyncio.TimeoutError: If the timeout expires
+        """
+        self._start()
+        timeout = self.timeout if timeout is None else timeout
+
+        if self.reject_when_full and self._admission.locked():
+            self.rejected += 1
+            raise OverloadedError(
+                f"{self._pending} requests pending, queue limit reached"
+            )
+
+        async with self._admission:
+            self._pending += 1
+            try:
+                return await asyncio.wait_for(self._submit(text), timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            finally:
+                self._pending -= 1
+
+    async def _submit(self, text: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        self._in_flight += 1
+
+        def release(_):
+            loop.call_soon_threadsafe(self._release_slot)
+
+        try:
+            future = self._pool.submit(_process_text, text)
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(release)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+        # Cancelling the wrapper also cancels the pool future if it has
+        # not started yet; a started document keeps its slot until done
+        result = await asyncio.wrap_future(future)
+        self.completed += 1
+
+        instrumentation = self.system.instrumentation
+        if instrumentation is not None:
+            instrumentation.emit(result['timings'])
+        return result
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        """Return queue depth, in-flight work and request outcome counters."""
+        return {
+            'queued': max(0, self._pending - self._in_flight),
+            'in_flight': self._in_flight,
+            'completed': self.completed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected
+        }
+
+    async def close(self):
+        """Shut down the worker pool without blocking the event loop."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            # Cancel queued documents by hand: shutdown(cancel_futures=True)
+            # needs Python 3.9
+            for future in list(self._futures):
+                future.cancel()
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+        self.system.close()
+
+    async def __aenter__(self) -> 'AsyncANARSystem':
+        self._start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+def content_key(text: str, fingerprint: str) -> str:
+    """Content address of a document under a given pipeline fingerprint.
+
+    Args:
+        text: Raw input text
+        fingerprint: Hash of the configuration and pattern tables
+
+    Returns:
+        Hex digest identifying the cached result
+    """
+    digest = hashlib.sha256(fingerprint.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Persistent SQLite store of pipeline results with size-based LRU eviction.
+
+    Results are pickled and zlib-compressed. Every read refreshes the
+    entry's access time; once the stored bytes exceed ``max_bytes`` the
+    least recently used entries are deleted. The database may be shared by
+    several processes: connections are opened lazily and re-opened after a
+    fork, and the cache pickles by path.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a cached result.
+
+        Args:
+            key: Content key from content_key()
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT value FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        connection.execute(
+            'UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key)
+        )
+        self.hits += 1
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, result: Any):
+        """Store a result and evict old entries beyond the size limit.
+
+        Args:
+            key: Content key from content_key()
+            result: Picklable analysis result
+        """
+        value = zlib.compress(pickle.dumps(result, pickle.HIGHEST_PROTOCOL), 1)
+        connection = self._connect()
+        connection.execute(
+            'INSERT OR REPLACE INTO entries (key, value, size, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            (key, value, len(value), time.time())
+        )
+        self._evict()
+
+    def _evict(self):
+        connection = self._connect()
+        total = connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()[0]
+
+        while total > self.max_bytes:
+            rows = connection.execute(
+                'SELECT key, size FROM entries ORDER BY accessed LIMIT 64'
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def stats(self) -> Dict:
+        """Return entry count, stored bytes and hit/miss counters."""
+        entries, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def clear(self):
+        """Delete all cached results."""
+        self._connect().execute('DELETE FROM entries')
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
@@ -0,0 +1,323 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .spans import NarrativeElement
+from .utils.lazy import lazy_import
+
+nx = lazy_import('networkx')
+
+
+class NodeAttributes(Mapping):
+    """Extra attributes of individual nodes, keyed by node index.
+
+    The attribute dictionaries are held in an object array aligned with
+    the node arrays (None for nodes without any), so renumbering the nodes
+    is one vectorized gather instead of a rebuilt dictionary.
+    """
+
+    __slots__ = ('values',)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, extra: Dict[int, Dict], count: int) -> 'NodeAttributes':
+        values = np.full(count, None, dtype=object)
+        for node, attributes in extra.items():
+            values[node] = attributes
+        return cls(values)
+
+    def renumber(self, remap: np.ndarray, count: int) -> 'NodeAttributes':
+        """Move attributes to new node indices.
+
+        Args:
+            remap: New index per old node, -1 for nodes that disappear
+            count: Number of nodes after renumbering
+
+        Returns:
+            NodeAttributes of the renumbered nodes
+        """
+        values = np.full(count, None, dtype=object)
+        kept = remap >= 0
+        values[remap[kept]] = self.values[kept]
+        return NodeAttributes(values)
+
+    def get(self, node: int, default=None):
+        attributes = self.values[node] if 0 <= node < len(self.values) else None
+        return default if attributes is None else attributes
+
+    def __getitem__(self, node: int) -> Dict:
+        attributes = self.get(node)
+        if attributes is None:
+            raise KeyError(node)
+        return attributes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(np.flatnonzero(np.not_equal(self.values, None)).tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(np.not_equal(self.values, None)))
+
+    def __repr__(self) -> str:
+        return f"NodeAttributes({dict(self.items())!r})"
+
+
+# nx.DiGraph internals that networkx algorithms access directly
+_NX_INTERNALS = frozenset({'_adj', '_succ', '_pred', '_node', '__networkx_cache__'})
+
+
+class CompactGraph:
+    """Directed graph of text spans stored in flat arrays.
+
+    Node ``i`` has kind ``kind_names[kinds[i]]``, covers
+    ``doc[starts[i]:ends[i]]`` and appears as ``f"{kind}_{i}"`` in the
+    networkx view. Its successors are ``indices[indptr[i]:indptr[i + 1]]``
+    (CSR layout). ``fields`` lists, per kind, the attributes the view
+    materializes from the arrays ('type', 'position', 'end', 'text' or
+    'element'); ``extra`` (NodeAttributes) holds any further attributes of
+    individual nodes.
+
+    The networkx view is built on the first call to ``to_networkx()`` and
+    reused afterwards. Attributes not defined here, including the graph
+    internals networkx algorithms read directly (``_succ``, ``_adj`` ...),
+    are looked up on that view, so a CompactGraph can be passed to
+    networkx functions. It is not an ``nx.DiGraph`` instance, though:
+    use ``to_networkx()`` for isinstance checks and for functions that
+    build a new graph of the argument's class (such as
+    ``nx.relabel_nodes`` with ``copy=True``).
+    """
+
+    def __init__(
+        self,
+        doc: str,
+        kind_names: Sequence[str],
+        kinds: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        fields: Dict[str, Tuple[str, ...]],
+        extra: Union[NodeAttributes, Dict[int, Dict]] = None
+    ):
+        self.doc = doc
+        self.kind_names = tuple(kind_names)
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.indptr = indptr
+        self.indices = indices
+        self.fields = fields
+        if not isinstance(extra, NodeAttributes):
+            extra = NodeAttributes.from_dict(extra or {}, len(kinds))
+        self.extra = extra
+        self._view = None
+
+    @classmethod
+    def from_edges(
+        cls,
+        doc: str,
+        kind_names: Sequence[str],
+        kinds: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        fields: Dict[str, Tuple[str, ...]],
+        extra: Union[NodeAttributes, Dict[int, Dict]] = None
+    ) -> 'CompactGraph':
+        """Build a graph from node arrays and parallel edge endpoint arrays."""
+        order = np.argsort(sources, kind='stable')
+        counts = np.bincount(sources, minlength=len(kinds))
+        indptr = np.zeros(len(kinds) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(
+            doc, kind_names, kinds, starts, ends,
+            indptr, np.asarray(targets, dtype=np.int64)[order], fields, extra
+        )
+
+    @classmethod
+    def chain(
+        cls,
+        doc: str,
+        elements: Sequence,
+        fields: Dict[str, Tuple[str, ...]]
+    ) -> 'CompactGraph':
+        """Build a linear chain of span records in the given order.
+
+        Args:
+            doc: Text the records point into
+            elements: Records with type, start and end
+            fields: Attributes materialized per kind in the networkx view
+
+        Returns:
+            CompactGraph with an edge from each element to the next
+        """
+        kind_ids = {}
+        kinds = np.fromiter(
+            (kind_ids.setdefault(e.type, len(kind_ids)) for e in elements),
+            dtype=np.int8, count=len(elements)
+        )
+        starts = np.fromiter((e.start for e in elements), dtype=np.int64,
+                             count=len(elements))
+        ends = np.fromiter((e.end for e in elements), dtype=np.int64,
+                           count=len(elements))
+        n = len(elements)
+        indptr = np.minimum(np.arange(n + 1, dtype=np.int64), max(n - 1, 0))
+        indices = np.arange(1, n, dtype=np.int64)
+        return cls(doc, list(kind_ids), kinds, starts, ends, indptr, indices,
+                   fields)
+
+    def update_from(self, other: 'CompactGraph'):
+        """Take over the contents of another graph, keeping this object.
+
+        Used to patch a graph in place that callers already hold.
+        """
+        self.__dict__.update(other.__dict__)
+        self._view = None
+
+    def number_of_nodes(self) -> int:
+        return len(self.kinds)
+
+    def number_of_edges(self, u: str = None, v: str = None) -> int:
+        if u is None:
+            return len(self.indices)
+        return self.to_networkx().number_of_edges(u, v)
+
+    def kind(self, node: int) -> str:
+        return self.kind_names[self.kinds[node]]
+
+    def node_id(self, node: int) -> str:
+        return f"{self.kind(node)}_{node}"
+
+    def node_ids(self) -> List[str]:
+        names = self.kind_names
+        return [f"{names[k]}_{i}" for i, k in enumerate(self.kinds.tolist())]
+
+    def successors_of(self, node: int) -> np.ndarray:
+        """Return the successor node indices of node index ``node``."""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return parallel (source, target) node index arrays."""
+        sources = np.repeat(
+            np.arange(len(self.kinds), dtype=np.int64), np.diff(self.indptr)
+        )
+        return sources, self.indices
+
+    def node_attributes(self, node: int) -> Dict:
+        """Materialize the view attributes of node index ``node``."""
+        kind = self.kind(node)
+        start, end = int(self.starts[node]), int(self.ends[node])
+        attributes = {}
+        for field in self.fields.get(kind, ('type',)):
+            if field == 'type':
+                attributes['type'] = kind
+            elif field == 'position':
+                attributes['position'] = start
+            elif field == 'end':
+                attributes['end'] = end
+            elif field == 'text':
+                attributes['text'] = self.doc[start:end]
+            elif field == 'element':
+                attributes['element'] = NarrativeElement(self.doc, kind, start, end)
+        attributes.update(self.extra.get(node, ()))
+        return attributes
+
+    def to_networkx(self, cache: bool = True) -> 'nx.DiGraph':
+        """Return the graph as an ``nx.DiGraph``.
+
+        Args:
+            cache: Keep the view for later calls and attribute lookups
+
+        Returns:
+            NetworkX DiGraph with string node ids
+        """
+        if self._view is not None:
+            return self._view
+
+        ids = self.node_ids()
+        graph = nx.DiGraph()
+        graph.add_nodes_from(
+            (node_id, self.node_attributes(i)) for i, node_id in enumerate(ids)
+        )
+        sources, targets = self.edge_arrays()
+        graph.add_edges_from(
+            (ids[u], ids[v]) for u, v in zip(sources.tolist(), targets.tolist())
+        )
+        if cache:
+            self._view = graph
+        return graph
+
+    def __getattr__(self, name):
+        if name.startswith('_') and name not in _NX_INTERNALS:
+            raise AttributeError(name)
+        return getattr(self.to_networkx(), name)
+
+    def __len__(self) -> int:
+        return self.number_of_nodes()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.node_ids())
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self.to_networkx()
+
+    def __getitem__(self, node_id):
+        return self.to_networkx()[node_id]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_view'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+class CompactGraphBuilder:
+    """Accumulates nodes and edges for a CompactGraph in typed arrays."""
+
+    def __init__(self, doc: str, fields: Dict[str, Tuple[str, ...]]):
+        self.doc = doc
+        self.fields = fields
+        self._kind_ids = {}
+        self._kinds = array('b')
+        self._starts = array('q')
+        self._ends = array('q')
+        self._sources = array('q')
+        self._targets = array('q')
+        self._extra = {}
+
+    def add_node(self, kind: str, start: int = -1, end: int = -1, **extra) -> int:
+        """Add a node and return its index."""
+        node = len(self._kinds)
+        self._kinds.append(self._kind_ids.setdefault(kind, len(self._kind_ids)))
+        self._starts.append(start)
+        self._ends.append(end)
+        if extra:
+            self._extra[node] = extra
+        return node
+
+    def add_edge(self, source: int, target: int):
+        self._sources.append(source)
+        self._targets.append(target)
+
+    def add_edges(self, edges: Iterable[Tuple[int, int]]):
+        for source, target in edges:
+            self.add_edge(source, target)
+
+    def build(self) -> CompactGraph:
+        return CompactGraph.from_edges(
+            self.doc,
+            list(self._kind_ids),
+            np.frombuffer(self._kinds, dtype=np.int8).copy(),
+            np.frombuffer(self._starts, dtype=np.int64).copy(),
+            np.frombuffer(self._ends, dtype=np.int64).copy(),
+            np.frombuffer(self._sources, dtype=np.int64),
+            np.frombuffer(self._targets, dtype=np.int64),
+            self.fields,
+            self._extra
+        )
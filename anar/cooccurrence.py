@@ -0,0 +1,185 @@
+import numpy as np
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .utils.arabic_utils import word_starts
+from .utils.lazy import lazy_import
+
+nx = lazy_import('networkx')
+sparse = lazy_import('scipy.sparse')
+
+
+class CooccurrenceMatrix:
+    """Weighted character co-occurrence counts in sparse form.
+
+    ``vocabulary[i]`` is the name of character id ``i`` and ``weights`` is
+    a symmetric CSR matrix with an empty diagonal: ``weights[i, j]`` is the
+    co-occurrence weight of characters ``i`` and ``j``.
+    """
+
+    def __init__(self, vocabulary: List[str], weights: 'sparse.csr_matrix'):
+        self.vocabulary = vocabulary
+        self.weights = weights
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def edges(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield (name, name, weight) once per unordered character pair."""
+        upper = sparse.triu(self.weights, k=1).tocoo()
+        names = self.vocabulary
+        for row, col, weight in zip(upper.row.tolist(), upper.col.tolist(),
+                                    upper.data.tolist()):
+            yield names[row], names[col], weight
+
+    def to_networkx(self) -> 'nx.Graph':
+        """Return a graph with every character and weighted edges."""
+        graph = nx.Graph()
+        graph.add_nodes_from(self.vocabulary)
+        graph.add_weighted_edges_from(self.edges())
+        return graph
+
+
+class CooccurrenceEngine:
+    """Computes weighted character co-occurrence with sparse matrix products.
+
+    Character names are mapped to integer ids in order of first mention.
+    In ``'story'`` mode a segment-by-character incidence matrix ``B`` is
+    built from the story segments and the counts are ``B.T @ B``; with
+    ``weighting='binary'`` an edge weight is the number of segments two
+    characters share, with ``'count'`` repeated mentions multiply. In
+    ``'window'`` mode two mentions co-occur when they are at most ``window``
+    whitespace-separated tokens apart, and the weight is the number of such
+    mention pairs. Self co-occurrence is never reported.
+    """
+
+    MODES = ('story', 'window')
+    WEIGHTINGS = ('binary', 'count')
+
+    def __init__(self, mode: str = 'story', window: int = 50,
+                 weighting: str = 'binary'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown co-occurrence mode: {mode!r}")
+        if weighting not in self.WEIGHTINGS:
+            raise ValueError(f"Unknown co-occurrence weighting: {weighting!r}")
+        self.mode = mode
+        self.window = window
+        self.weighting = weighting
+
+    @staticmethod
+    def _vocabulary(names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        ids = {}
+        for name in names:
+            ids.setdefault(name, len(ids))
+        return ids, list(ids)
+
+    def from_stories(
+        self,
+        stories: Sequence[Dict],
+        characters: Iterable[str] = ()
+    ) -> CooccurrenceMatrix:
+        """Count co-occurrence within story segments.
+
+        Args:
+            stories: Story dicts whose 'elements' hold narrative elements
+            characters: Additional names to include as isolated nodes
+
+        Returns:
+            CooccurrenceMatrix over all characters seen
+        """
+        rows, names = [], []
+        for row, story in enumerate(stories):
+            for element in story['elements']:
+                if element['type'] == 'character':
+                    rows.append(row)
+                    names.append(element['text'])
+
+        ids, vocabulary = self._vocabulary(names + list(characters))
+        cols = np.fromiter((ids[name] for name in names), dtype=np.int64,
+                           count=len(names))
+        incidence = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.float64),
+             (np.asarray(rows, dtype=np.int64), cols)),
+            shape=(len(stories), len(vocabulary))
+        )
+        if self.weighting == 'binary':
+            incidence.data[:] = 1.0
+
+        weights = (incidence.T @ incidence).tocsr()
+        weights.setdiag(0)
+        weights.eliminate_zeros()
+        return CooccurrenceMatrix(vocabulary, weights)
+
+    def from_mentions(
+        self,
+        names: Sequence[str],
+        tokens: Sequence[int],
+        characters: Iterable[str] = ()
+    ) -> CooccurrenceMatrix:
+        """Count mention pairs at most ``window`` tokens apart.
+
+        Args:
+            names: Character name of each mention
+            tokens: Token index of each mention, non-decreasing
+            characters: Additional names to include as isolated nodes
+
+        Returns:
+            CooccurrenceMatrix over all characters seen
+        """
+        ids, vocabulary = self._vocabulary(list(names) + list(characters))
+        mention_ids = np.fromiter((ids[name] for name in names),
+                                  dtype=np.int64, count=len(names))
+        tokens = np.asarray(tokens, dtype=np.int64)
+
+        # Mentions sorted by token index: the pairs k apart that fit in the
+        # window shrink as k grows, so stop at the first k with none left
+        left, right = [], []
+        for k in range(1, len(mention_ids)):
+            close = (tokens[k:] - tokens[:-k]) <= self.window
+            if not close.any():
+                break
+            left.append(mention_ids[:-k][close])
+            right.append(mention_ids[k:][close])
+
+        n = len(vocabulary)
+        if left:
+            a, b = np.concatenate(left), np.concatenate(right)
+            keep = a != b
+            a, b = a[keep], b[keep]
+            pairs = sparse.coo_matrix(
+                (np.ones(len(a)), (np.minimum(a, b), np.maximum(a, b))),
+                shape=(n, n)
+            ).tocsr()
+            weights = (pairs + pairs.T).tocsr()
+        else:
+            weights = sparse.csr_matrix((n, n))
+        return CooccurrenceMatrix(vocabulary, weights)
+
+    def from_document(
+        self,
+        text: str,
+        narrative_elements: Sequence,
+        nested_stories: Sequence[Dict]
+    ) -> CooccurrenceMatrix:
+        """Count co-occurrence in one analyzed document using the engine mode.
+
+        Args:
+            text: Normalized text the elements point into
+            narrative_elements: Elements of the document sorted by position
+            nested_stories: Story segments of the document
+
+        Returns:
+            CooccurrenceMatrix over the document's characters
+        """
+        mentions = [
+            element for element in narrative_elements
+            if element['type'] == 'character'
+        ]
+        names = [element['text'] for element in mentions]
+
+        if self.mode == 'story':
+            return self.from_stories(nested_stories, names)
+
+        positions = np.fromiter((element['position'] for element in mentions),
+                                dtype=np.int64, count=len(mentions))
+        tokens = np.searchsorted(word_starts(text), positions, side='right')
+        return self.from_mentions(names, tokens)
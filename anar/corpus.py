@@ -0,0 +1,136 @@
+import multiprocessing
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+# Per-process pipeline, set once by _init_worker in each pool worker
+_worker_system = None
+
+
+def _init_worker(system):
+    """Install the pipeline used by this worker process.
+
+    Args:
+        system: ANARSystem whose compiled pattern tables are reused for
+            every task handled by the worker
+    """
+    global _worker_system
+    _worker_system = system
+    if system.instrumentation is not None:
+        # Timings callbacks run in the parent, which receives each result
+        system.instrumentation.callbacks = []
+
+
+def _process_text(text: str) -> Dict:
+    return _worker_system.process_text(text)
+
+
+def _process_indexed(item: Tuple[int, str]) -> Tuple[int, Dict]:
+    index, text = item
+    return index, _worker_system.process_text(text)
+
+
+def _process_file(item: Tuple[int, str]) -> Tuple[int, Union[Dict, List[Dict]]]:
+    index, path = item
+    return index, _file_result(_worker_system, path)
+
+
+def _file_result(system, path: str) -> Union[Dict, List[Dict]]:
+    result = system.process_file(path)
+    # Streamed files are materialized so that they can be returned
+    return result if isinstance(result, dict) else list(result)
+
+
+def process_corpus(
+    system,
+    texts: Iterable[str],
+    workers: int = None,
+    chunksize: int = 1,
+    ordered: bool = True
+) -> Iterator[Union[Dict, Tuple[int, Dict]]]:
+    """Process many documents, optionally fanning out to a process pool.
+
+    Args:
+        system: ANARSystem used in-process and copied into each worker
+        texts: Iterable of raw Arabic texts
+        workers: Number of worker processes; None, 0 or 1 processes the
+            corpus sequentially in the calling process
+        chunksize: Number of documents sent to a worker per task
+        ordered: Yield results in input order. When False, results are
+            yielded as they complete as (index, result) tuples.
+
+    Returns:
+        Generator of analysis results
+    """
+    if not workers or workers == 1:
+        for index, text in enumerate(texts):
+            result = system.process_text(text)
+            yield result if ordered else (index, result)
+        return
+
+    if ordered:
+        yield from _map_pool(system, _process_text, texts, workers, chunksize)
+    else:
+        yield from _map_pool(
+            system, _process_indexed, enumerate(texts), workers, chunksize,
+            ordered=False, indexed=True
+        )
+
+
+def process_files(
+    system,
+    paths: Iterable[str],
+    workers: int = None,
+    chunksize: int = 1,
+    ordered: bool = True
+) -> Iterator[Tuple[int, Union[Dict, List[Dict]]]]:
+    """Process many files with ANARSystem.process_file.
+
+    Workers receive the paths and read the files themselves.
+
+    Args:
+        system: ANARSystem used in-process and copied into each worker
+        paths: Paths of UTF-8 text files
+        workers: Number of worker processes; None, 0 or 1 processes the
+            files sequentially in the calling process
+        chunksize: Number of files sent to a worker per task
+        ordered: Yield results in input order rather than as completed
+
+    Returns:
+        Generator of (index, result) tuples; streamed files give the list
+        of their stream records as result
+    """
+    if not workers or workers == 1:
+        for index, path in enumerate(paths):
+            yield index, _file_result(system, path)
+        return
+
+    yield from _map_pool(
+        system, _process_file, enumerate(paths), workers, chunksize,
+        ordered=ordered, indexed=True
+    )
+
+
+def _map_pool(system, function, items, workers, chunksize, ordered=True,
+              indexed=False):
+    # Worker pipelines are created once from the parent's already compiled
+    # system (inherited directly under fork, pickled once under spawn).
+    pool = multiprocessing.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(system,)
+    )
+    try:
+        if ordered:
+            results = pool.imap(function, items, chunksize)
+        else:
+            results = pool.imap_unordered(function, items, chunksize)
+        instrumentation = system.instrumentation
+        for item in results:
+            result = item[1] if indexed else item
+            if instrumentation is not None and isinstance(result, dict):
+                instrumentation.emit(result['timings'])
+            yield item
+        pool.close()
+    finally:
+        # Also reached when the consumer stops iterating early
+        pool.terminate()
+        pool.join()
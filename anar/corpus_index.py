@@ -0,0 +1,532 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .utils.arabic_utils import word_starts
+from .utils.intervals import containing_intervals
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    UNIQUE (kind, value)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+"""
+
+# Per posting: start, end, token index of the start, innermost story
+# segment (-1 outside every story)
+_FIELDS = 4
+_DTYPE = np.dtype('<i4')
+
+TERM_KINDS = ('pattern', 'category', 'character', 'event', 'frame')
+
+
+class Matches(NamedTuple):
+    """Query result: matching document ids and the postings that matched.
+
+    The posting arrays are sorted by (doc, start). A negated query matches
+    documents without contributing postings.
+    """
+    docs: np.ndarray
+    doc: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    token: np.ndarray
+    segment: np.ndarray
+
+    def take(self, mask: np.ndarray) -> 'Matches':
+        doc = self.doc[mask]
+        return Matches(np.unique(doc), doc, self.start[mask], self.end[mask],
+                       self.token[mask], self.segment[mask])
+
+
+def _empty(docs: np.ndarray = None) -> Matches:
+    none = np.zeros(0, dtype=np.int64)
+    return Matches(none if docs is None else docs, none, none, none, none, none)
+
+
+def _concat(parts: List[Matches], docs: np.ndarray) -> Matches:
+    if not parts:
+        return _empty(docs)
+    columns = [np.concatenate([part[i] for part in parts]) for i in range(1, 6)]
+    order = np.lexsort((columns[1], columns[0]))
+    return Matches(docs, *(column[order] for column in columns))
+
+
+def _keys(doc: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # One sortable key per (document, offset) pair
+    return (doc << 32) | offsets
+
+
+class Query(ABC):
+    """Base of the query expressions; combine with ``&``, ``|`` and ``~``."""
+
+    @abstractmethod
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        """Match the query against an index."""
+
+    def __and__(self, other: 'Query') -> 'Query':
+        return And(self, other)
+
+    def __or__(self, other: 'Query') -> 'Query':
+        return Or(self, other)
+
+    def __invert__(self) -> 'Query':
+        return Not(self)
+
+
+class Term(Query):
+    """Postings of one indexed term, or of every term with a prefix.
+
+    Kinds are 'pattern' (cultural pattern text), 'category' (pattern
+    category), 'character' and 'event' (element text) and 'frame' (the
+    frame marker of a story, spanning the whole story).
+    """
+
+    def __init__(self, kind: str, value: str, prefix: bool = False):
+        if kind not in TERM_KINDS:
+            raise ValueError(f"Unknown term kind: {kind!r}")
+        self.kind = kind
+        self.value = value
+        self.prefix = prefix
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        return index._postings(self.kind, self.value, self.prefix)
+
+
+class Pattern(Term):
+    """Occurrences of a cultural pattern."""
+
+    def __init__(self, value: str):
+        super().__init__('pattern', value)
+
+
+class Category(Term):
+    """Occurrences of every cultural pattern of a category."""
+
+    def __init__(self, value: str):
+        super().__init__('category', value)
+
+
+class Character(Term):
+    """Mentions of a character, or of every character name with a prefix."""
+
+    def __init__(self, name: str, prefix: bool = False):
+        super().__init__('character', name, prefix)
+
+
+class Event(Term):
+    """Occurrences of an event text, or of every event text with a prefix."""
+
+    def __init__(self, text: str, prefix: bool = False):
+        super().__init__('event', text, prefix)
+
+
+class Frame(Term):
+    """Stories opened by a frame marker, each spanning the whole story."""
+
+    def __init__(self, marker: str):
+        super().__init__('frame', marker)
+
+
+class And(Query):
+    """Documents matched by every operand; Not operands exclude documents."""
+
+    def __init__(self, *queries: Query):
+        self.queries = queries
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        positive = [q.evaluate(index) for q in self.queries if not isinstance(q, Not)]
+        negative = [q.query.evaluate(index) for q in self.queries if isinstance(q, Not)]
+        docs = positive[0].docs if positive else index._all_docs()
+        for matches in positive[1:]:
+            docs = np.intersect1d(docs, matches.docs, assume_unique=True)
+        for matches in negative:
+            docs = np.setdiff1d(docs, matches.docs, assume_unique=True)
+        return _concat([m.take(np.isin(m.doc, docs)) for m in positive], docs)
+
+
+class Or(Query):
+    """Documents matched by any operand."""
+
+    def __init__(self, *queries: Query):
+        self.queries = queries
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        parts = [q.evaluate(index) for q in self.queries]
+        docs = np.unique(np.concatenate([m.docs for m in parts])) if parts else None
+        return _concat(parts, docs)
+
+
+class Not(Query):
+    """Documents not matched by the operand."""
+
+    def __init__(self, query: Query):
+        self.query = query
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        docs = np.setdiff1d(index._all_docs(), self.query.evaluate(index).docs,
+                            assume_unique=True)
+        return _empty(docs)
+
+
+class Near(Query):
+    """Postings of ``first`` with a posting of ``second`` close by.
+
+    Distance is counted in whitespace-separated tokens between the starts
+    of the two matches; with ``ordered`` the second must not come first.
+    """
+
+    def __init__(self, first: Query, second: Query, distance: int = 10,
+                 ordered: bool = False):
+        self.first = first
+        self.second = second
+        self.distance = distance
+        self.ordered = ordered
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        first = self.first.evaluate(index)
+        second = self.second.evaluate(index)
+        first_keys = _keys(first.doc, first.token)
+        second_keys = np.sort(_keys(second.doc, second.token))
+        if not len(second_keys):
+            return _empty()
+
+        # The closest second posting is either the next one at or after
+        # the first posting or the one just before it
+        after = np.searchsorted(second_keys, first_keys)
+        found = np.zeros(len(first_keys), dtype=bool)
+        candidates = [after] if self.ordered else [after, after - 1]
+        for candidate in candidates:
+            valid = (candidate >= 0) & (candidate < len(second_keys))
+            other = second_keys[np.clip(candidate, 0, len(second_keys) - 1)]
+            found |= valid & (np.abs(other - first_keys) <= self.distance) & (
+                (other >> 32) == first.doc
+            )
+        return first.take(found)
+
+
+class Within(Query):
+    """Postings of ``query`` whose span lies inside a posting of ``container``.
+
+    ``Within(Character('الوزير', prefix=True), Frame('قالت شهرزاد'))``
+    finds vizier mentions in stories opened by that marker.
+    """
+
+    def __init__(self, query: Query, container: Query):
+        self.query = query
+        self.container = container
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        inner = self.query.evaluate(index)
+        outer = self.container.evaluate(index)
+        if not len(outer.doc):
+            return _empty()
+
+        # Containers are sorted by start; the largest end key among those
+        # starting at or before a posting decides whether one contains it
+        reach = np.maximum.accumulate(_keys(outer.doc, outer.end))
+        last = np.searchsorted(_keys(outer.doc, outer.start),
+                               _keys(inner.doc, inner.start), side='right') - 1
+        contained = (last >= 0) & (
+            reach[np.maximum(last, 0)] >= _keys(inner.doc, inner.end)
+        )
+        return inner.take(contained)
+
+
+class SameSegment(Query):
+    """Postings of all operands that share an innermost story segment."""
+
+    def __init__(self, *queries: Query):
+        self.queries = queries
+
+    def evaluate(self, index: 'CorpusIndex') -> Matches:
+        parts = [q.evaluate(index) for q in self.queries]
+        segments = None
+        for matches in parts:
+            inside = matches.segment >= 0
+            keys = np.unique(_keys(matches.doc[inside], matches.segment[inside]))
+            segments = keys if segments is None else np.intersect1d(
+                segments, keys, assume_unique=True
+            )
+        if segments is None:
+            return _empty()
+        parts = [m.take(np.isin(_keys(m.doc, m.segment), segments)) for m in parts]
+        return _concat(parts, np.unique(segments >> 32))
+
+
+class CorpusIndex:
+    """Persistent inverted index over analyzed documents.
+
+    For every document the postings of each term (cultural patterns and
+    their categories, characters, events and story frames) are stored in
+    SQLite as one packed int32 array per (term, document) row, so a term
+    with millions of matches is read with a single index range scan and
+    decoded without per-posting Python objects. Each posting records its
+    character span, token index and innermost story segment, which the
+    Near, Within and SameSegment queries use. Documents can be added and
+    replaced incrementally; like ResultCache, connections are opened
+    lazily, re-opened after a fork and the index pickles by path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._terms = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+            self._terms = {}
+        return self._connection
+
+    def add(self, key: str, narrative_analysis: Dict, cultural_analysis: Dict):
+        """Index one document, replacing any earlier version with that key.
+
+        Args:
+            key: Document key returned by search()
+            narrative_analysis: Output from NarrativeAnalyzer.analyze
+            cultural_analysis: Output from CulturalProcessor.process
+        """
+        graph = narrative_analysis['narrative_graph']
+        stories = narrative_analysis['nested_stories']
+        text = graph.doc
+        starts = word_starts(text)
+
+        def token(position):
+            return int(np.searchsorted(starts, position, side='right'))
+
+        spans = []
+        for node in range(graph.number_of_nodes()):
+            kind = graph.kind(node)
+            if kind in ('character', 'event'):
+                start, end = int(graph.starts[node]), int(graph.ends[node])
+                spans.append((kind, text[start:end], start, end))
+        for pattern in cultural_analysis['patterns']:
+            start = pattern['position']
+            end = start + len(pattern['pattern'])
+            spans.append(('pattern', pattern['pattern'], start, end))
+            spans.append(('category', pattern['category'], start, end))
+
+        # Innermost story containing each span
+        segment = [-1] * len(spans)
+        depth = [-1] * len(spans)
+        for i, story_index in containing_intervals(
+            ((s['position'], s['end'], s['index']) for s in stories),
+            ((start, end, i) for i, (_, _, start, end) in enumerate(spans))
+        ):
+            if stories[story_index]['depth'] > depth[i]:
+                segment[i] = story_index
+                depth[i] = stories[story_index]['depth']
+
+        postings = {}
+        for (kind, value, start, end), seg in zip(spans, segment):
+            postings.setdefault((kind, value), []).append(
+                (start, end, token(start), seg)
+            )
+        for story in stories:
+            postings.setdefault(('frame', story['frame_marker']), []).append(
+                (story['position'], story['end'], token(story['position']),
+                 story['index'])
+            )
+
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            doc = self._replace_document(connection, key, len(text))
+            rows = []
+            for term, entries in postings.items():
+                entries.sort()
+                rows.append((
+                    self._term_id(connection, *term), doc, len(entries),
+                    np.asarray(entries, dtype=_DTYPE).tobytes()
+                ))
+            connection.executemany(
+                'INSERT INTO postings (term, doc, count, data) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            self._terms = {}
+            raise
+
+    def add_result(self, key: str, result: Dict):
+        """Index one output of ANARSystem.process_text."""
+        self.add(key, result['narrative_analysis'], result['cultural_analysis'])
+
+    def add_all(self, items: Iterable[Tuple[str, Dict]]):
+        """Index (key, ANARSystem result) pairs, e.g. from process_corpus."""
+        for key, result in items:
+            self.add_result(key, result)
+
+    def _replace_document(self, connection: sqlite3.Connection, key: str,
+                          length: int) -> int:
+        row = connection.execute(
+            'SELECT id FROM documents WHERE key = ?', (key,)
+        ).fetchone()
+        if row is not None:
+            connection.execute('DELETE FROM postings WHERE doc = ?', (row[0],))
+            connection.execute(
+                'UPDATE documents SET length = ? WHERE id = ?', (length, row[0])
+            )
+            return row[0]
+        return connection.execute(
+            'INSERT INTO documents (key, length) VALUES (?, ?)', (key, length)
+        ).lastrowid
+
+    def _term_id(self, connection: sqlite3.Connection, kind: str, value: str) -> int:
+        term_id = self._terms.get((kind, value))
+        if term_id is None:
+            connection.execute(
+                'INSERT OR IGNORE INTO terms (kind, value) VALUES (?, ?)',
+                (kind, value)
+            )
+            term_id = connection.execute(
+                'SELECT id FROM terms WHERE kind = ? AND value = ?', (kind, value)
+            ).fetchone()[0]
+            self._terms[(kind, value)] = term_id
+        return term_id
+
+    def remove(self, key: str) -> bool:
+        """Drop a document from the index.
+
+        Returns:
+            True if the document was indexed
+        """
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT id FROM documents WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return False
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('DELETE FROM postings WHERE doc = ?', (row[0],))
+        connection.execute('DELETE FROM documents WHERE id = ?', (row[0],))
+        connection.execute('COMMIT')
+        return True
+
+    def _postings(self, kind: str, value: str, prefix: bool = False) -> Matches:
+        if prefix:
+            condition = 't.value >= ? AND t.value < ?'
+            parameters = (value, value + '\U0010ffff')
+        else:
+            condition, parameters = 't.value = ?', (value,)
+        rows = self._connect().execute(
+            'SELECT p.doc, p.count, p.data FROM terms t '
+            'JOIN postings p ON p.term = t.id '
+            f'WHERE t.kind = ? AND {condition}',
+            (kind, *parameters)
+        ).fetchall()
+        if not rows:
+            return _empty()
+
+        docs = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        counts = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        data = np.frombuffer(b''.join(row[2] for row in rows), dtype=_DTYPE)
+        data = data.reshape(-1, _FIELDS).astype(np.int64)
+        doc = np.repeat(docs, counts)
+        order = np.lexsort((data[:, 0], doc))
+        return Matches(np.unique(docs), doc[order],
+                       *(data[order, i] for i in range(_FIELDS)))
+
+    def _all_docs(self) -> np.ndarray:
+        rows = self._connect().execute('SELECT id FROM documents ORDER BY id').fetchall()
+        return np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+
+    def _keys_of(self, doc_ids: Iterable[int]) -> Dict[int, str]:
+        doc_ids = list(doc_ids)
+        keys = {}
+        connection = self._connect()
+        # Stay below SQLite's bound parameter limit
+        for i in range(0, len(doc_ids), 500):
+            chunk = doc_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            keys.update(connection.execute(
+                f'SELECT id, key FROM documents WHERE id IN ({placeholders})', chunk
+            ).fetchall())
+        return keys
+
+    def search(self, query: Query, limit: Optional[int] = None) -> List[str]:
+        """Return the keys of the documents matching a query.
+
+        Args:
+            query: Query expression, e.g.
+                ``SameSegment(Character('الوزير', prefix=True),
+                Pattern('بين حانا ومانا'))``
+            limit: Maximum number of keys to return
+
+        Returns:
+            Document keys in indexing order
+        """
+        docs = query.evaluate(self).docs.tolist()[:limit]
+        keys = self._keys_of(docs)
+        return [keys[doc] for doc in docs]
+
+    def matches(self, query: Query) -> List[Tuple[str, int, int]]:
+        """Return the (document key, start, end) spans that matched a query."""
+        result = query.evaluate(self)
+        keys = self._keys_of(result.docs.tolist())
+        return [
+            (keys[doc], start, end) for doc, start, end in zip(
+                result.doc.tolist(), result.start.tolist(), result.end.tolist()
+            )
+        ]
+
+    def count(self, query: Query) -> int:
+        """Return the number of documents matching a query."""
+        return len(query.evaluate(self).docs)
+
+    def stats(self) -> Dict:
+        """Return document, term and posting counts."""
+        connection = self._connect()
+        documents = connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        terms = connection.execute('SELECT COUNT(*) FROM terms').fetchone()[0]
+        postings = connection.execute(
+            'SELECT COALESCE(SUM(count), 0) FROM postings'
+        ).fetchone()[0]
+        return {'documents': documents, 'terms': terms, 'postings': postings}
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        state['_terms'] = {}
+        return state
+
+    def __enter__(self) -> 'CorpusIndex':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
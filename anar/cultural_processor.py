@@ -1,12 +1,139 @@
-from typing import Dict, List
+import copy
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
 import re
 
+import numpy as np
+
+from .instrumentation import instrumented
+from .patterns import PatternTables, _check_info, get_registry, tables_digest
+from .spans import CONTEXT_CHARS, PatternMatch
+from .utils.arabic_utils import code_points, space_mask
+from .utils.memo import SegmentMemo, iter_segments
+
+# Context markers used when scoring pattern confidence
+TEMPORAL_MARKER_RE = re.compile(r'في (عهد|زمن|وقت)')
+SOCIAL_MARKER_RE = re.compile(r'(الملك|السلطان|الوزير)')
+WORD_RE = re.compile(r'\S+')
+
+CATEGORY_MARKERS = {
+    'historical': TEMPORAL_MARKER_RE,
+    'social_custom': SOCIAL_MARKER_RE
+}
+
+# Minimum confidence for a pattern to be kept (threshold from paper)
+CONFIDENCE_THRESHOLD = 0.85
+
+# Below this many candidates, per-pattern scoring beats the batch setup cost
+BATCH_SCORING_MIN = 64
+
 class CulturalProcessor:
-    """Processor for cultural elements in Classical Arabic texts."""
+    """Processor for cultural elements in Classical Arabic texts.
+    
+    Pattern matches are memoized per sentence segment (see
+    TextPreprocessor), bounded by ``segment_memo_size`` in the config. The
+    memo is bypassed when a pattern itself contains a segment delimiter.
     
-    def __init__(self, config: Dict = None):
+    Patterns come from the shared pattern registry selected by the config
+    (see get_registry) unless ``tables`` is given. Edits to
+    ``cultural_patterns`` take effect at the next ``process()`` call.
+    """
+    
+    def __init__(self, config: Dict = None, tables: PatternTables = None):
         self.config = config or {}
-        self.cultural_patterns = self._load_cultural_patterns()
+        self.use_tables(tables or get_registry(self.config).tables)
+        
+    def use_tables(self, tables: PatternTables):
+        """Switch to another pattern snapshot, discarding memoized matches.
+        
+        Args:
+            tables: Compiled pattern tables
+        """
+        self.tables = tables
+        self._cultural_patterns = None
+        self._compile(tables)
+        
+    def _compile(self, tables: PatternTables):
+        # Set up matching from the snapshot the cultural patterns come from
+        self._compiled = tables
+        self._pattern_table = tables.pattern_table
+        self._matcher = tables.matcher
+        
+        # Per-pattern lookup arrays for batch scoring
+        categories = tables.categories
+        self._category_codes = np.array(tables.category_codes, dtype=np.int64)
+        self._marker_splitters = {
+            categories.index(category): re.compile(f'({regex.pattern})')
+            for category, regex in CATEGORY_MARKERS.items()
+            if category in categories
+        }
+        self._idiomatic_code = (
+            categories.index('idiomatic') if 'idiomatic' in categories else -1
+        )
+        self._context_splitters = {}
+        
+        memo_size = self.config.get('segment_memo_size', 4096)
+        self._memo = (
+            SegmentMemo(memo_size)
+            if memo_size and 'cultural' not in tables.crossing_tables else None
+        )
+        
+    @property
+    def cultural_patterns(self) -> Dict:
+        """Private, editable copy of the cultural pattern definitions.
+        
+        The copy is made on first access. Matching uses the shared compiled
+        tables until the copy is edited; sync_patterns() then compiles a
+        private matcher from it, and patterns_digest() always describes the
+        tables that matcher was compiled from.
+        """
+        if self._cultural_patterns is None:
+            self._cultural_patterns = copy.deepcopy(self.tables.data['cultural'])
+        return self._cultural_patterns
+        
+    @cultural_patterns.setter
+    def cultural_patterns(self, patterns: Dict):
+        self._cultural_patterns = patterns
+        
+    def sync_patterns(self) -> bool:
+        """Recompile the matcher if ``cultural_patterns`` was edited.
+        
+        Returns:
+            Whether the matcher was rebuilt
+            
+        Raises:
+            ValueError: If an edited pattern's info lacks the keys its
+                category requires (see load_pattern_file)
+        """
+        if self._cultural_patterns is None:
+            return False
+        edited = dict(self.tables.data, cultural=self._cultural_patterns)
+        if tables_digest(edited) == self._compiled.digest:
+            return False
+        cultural = {
+            category: {
+                pattern: _check_info(
+                    info, category, f"cultural_patterns/{category}/{pattern}"
+                )
+                for pattern, info in patterns.items()
+            }
+            for category, patterns in copy.deepcopy(self._cultural_patterns).items()
+        }
+        self._compile(PatternTables(dict(self.tables.data, cultural=cultural)))
+        return True
+        
+    def patterns_digest(self) -> str:
+        """Hash the pattern tables matched against, including edits.
+        
+        Edits to cultural_patterns are compiled first (see sync_patterns),
+        so the digest never describes tables other than the matched ones.
+        
+        Returns:
+            Hex digest equal to ``tables.digest`` while nothing was edited
+        """
+        self.sync_patterns()
+        return self._compiled.digest
         
     def process(self, processed_text: Dict) -> Dict:
         """Process text for cultural elements and patterns.
@@ -18,6 +145,7 @@ class CulturalProcessor:
             Dict containing cultural analysis results
         """
         text = processed_text['normalized_text']
+        self.sync_patterns()
         
         # Detect patterns
         patterns = self._detect_patterns(text)
@@ -33,113 +161,283 @@ class CulturalProcessor:
             'contexts': contexts
         }
         
-    def _load_cultural_patterns(self) -> Dict:
-        """Load cultural pattern definitions.
+    @instrumented('detect_patterns')
+    def _detect_patterns(
+        self,
+        text: str,
+        start: int = 0,
+        stop: int = None,
+        state: Dict[int, int] = None
+    ) -> List[Dict]:
+        """Detect cultural patterns in text.
+        
+        All patterns are matched in one pass over the text. Occurrences of
+        the same pattern never overlap, mirroring ``re.finditer``.
         
+        Args:
+            text: Normalized Arabic text
+            start: Offset at which scanning starts
+            stop: Only report patterns starting before this offset
+            state: Mapping of pattern index to the end of its last match,
+                carried between consecutive calls
+            
         Returns:
-            Dictionary of pattern categories and their patterns
+            List of PatternMatch records ordered by position
         """
-        return {
-            'idiomatic': {
-                'ضرب في الأرض': {
-                    'meaning': 'to travel extensively',
-                    'context': 'travel_narrative'
-                },
-                'بين حانا ومانا': {
-                    'meaning': 'between a rock and a hard place',
-                    'context': 'difficulty'
-                }
-            },
-            'historical': {
-                'في عهد هارون الرشيد': {
-                    'period': 'Abbasid',
-                    'year_range': (786, 809)
-                }
-            },
-            'social_custom': {
-                'قبّل الأرض بين يديه': {
-                    'meaning': 'show deep respect',
-                    'context': 'court_etiquette'
-                }
-            }
-        }
+        if (self._memo is not None and start == 0 and stop is None and
+                state is None):
+            return self._detect_segment_patterns(text)
+            
+        detected = []
+        last_end = {} if state is None else state
+        stop = len(text) if stop is None else stop
+        matches = sorted(
+            self._matcher.iter_matches(text, start),
+            key=lambda m: (m[0], m[2])
+        )
         
-    def _detect_patterns(self, text: str) -> List[Dict]:
-        """Detect cultural patterns in text.
+        for match_start, end, index in matches:
+            if match_start >= stop:
+                break
+            if match_start < last_end.get(index, 0):
+                continue
+            last_end[index] = end
+            
+            detected.append(
+                PatternMatch(text, match_start, end, index, self._pattern_table)
+            )
+                    
+        return detected
+        
+    def _detect_segment_patterns(self, text: str) -> List[PatternMatch]:
+        """Detect cultural patterns segment by segment, reusing memoized matches.
         
         Args:
             text: Normalized Arabic text
             
         Returns:
-            List of detected pattern dictionaries
+            List of PatternMatch records ordered by position
         """
         detected = []
         
-        for category, patterns in self.cultural_patterns.items():
-            for pattern, info in patterns.items():
-                for match in re.finditer(re.escape(pattern), text):
-                    detected.append({
-                        'category': category,
-                        'pattern': pattern,
-                       'position': match.start(),
-                        'info': info,
-                        'context_window': text[max(0, match.start()-50):
-                                             min(len(text), match.end()+50)]
-                    })
-                    
+        for start, end in iter_segments(text):
+            segment = text[start:end]
+            matches = self._memo.get(segment)
+            if matches is None:
+                matches = [
+                    (match.start, match.end, match.index)
+                    for match in self._detect_patterns(segment, 0, None, {})
+                ]
+                self._memo.put(segment, matches)
+                
+            detected.extend(
+                PatternMatch(
+                    text, start + match_start, start + match_end,
+                    index, self._pattern_table
+                )
+                for match_start, match_end, index in matches
+            )
+            
         return detected
         
-    def _validate_patterns(self, patterns: List[Dict]) -> List[Dict]:
+    def cache_info(self) -> Dict:
+        """Report segment memo statistics.
+        
+        Returns:
+            Dict of hits, misses, size and hit rate (empty if disabled)
+        """
+        return self._memo.cache_info() if self._memo is not None else {}
+        
+    @instrumented('validate_patterns')
+    def _validate_patterns(self, patterns: List[PatternMatch]) -> List[PatternMatch]:
         """Validate detected cultural patterns.
         
         Args:
             patterns: List of detected patterns
             
         Returns:
-            List of validated pattern dictionaries
+            List of validated pattern records
         """
+        if not patterns:
+            return []
+            
+        doc = patterns[0]._doc
+        if len(patterns) < BATCH_SCORING_MIN or any(
+                pattern._doc is not doc for pattern in patterns):
+            confidences = np.array([self._calculate_confidence(p) for p in patterns])
+        else:
+            confidences = self._score_patterns(doc, patterns)
+            
         validated = []
+        for i in np.flatnonzero(confidences >= CONFIDENCE_THRESHOLD).tolist():
+            pattern = patterns[i]
+            pattern['confidence'] = float(confidences[i])
+            validated.append(pattern)
+                
+        return validated
         
-        for pattern in patterns:
-            confidence = self._calculate_confidence(pattern)
+    def _score_patterns(self, doc: str, patterns: List[PatternMatch]) -> np.ndarray:
+        """Score all candidate patterns of one document in a vectorized pass.
+        
+        Equivalent to calling ``_calculate_confidence`` on every record. The
+        context windows are merged into disjoint covering ranges, which are
+        converted once to code point arrays; word counts then come from a
+        prefix sum of word starts, and marker presence from one lookahead
+        split per marker regex plus a sorted-offset containment test.
+        
+        Args:
+            doc: Document buffer shared by all patterns
+            patterns: Pattern records to score
             
-            if confidence >= 0.85:  # Threshold from paper
-                pattern['confidence'] = confidence
-                validated.append(pattern)
+        Returns:
+            Array of confidence scores in the order of ``patterns``
+        """
+        count = len(patterns)
+        starts = np.fromiter(map(attrgetter('start'), patterns), np.int64, count)
+        ends = np.fromiter(map(attrgetter('end'), patterns), np.int64, count)
+        indices = np.fromiter(map(attrgetter('index'), patterns), np.int64, count)
+        window_starts = np.maximum(starts - CONTEXT_CHARS, 0)
+        window_ends = np.minimum(ends + CONTEXT_CHARS, len(doc))
+        
+        # Merge overlapping windows into covering ranges and lay them out,
+        # separated by newlines, in one compact buffer
+        order = np.argsort(window_starts, kind='stable')
+        sorted_starts, sorted_ends = window_starts[order], window_ends[order]
+        reach = np.maximum.accumulate(sorted_ends)
+        new_range = np.ones(count, dtype=bool)
+        new_range[1:] = sorted_starts[1:] > reach[:-1]
+        range_index = np.flatnonzero(new_range)
+        range_starts = sorted_starts[range_index]
+        range_ends = np.maximum.reduceat(sorted_ends, range_index)
+        range_of = np.cumsum(new_range) - 1
+        
+        pieces = [doc[a:b] for a, b in zip(range_starts.tolist(), range_ends.tolist())]
+        lengths = range_ends - range_starts
+        offsets = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        buffer = '\n'.join(pieces)
+        
+        shift = np.empty(count, dtype=np.int64)
+        shift[order] = offsets[range_of] - range_starts[range_of]
+        local_starts, local_ends = window_starts + shift, window_ends + shift
+        
+        # Whitespace-separated word counts per window
+        space = space_mask(code_points(buffer))
+        word_start = ~space
+        word_start[1:] &= space[:-1]
+        prefix = np.concatenate(([0], np.cumsum(word_start)))
+        words = (prefix[local_ends] - prefix[local_starts + 1] +
+                 ~space[local_starts])
+        
+        # Context marker presence per category
+        categories = self._category_codes[indices]
+        marker = np.zeros(count, dtype=bool)
+        for category, splitter in self._marker_splitters.items():
+            selected = np.flatnonzero(categories == category)
+            if len(selected):
+                marker[selected] = self._windows_contain(
+                    splitter, buffer,
+                    local_starts[selected], local_ends[selected]
+                )
                 
-        return validated
+        # Idiomatic patterns look for their own expected usage context
+        idiomatic = np.flatnonzero(categories == self._idiomatic_code)
+        for index in np.unique(indices[idiomatic]).tolist():
+            selected = idiomatic[indices[idiomatic] == index]
+            context = self._pattern_table[index][2]['context']
+            marker[selected] = self._windows_contain(
+                self._get_context_splitter(context), buffer,
+                local_starts[selected], local_ends[selected]
+            )
+                
+        confidence = 0.5 + 0.3 * marker
+        confidence = confidence + 0.2 * (words >= 5)
+        return np.minimum(confidence, 1.0)
+        
+    def _get_context_splitter(self, context: str):
+        splitter = self._context_splitters.get(context)
+        if splitter is None:
+            splitter = re.compile(f'({re.escape(context)})', re.IGNORECASE)
+            self._context_splitters[context] = splitter
+        return splitter
+        
+    @staticmethod
+    def _windows_contain(
+        splitter,
+        text: str,
+        window_starts: np.ndarray,
+        window_ends: np.ndarray
+    ) -> np.ndarray:
+        """Test which windows fully contain an occurrence of a marker.
+        
+        Occurrences are located with ``re.split`` on a regex whose first
+        group spans the whole marker, which runs entirely in C; offsets are
+        then recovered from the piece lengths. Markers are assumed not to
+        overlap themselves, which holds for the word-level marker tables.
+        
+        Args:
+            splitter: Compiled marker regex wrapped in a capturing group
+            text: Text the windows point into
+            window_starts: Window start offsets
+            window_ends: Window end offsets
+            
+        Returns:
+            Boolean array, one entry per window
+        """
+        parts = splitter.split(text)
+        stride = splitter.groups + 1
+        if len(parts) == 1:
+            return np.zeros(len(window_starts), dtype=bool)
+            
+        gaps = np.fromiter(map(len, parts[0::stride]), np.int64)
+        lengths = np.fromiter(map(len, parts[1::stride]), np.int64)
+        occurrence_starts = np.cumsum(gaps[:-1]) + np.concatenate(
+            ([0], np.cumsum(lengths)[:-1])
+        )
+        occurrence_ends = occurrence_starts + lengths
+        
+        # Smallest occurrence end among occurrences starting at or after k
+        earliest_end = np.minimum.accumulate(occurrence_ends[::-1])[::-1]
+        earliest_end = np.append(earliest_end, np.iinfo(np.int64).max)
+        first = np.searchsorted(occurrence_starts, window_starts, side='left')
+        return earliest_end[first] <= window_ends
         
-    def _calculate_confidence(self, pattern: Dict) -> float:
+    def _calculate_confidence(self, pattern: PatternMatch) -> float:
         """Calculate confidence score for a pattern.
         
+        The context window is inspected through its offsets in the document
+        rather than as a copied string.
+        
         Args:
-            pattern: Pattern dictionary
+            pattern: PatternMatch record
             
         Returns:
             Confidence score between 0 and 1
         """
+        doc = pattern._doc
+        start, end = pattern.context_start, pattern.context_end
+        
         # Base confidence
         confidence = 0.5
         
         # Adjust based on context
-        if pattern['category'] == 'idiomatic':
+        if pattern.category == 'idiomatic':
             # Check if context matches expected usage
-            expected_context = pattern['info']['context']
-            if expected_context in pattern['context_window'].lower():
+            expected_context = pattern.info['context']
+            if expected_context in doc[start:end].lower():
                 confidence += 0.3
                 
-        elif pattern['category'] == 'historical':
+        elif pattern.category == 'historical':
             # Check for additional temporal markers
-            if re.search(r'في (عهد|زمن|وقت)', pattern['context_window']):
+            if TEMPORAL_MARKER_RE.search(doc, start, end):
                 confidence += 0.3
                 
-        elif pattern['category'] == 'social_custom':
+        elif pattern.category == 'social_custom':
             # Check for social interaction markers
-            if re.search(r'(الملك|السلطان|الوزير)', pattern['context_window']):
+            if SOCIAL_MARKER_RE.search(doc, start, end):
                 confidence += 0.3
                 
         # Add context coherence bonus
-        if len(pattern['context_window'].split()) >= 5:
+        if sum(1 for _ in islice(WORD_RE.finditer(doc, start, end), 5)) >= 5:
             confidence += 0.2
             
         return min(1.0, confidence)
@@ -161,26 +459,41 @@ class CulturalProcessor:
         }
         
         for pattern in patterns:
-            if pattern['category'] == 'historical':
-                contexts['temporal'].append({
-                    'period': pattern['info']['period'],
-                    'years': pattern['info']['year_range'],
-                    'text': pattern['pattern']
-                })
-                
-            elif pattern['category'] == 'social_custom':
-                contexts['social'].append({
-                    'custom': pattern['pattern'],
-                    'meaning': pattern['info']['meaning'],
-                    'context': pattern['info']['context']
-                })
-                
-            elif pattern['category'] == 'idiomatic':
-                contexts['cultural'].append({
-                    'expression': pattern['pattern'],
-                    'meaning': pattern['info']['meaning'],
-                    'usage': pattern['info']['context']
-                })
+            entry = self._context_entry(pattern)
+            if entry is not None:
+                contexts[entry[0]].append(entry[1])
                 
         return contexts
-
+        
+    @staticmethod
+    def _context_entry(pattern: Dict) -> Optional[Tuple[str, Dict]]:
+        """Contextual mapping of one pattern.
+        
+        Args:
+            pattern: Validated pattern
+            
+        Returns:
+            (context key, entry), or None for categories without a context
+        """
+        if pattern['category'] == 'historical':
+            return 'temporal', {
+                'period': pattern['info']['period'],
+                'years': pattern['info']['year_range'],
+                'text': pattern['pattern']
+            }
+            
+        elif pattern['category'] == 'social_custom':
+            return 'social', {
+                'custom': pattern['pattern'],
+                'meaning': pattern['info']['meaning'],
+                'context': pattern['info']['context']
+            }
+            
+        elif pattern['category'] == 'idiomatic':
+            return 'cultural', {
+                'expression': pattern['pattern'],
+                'meaning': pattern['info']['meaning'],
+                'usage': pattern['info']['context']
+            }
+            
+        return None
@@ -0,0 +1,229 @@
+import codecs
+import fnmatch
+import mmap
+import os
+from typing import Dict, Iterator, List, Tuple, Union
+
+from .corpus import process_files
+
+# Bytes decoded per window when a file is read incrementally
+DEFAULT_WINDOW = 1 << 20
+
+
+def utf8_boundary(buffer, end: int) -> int:
+    """Move an offset back to the start of the UTF-8 character containing it.
+
+    Args:
+        buffer: UTF-8 encoded bytes-like object
+        end: Byte offset, at most ``len(buffer)``
+
+    Returns:
+        Largest offset <= ``end`` that does not split a character
+    """
+    if end >= len(buffer):
+        return len(buffer)
+    start = end
+    # Continuation bytes have the form 0b10xxxxxx; sequences are at most 4 long
+    while start > 0 and end - start < 3 and buffer[start] & 0xC0 == 0x80:
+        start -= 1
+    return start if buffer[start] & 0xC0 != 0x80 else end
+
+
+def translate_newlines(text: str) -> str:
+    """Turn '\\r\\n' and lone '\\r' into '\\n', like files opened in text mode."""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class MappedTextFile:
+    """UTF-8 text file read through a read-only memory map.
+
+    read() decodes the whole file straight from the mapped pages, so the
+    file is held in memory once, as the decoded string, instead of as a
+    bytes copy plus the string. windows() decodes it incrementally in
+    windows that end on character boundaries, releasing the pages behind
+    each window, for use with ANARSystem.process_stream. A leading byte
+    order mark is skipped, and line endings are translated to '\\n' as
+    by ``open()`` in text mode, also where a '\\r\\n' pair straddles two
+    windows.
+    """
+
+    def __init__(self, path: str, window: int = DEFAULT_WINDOW):
+        self.path = path
+        # A window always holds at least one whole character
+        self.window = max(window, 4)
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = None
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._start = len(codecs.BOM_UTF8) if self._map is not None and (
+            self._map[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8) else 0
+
+    def read(self) -> str:
+        """Decode the whole file.
+
+        Returns:
+            File contents
+
+        Raises:
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        if self._map is None:
+            return ''
+        with memoryview(self._map) as view:
+            return translate_newlines(str(view[self._start:], 'utf-8'))
+
+    def windows(self) -> Iterator[str]:
+        """Decode the file window by window.
+
+        Returns:
+            Generator of decoded text windows of about ``window`` bytes
+
+        Raises:
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        if self._map is None:
+            return
+        if hasattr(self._map, 'madvise'):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        release = getattr(mmap, 'MADV_DONTNEED', None)
+
+        start = self._start
+        released = 0
+        carriage_return = False
+        while start < self.size:
+            end = utf8_boundary(self._map, start + self.window)
+            with memoryview(self._map) as view:
+                text = str(view[start:end], 'utf-8')
+            if carriage_return:
+                text = '\r' + text
+            # A trailing '\r' may start a '\r\n' pair completed by the next window
+            carriage_return = text.endswith('\r') and end < self.size
+            if carriage_return:
+                text = text[:-1]
+            text = translate_newlines(text)
+            # Drop the pages already decoded from the process's resident set
+            page_end = end - end % mmap.PAGESIZE
+            if release is not None and page_end > released:
+                self._map.madvise(release, released, page_end - released)
+                released = page_end
+            start = end
+            if text:
+                yield text
+
+    def close(self):
+        """Unmap and close the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> 'MappedTextFile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_file(path: str) -> str:
+    """Read a UTF-8 text file through a memory map.
+
+    Args:
+        path: File to read
+
+    Returns:
+        File contents
+    """
+    with MappedTextFile(path) as f:
+        return f.read()
+
+
+def iter_file(path: str, window: int = DEFAULT_WINDOW) -> Iterator[str]:
+    """Decode a UTF-8 text file incrementally, keeping it mapped while iterated.
+
+    Args:
+        path: File to read
+        window: Bytes decoded per window
+
+    Returns:
+        Generator of decoded text windows
+    """
+    with MappedTextFile(path, window) as f:
+        yield from f.windows()
+
+
+class CorpusReader:
+    """The UTF-8 text files of a directory tree, as one corpus.
+
+    Files are listed in sorted order of their paths relative to
+    ``directory`` and are read through memory maps (see MappedTextFile).
+
+    Args:
+        directory: Root directory of the corpus
+        pattern: Glob pattern file names must match
+        recursive: Also read files in subdirectories
+    """
+
+    def __init__(self, directory: str, pattern: str = '*.txt', recursive: bool = True):
+        self.directory = directory
+        self.pattern = pattern
+        self.recursive = recursive
+
+    def paths(self) -> List[str]:
+        """List the corpus files.
+
+        Returns:
+            Sorted paths relative to ``directory``
+        """
+        paths = []
+        for root, directories, files in os.walk(self.directory):
+            if not self.recursive:
+                directories.clear()
+            directories.sort()
+            relative = os.path.relpath(root, self.directory)
+            paths.extend(
+                os.path.normpath(os.path.join(relative, name))
+                for name in fnmatch.filter(files, self.pattern)
+            )
+        return sorted(paths)
+
+    def __len__(self) -> int:
+        return len(self.paths())
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Yield (relative path, text) for every corpus file."""
+        for path in self.paths():
+            yield path, read_file(os.path.join(self.directory, path))
+
+    def texts(self) -> Iterator[str]:
+        """Yield the text of every corpus file."""
+        return (text for _, text in self)
+
+    def process(
+        self,
+        system,
+        workers: int = None,
+        chunksize: int = 1,
+        ordered: bool = True
+    ) -> Iterator[Tuple[str, Union[Dict, List[Dict]]]]:
+        """Analyze every corpus file with ANARSystem.process_file.
+
+        Workers receive file paths rather than texts and map the files
+        themselves, so documents are never copied between processes.
+
+        Args:
+            system: ANARSystem used in-process and copied into each worker
+            workers: Number of worker processes (None runs sequentially)
+            chunksize: Number of files sent to a worker per task
+            ordered: Yield results in path order rather than as completed
+
+        Returns:
+            Generator of (relative path, result) pairs; files large enough
+            to be streamed give the list of stream records as result
+        """
+        paths = self.paths()
+        full_paths = [os.path.join(self.directory, path) for path in paths]
+        for index, result in process_files(system, full_paths, workers, chunksize, ordered):
+            yield paths[index], result
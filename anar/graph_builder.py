@@ -1,5 +1,27 @@
-import networkx as nx
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from .compact_graph import CompactGraph, CompactGraphBuilder
+from .spans import SpanRecord
+from .utils.intervals import containing_intervals
+from .utils.lazy import lazy_import
+
+nx = lazy_import('networkx')
+
+# Node attributes of the structure graph's networkx view, per node kind
+STRUCTURE_GRAPH_FIELDS = {
+    'story': ('type',),
+    'character': ('type', 'text'),
+    'event': ('type', 'text'),
+    'frame': ('type', 'text'),
+    'cultural': ('type', 'text')
+}
+
+def _span(record, text_key: str = 'text') -> Tuple[int, int]:
+    """Offsets of an analysis record, without copying text from span records."""
+    if isinstance(record, SpanRecord):
+        return record.start, record.end
+    start = record['position']
+    return start, start + len(record[text_key])
 
 class GraphBuilder:
     """Builder for narrative and cultural graph representations."""
@@ -11,7 +33,7 @@ class GraphBuilder:
         self,
         narrative_analysis: Dict,
         cultural_analysis: Dict
-    ) -> nx.DiGraph:
+    ) -> CompactGraph:
         """Build comprehensive narrative graph with cultural elements.
         
         Args:
@@ -19,54 +41,55 @@ class GraphBuilder:
             cultural_analysis: Output from CulturalProcessor
             
         Returns:
-            NetworkX DiGraph representing the narrative structure
+            CompactGraph representing the narrative structure; use
+            ``to_networkx()`` for a NetworkX DiGraph
         """
-        G = nx.DiGraph()
+        builder = CompactGraphBuilder(
+            narrative_analysis['narrative_graph'].doc, STRUCTURE_GRAPH_FIELDS
+        )
+        element_spans = []
         
         # Add narrative elements
         for story in narrative_analysis['nested_stories']:
-            story_id = f"story_{len(G.nodes)}"
-            G.add_node(
-                story_id,
-                type='story',
+            story_node = builder.add_node(
+                'story', story['position'], story['end'],
                 frame=story['frame_marker']
             )
             
             # Add story elements
-            prev_node = story_id
+            prev_node = story_node
             for element in story['elements']:
-                node_id = f"{element['type']}_{len(G.nodes)}"
-                G.add_node(
-                    node_id,
-                    type=element['type'],
-                    text=element['text']
-                )
-                G.add_edge(prev_node, node_id)
-                prev_node = node_id
+                start, end = _span(element)
+                node = builder.add_node(element['type'], start, end)
+                builder.add_edge(prev_node, node)
+                prev_node = node
+                
+                if element['type'] in ['character', 'event']:
+                    element_spans.append((start, end, node))
                 
         # Add cultural elements
+        pattern_spans = []
         for pattern in cultural_analysis['patterns']:
-            pattern_id = f"cultural_{len(G.nodes)}"
-            G.add_node(
-                pattern_id,
-                type='cultural',
+            start, end = _span(pattern, 'pattern')
+            node = builder.add_node(
+                'cultural', start, end,
                 category=pattern['category'],
-                text=pattern['pattern'],
                 info=pattern['info']
             )
+            pattern_spans.append((start, end, node))
             
-            # Link to relevant story elements
-            for node in G.nodes():
-                if G.nodes[node]['type'] in ['character', 'event']:
-                    if pattern['pattern'] in G.nodes[node]['text']:
-                        G.add_edge(node, pattern_id)
+        # Link each pattern to the story elements whose span contains it
+        builder.add_edges(
+            (node, pattern_node)
+            for pattern_node, node in containing_intervals(element_spans, pattern_spans)
+        )
                         
-        return G
+        return builder.build()
         
     def build_character_graph(
         self,
         narrative_analysis: Dict
-    ) -> nx.Graph:
+    ) -> 'nx.Graph':
         """Build character interaction graph.
         
         Args:
@@ -0,0 +1,700 @@
+from collections import Counter
+from itertools import combinations
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .compact_graph import CompactGraph
+from .spans import CONTEXT_CHARS, CulturalMarker, NarrativeElement, PatternMatch, Revision
+from .utils.arabic_utils import TokenSpans
+from .utils.intervals import containing_intervals
+from .utils.memo import iter_segments
+
+Edit = Tuple[int, int, str]
+
+# Keys of the cultural context lists, in the order of their codes
+_CONTEXT_KEYS = ('temporal', 'social', 'cultural')
+
+_record_start = attrgetter('start')
+_position = itemgetter('position')
+_frame_position = itemgetter(1)
+
+
+def diff_edit(old: str, new: str) -> Edit:
+    """Describe the change from ``old`` to ``new`` as a single edit.
+
+    The common prefix and suffix are found by bisection over slice
+    comparisons, which run in C.
+
+    Args:
+        old: Previous text
+        new: Edited text
+
+    Returns:
+        (start, end, replacement) replacing ``old[start:end]``
+    """
+    limit = min(len(old), len(new))
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, limit - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+def _check_edits(text: str, edits: Iterable[Edit]) -> List[Edit]:
+    edits = sorted(edits, key=lambda edit: (edit[0], edit[1]))
+    position = 0
+    for start, end, _ in edits:
+        if start < position or end < start or end > len(text):
+            raise ValueError(f"Invalid or overlapping edit range ({start}, {end})")
+        position = end
+    return edits
+
+
+def _apply_edits(text: str, edits: Sequence[Edit]) -> str:
+    parts, position = [], 0
+    for start, end, replacement in edits:
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def _bisect(items: Sequence, position: int, start_of: Callable, low: int = 0) -> int:
+    # First index at or after low whose item starts at or after position;
+    # the bisect module only accepts a key from Python 3.10 on
+    high = len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if start_of(items[middle]) < position:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class IncrementalAnalyzer:
+    """Re-analyzes an edited document by patching its previous result.
+
+    Edits are mapped to the sentence segments they touch (see
+    iter_segments). None of the marker, element or pattern tables match
+    across a segment delimiter, so only those segments are normalized and
+    scanned again; cultural patterns are re-detected and re-scored over
+    the surrounding segments within CONTEXT_CHARS, since their confidence
+    depends on that context. The records of the region are located by
+    bisection and spliced, and the graphs and story lists of the result are
+    patched in place. While the frame markers of the edited segments stay
+    the same, stories only gain or lose the elements of those segments and
+    character co-occurrence weights are adjusted for the changed stories
+    alone; otherwise stories and the character network are recomputed from
+    the patched elements.
+
+    Marker, pattern and story element records outside the region follow
+    the document's Revision chain and apply the length change on their
+    next access, so an update does not touch them. Frame markers and
+    stories are plain tuples and dictionaries; the ones behind the region
+    are shifted in one pass.
+
+    The per-segment offsets of the raw, normalized and token streams are
+    computed on construction, which costs one pass over the document
+    (served from the segment memo where possible).
+    """
+
+    def __init__(self, system, text: str, result: Dict):
+        self.system = system
+        self.text = text
+        self.result = result
+        self.updates = 0
+
+        raw, normalized, tokens = [0], [0], [0]
+        for start, end in iter_segments(text):
+            entry = system.preprocessor.process_segment(text[start:end])
+            raw.append(end)
+            normalized.append(normalized[-1] + len(entry[0]))
+            tokens.append(tokens[-1] + len(entry[1]))
+        self._raw_bounds = np.array(raw, dtype=np.int64)
+        self._norm_bounds = np.array(normalized, dtype=np.int64)
+        self._token_bounds = np.array(tokens, dtype=np.int64)
+
+        graph = result['narrative_analysis']['narrative_graph']
+        self._mentions = Counter(
+            graph.doc[start:end]
+            for kind, start, end in zip(
+                graph.kinds.tolist(), graph.starts.tolist(), graph.ends.tolist()
+            )
+            if graph.kind_names[kind] == 'character'
+        )
+
+        self._revision = Revision(result['processed_text']['normalized_text'])
+        for marker in result['processed_text']['cultural_markers']:
+            marker.follow(self._revision)
+        self._follow_stories()
+        patterns = result['cultural_analysis']['patterns']
+        for pattern in patterns:
+            pattern.follow(self._revision)
+        self._context_codes = self._context_codes_of(patterns)
+
+    @staticmethod
+    def supports(system) -> bool:
+        """Whether no pattern of any table may match across a segment."""
+        return not system.cultural_processor._compiled.crossing_tables
+
+    @staticmethod
+    def apply(text: str, edits: Iterable[Edit]) -> str:
+        """Return ``text`` with (start, end, replacement) edits applied."""
+        return _apply_edits(text, _check_edits(text, edits))
+
+    def update(self, edits: Union[str, Iterable[Edit]]) -> Dict:
+        """Apply edits to the text and patch the result.
+
+        Args:
+            edits: The complete edited text, or (start, end, replacement)
+                edits in offsets of the previous raw text that do not overlap
+
+        Returns:
+            The patched result dictionary (the same object as before)
+        """
+        if isinstance(edits, str):
+            edits = [diff_edit(self.text, edits)]
+        edits = _check_edits(self.text, edits)
+        if not edits:
+            return self.result
+
+        new_text = _apply_edits(self.text, edits)
+        raw_delta = len(new_text) - len(self.text)
+        low, high = edits[0][0], edits[-1][1]
+
+        # Segments from the one containing the first edit to the one after
+        # the last edit: the boundary behind that still follows an
+        # unchanged delimiter
+        count = len(self._raw_bounds) - 1
+        first = max(0, min(
+            int(np.searchsorted(self._raw_bounds, low, side='right')) - 1,
+            count - 1
+        ))
+        last = min(int(np.searchsorted(self._raw_bounds, high, side='right')), count)
+        raw_start = int(self._raw_bounds[first])
+        raw_end = int(self._raw_bounds[last]) + raw_delta
+
+        pieces, token_parts, frames, markers = [], [], [], []
+        raw, normalized, token_counts = [], [], []
+        offset = 0
+        for start, end in iter_segments(new_text, raw_start, raw_end):
+            piece, segment_tokens, segment_frames, segment_markers = (
+                self.system.preprocessor.process_segment(new_text[start:end])
+            )
+            pieces.append(piece)
+            token_parts.append(segment_tokens)
+            frames.extend((marker, p + offset) for marker, p in segment_frames)
+            markers.extend((m.type, m.start + offset, m.end + offset)
+                           for m in segment_markers)
+            raw.append(end)
+            normalized.append(offset + len(piece))
+            offset += len(piece)
+            token_counts.append(len(segment_tokens))
+
+        old_doc = self.result['processed_text']['normalized_text']
+        norm_start = int(self._norm_bounds[first])
+        norm_end = int(self._norm_bounds[last])
+        piece = ''.join(pieces)
+        tokens = self.system.preprocessor.join_tokens(
+            piece, token_parts, [0] + normalized[:-1]
+        )
+        doc = old_doc[:norm_start] + piece + old_doc[norm_end:]
+        delta = len(piece) - (norm_end - norm_start)
+        region = (norm_start, norm_end, norm_start + len(piece), delta)
+
+        token_start = int(self._token_bounds[first])
+        token_end = int(self._token_bounds[last])
+        self._raw_bounds = np.concatenate((
+            self._raw_bounds[:first + 1], np.array(raw, dtype=np.int64),
+            self._raw_bounds[last + 1:] + raw_delta
+        ))
+        self._norm_bounds = np.concatenate((
+            self._norm_bounds[:first + 1],
+            norm_start + np.array(normalized, dtype=np.int64),
+            self._norm_bounds[last + 1:] + delta
+        ))
+        self._token_bounds = np.concatenate((
+            self._token_bounds[:first + 1],
+            token_start + np.cumsum(np.array(token_counts, dtype=np.int64)),
+            self._token_bounds[last + 1:] + (len(tokens) - (token_end - token_start))
+        ))
+
+        frames = [(marker, p + norm_start) for marker, p in frames]
+        markers = [
+            CulturalMarker(doc, marker_type, norm_start + marker_start,
+                           norm_start + marker_end)
+            for marker_type, marker_start, marker_end in markers
+        ]
+        old_frames = self._patch_processed_text(
+            doc, region, tokens, (token_start, token_end), frames, markers
+        )
+        elements = self._scan_region(doc, region, frames)
+        removed = self._patch_chain(doc, region, elements)
+        patterns = self._patch_cultural(doc, region)
+
+        # Records are located by their offsets in the previous revision and
+        # the replaced ones detached; the others then follow the edit lazily
+        changed = touched = None
+        if [m for m, _ in old_frames] == [m for m, _ in frames]:
+            changed, touched = self._patch_stories(region, elements, old_frames, frames)
+        else:
+            for story in self.result['narrative_analysis']['nested_stories']:
+                for element in story['elements']:
+                    element.follow(None)
+        self._revision = self._revision.supersede(doc, norm_end, delta)
+        for record in markers + elements + patterns[2]:
+            record.follow(self._revision)
+
+        gone = self._count_mentions(elements, removed)
+        if changed is None:
+            self._segment_stories(doc)
+        else:
+            self._patch_character_network(doc, changed, elements, gone)
+
+        graph = self.result['narrative_graph']
+        if changed is None or not self._patch_structure(
+                doc, region, changed, touched, patterns):
+            graph.update_from(self.system.graph_builder.build_narrative_graph(
+                self.result['narrative_analysis'], self.result['cultural_analysis']
+            ))
+
+        self.text = new_text
+        self.updates += 1
+        return self.result
+
+    def _follow_stories(self):
+        for story in self.result['narrative_analysis']['nested_stories']:
+            for element in story['elements']:
+                element.follow(self._revision)
+
+    def _context_codes_of(self, patterns: Sequence[PatternMatch]) -> np.ndarray:
+        # Index into _CONTEXT_KEYS of the context list each pattern adds to
+        entries = map(self.system.cultural_processor._context_entry, patterns)
+        return np.fromiter(
+            (-1 if entry is None else _CONTEXT_KEYS.index(entry[0]) for entry in entries),
+            dtype=np.int8, count=len(patterns)
+        )
+
+    def _patch_processed_text(self, doc, region, tokens, token_range, frames, markers):
+        start, end, _, delta = region
+        processed = self.result['processed_text']
+        processed['normalized_text'] = doc
+        old_tokens = processed['tokens']
+        if isinstance(old_tokens, TokenSpans):
+            first, last = token_range
+            processed['tokens'] = TokenSpans(
+                doc,
+                np.concatenate((old_tokens.starts[:first], tokens.starts + start,
+                                old_tokens.starts[last:] + delta)),
+                np.concatenate((old_tokens.ends[:first], tokens.ends + start,
+                                old_tokens.ends[last:] + delta))
+            )
+        else:
+            old_tokens[token_range[0]:token_range[1]] = tokens
+
+        frame_markers = processed['frame_markers']
+        first = _bisect(frame_markers, start, _frame_position)
+        last = _bisect(frame_markers, end, _frame_position, first)
+        old_frames = frame_markers[first:last]
+        behind = first + len(frames)
+        frame_markers[first:last] = frames
+        if delta:
+            frame_markers[behind:] = [(m, p + delta) for m, p in frame_markers[behind:]]
+
+        cultural_markers = processed['cultural_markers']
+        first = _bisect(cultural_markers, start, _record_start)
+        last = _bisect(cultural_markers, end, _record_start, first)
+        for marker in cultural_markers[first:last]:
+            marker.follow(None)
+        cultural_markers[first:last] = markers
+        return old_frames
+
+    def _scan_region(self, doc, region, frames) -> List[NarrativeElement]:
+        start, _, new_end, _ = region
+        analyzer = self.system.narrative_analyzer
+        elements = analyzer._scan_elements(doc, start, new_end, {})
+        elements.extend(
+            NarrativeElement(doc, 'frame', p, p + len(marker)) for marker, p in frames
+        )
+        return sorted(elements, key=lambda element: element['position'])
+
+    def _patch_chain(self, doc, region, elements) -> List[str]:
+        """Splice the region's nodes into the chain graph of all elements.
+
+        Returns:
+            Names of the character mentions removed from the region
+        """
+        start, end, _, delta = region
+        graph = self.result['narrative_analysis']['narrative_graph']
+        first = int(np.searchsorted(graph.starts, start, side='left'))
+        last = int(np.searchsorted(graph.starts, end, side='left'))
+        removed = [
+            element.text for element in _elements_of(graph, first, last)
+            if element.type == 'character'
+        ]
+        kind_names = list(graph.kind_names)
+        for element in elements:
+            if element.type not in kind_names:
+                kind_names.append(element.type)
+        kinds = np.concatenate((
+            graph.kinds[:first],
+            np.array([kind_names.index(e.type) for e in elements], dtype=np.int8),
+            graph.kinds[last:]
+        ))
+        starts = np.concatenate((
+            graph.starts[:first], np.array([e.start for e in elements], dtype=np.int64),
+            graph.starts[last:] + delta
+        ))
+        ends = np.concatenate((
+            graph.ends[:first], np.array([e.end for e in elements], dtype=np.int64),
+            graph.ends[last:] + delta
+        ))
+        n = len(kinds)
+        graph.update_from(CompactGraph(
+            doc, kind_names, kinds, starts, ends,
+            np.minimum(np.arange(n + 1, dtype=np.int64), max(n - 1, 0)),
+            np.arange(1, n, dtype=np.int64), graph.fields
+        ))
+        return removed
+
+    def _count_mentions(self, elements, removed) -> List[str]:
+        """Update the character mention counts.
+
+        Returns:
+            Characters no longer mentioned anywhere
+        """
+        self._mentions.update(e.text for e in elements if e.type == 'character')
+        self._mentions.subtract(removed)
+        gone = [name for name in set(removed) if self._mentions[name] <= 0]
+        for name in gone:
+            del self._mentions[name]
+        return gone
+
+    def _patch_stories(self, region, elements, old_frames, frames):
+        """Move the region's elements between stories whose frames are unchanged.
+
+        Runs while the records still hold offsets of the previous revision.
+
+        Returns:
+            (characters before the update per changed story, indices of
+            the stories open in the region)
+        """
+        start, end, _, delta = region
+        stories = self.result['narrative_analysis']['nested_stories']
+
+        # Stories open in the region: the ones starting inside it, and the
+        # last one starting before it with its ancestors, as stories nest
+        first = _bisect(stories, start, _position)
+        last = _bisect(stories, end, _position, first)
+        touched = list(range(first, last))
+        index = first - 1 if first else None
+        while index is not None:
+            if stories[index]['end'] >= start:
+                touched.append(index)
+            index = stories[index]['parent']
+
+        # Drop the elements of the region, remembering where they were
+        changed, slots = {}, {}
+        for index in touched:
+            story_elements = stories[index]['elements']
+            slot = _bisect(story_elements, start, _record_start)
+            slots[index] = slot
+            stop = _bisect(story_elements, end, _record_start, slot)
+            if stop > slot:
+                changed[index] = _characters(story_elements)
+                for element in story_elements[slot:stop]:
+                    element.follow(None)
+                del story_elements[slot:stop]
+
+        moved = dict(zip((p for _, p in old_frames), (p for _, p in frames)))
+        for index in touched:
+            story = stories[index]
+            for key in ('position', 'end'):
+                if story[key] >= end:
+                    story[key] += delta
+                elif story[key] >= start:
+                    story[key] = moved[story[key]]
+        if delta:
+            for story in stories[last:]:
+                story['position'] += delta
+                story['end'] += delta
+
+        # Each new element belongs to the deepest story open at its position
+        owned = {}
+        for element in elements:
+            if element.type == 'frame':
+                continue
+            owner = None
+            for index in touched:
+                story = stories[index]
+                if story['position'] < element.start <= story['end'] and (
+                        owner is None or story['depth'] > owner['depth']):
+                    owner = story
+            if owner is not None:
+                owned.setdefault(owner['index'], []).append(element)
+        for index, new_elements in owned.items():
+            story_elements = stories[index]['elements']
+            if index not in changed:
+                changed[index] = _characters(story_elements)
+            story_elements[slots[index]:slots[index]] = new_elements
+        return changed, touched
+
+    def _segment_stories(self, doc):
+        # Frame structure changed: segment the patched elements again
+        analysis = self.result['narrative_analysis']
+        analyzer = self.system.narrative_analyzer
+        records = _elements_of(analysis['narrative_graph'])
+        analysis['nested_stories'][:] = analyzer._detect_nested_stories(records, len(doc))
+        self._follow_stories()
+        self._replace_character_network(analyzer._analyze_character_network(
+            doc, records, analysis['nested_stories']
+        ))
+
+    def _patch_character_network(self, doc, changed, elements, gone):
+        analysis = self.result['narrative_analysis']
+        analyzer = self.system.narrative_analyzer
+        stories = analysis['nested_stories']
+        if analyzer._cooccurrence.mode != 'story':
+            self._replace_character_network(analyzer._analyze_character_network(
+                doc, _elements_of(analysis['narrative_graph']), stories
+            ))
+            return
+
+        network = analysis['character_network']
+        binary = analyzer._cooccurrence.weighting == 'binary'
+        pairs = set()
+        for index, before in changed.items():
+            after = _characters(stories[index]['elements'])
+            for counts, sign in ((before, -1.0), (after, 1.0)):
+                for u, v in combinations(sorted(counts), 2):
+                    weight = 1.0 if binary else float(counts[u] * counts[v])
+                    current = network.get_edge_data(u, v, {}).get('weight', 0.0)
+                    network.add_edge(u, v, weight=current + sign * weight)
+                    pairs.add((u, v))
+
+        network.add_nodes_from(e.text for e in elements if e.type == 'character')
+        network.remove_nodes_from(gone)
+        network.remove_edges_from([
+            (u, v) for u, v in pairs
+            if network.get_edge_data(u, v, {}).get('weight') == 0
+        ])
+
+    def _replace_character_network(self, network):
+        current = self.result['narrative_analysis']['character_network']
+        current.clear()
+        current.update(network)
+
+    def _patch_cultural(self, doc, region):
+        """Re-detect and re-score the patterns near the region.
+
+        Runs while the records still hold offsets of the previous revision.
+        """
+        start, end, new_end, delta = region
+        processor = self.system.cultural_processor
+        analysis = self.result['cultural_analysis']
+
+        # Re-score every pattern whose context window reaches the edit
+        bounds = self._norm_bounds
+        first = int(np.searchsorted(bounds, max(0, start - CONTEXT_CHARS), side='right')) - 1
+        last = int(np.searchsorted(bounds, new_end + CONTEXT_CHARS, side='left'))
+        last = min(last, len(bounds) - 1)
+        window_start, window_end = int(bounds[first]), int(bounds[last])
+
+        candidates = [
+            PatternMatch(doc, window_start + m.start, window_start + m.end,
+                         m.index, processor._pattern_table)
+            for m in processor._detect_patterns(doc[window_start:window_end])
+        ]
+        validated = processor._validate_patterns(candidates)
+
+        patterns = analysis['patterns']
+        first = _bisect(patterns, window_start, _record_start)
+        last = _bisect(patterns, window_end - delta, _record_start, first)
+        for pattern in patterns[first:last]:
+            pattern.follow(None)
+        patterns[first:last] = validated
+
+        # Splice the context entries of the replaced patterns
+        codes = self._context_codes_of(validated)
+        old_codes = self._context_codes
+        contexts = analysis['contexts']
+        for code, key in enumerate(_CONTEXT_KEYS):
+            offset = int(np.count_nonzero(old_codes[:first] == code))
+            count = int(np.count_nonzero(old_codes[first:last] == code))
+            contexts[key][offset:offset + count] = [
+                processor._context_entry(pattern)[1]
+                for pattern, pattern_code in zip(validated, codes.tolist())
+                if pattern_code == code
+            ]
+        self._context_codes = np.concatenate((old_codes[:first], codes, old_codes[last:]))
+        return first, last - first, validated, (window_start, window_end)
+
+    def _patch_structure(self, doc, region, changed, touched, patterns) -> bool:
+        """Splice the structure graph of GraphBuilder.build_narrative_graph.
+
+        Nodes are laid out as one block per story (the story node followed
+        by its elements) and then one node per cultural pattern. Blocks of
+        unchanged stories and patterns outside the re-scored window only
+        move; changed stories are laid out again, and containment edges are
+        computed for the new patterns only.
+
+        Returns:
+            False if the graph has to be rebuilt instead
+        """
+        start, end, _, delta = region
+        kept_before, dropped, validated, (window_start, window_end) = patterns
+        graph = self.result['narrative_graph']
+        stories = self.result['narrative_analysis']['nested_stories']
+        names = list(graph.kind_names)
+
+        def kind_id(name):
+            if name not in names:
+                names.append(name)
+            return names.index(name)
+
+        old_kinds = graph.kinds
+        story_nodes = np.flatnonzero(old_kinds == kind_id('story'))
+        cultural = np.flatnonzero(old_kinds == kind_id('cultural'))
+        if len(story_nodes) != len(stories):
+            return False
+        old_count = len(old_kinds)
+        cultural_start = int(cultural[0]) if len(cultural) else old_count
+
+        new_sizes = np.diff(np.append(story_nodes, cultural_start))
+        for index in changed:
+            new_sizes[index] = 1 + len(stories[index]['elements'])
+        new_block_starts = np.concatenate(([0], np.cumsum(new_sizes)[:-1])).astype(np.int64)
+        new_cultural_start = int(new_sizes.sum())
+        new_count = new_cultural_start + len(self.result['cultural_analysis']['patterns'])
+
+        # Old to new node index; -1 for nodes that disappear
+        nodes = np.arange(old_count, dtype=np.int64)
+        shifted_starts = graph.starts + delta * (graph.starts >= end)
+        shifted_ends = graph.ends + delta * (graph.starts >= end)
+        remap = np.full(old_count, -1, dtype=np.int64)
+        block = np.searchsorted(story_nodes, nodes[:cultural_start], side='right') - 1
+        remap[:cultural_start] = (
+            nodes[:cultural_start] - story_nodes[block] + new_block_starts[block]
+        )
+        for index in changed:
+            old_first = int(story_nodes[index]) + 1
+            old_last = (int(story_nodes[index + 1]) if index + 1 < len(stories)
+                        else cultural_start)
+            new_first = int(new_block_starts[index]) + 1
+            new_starts = np.fromiter((e.start for e in stories[index]['elements']),
+                                     dtype=np.int64)
+            if len(new_starts) > 1 and not np.all(np.diff(new_starts) > 0):
+                return False
+            old_starts = graph.starts[old_first:old_last]
+            kept = (old_starts < start) | (old_starts >= end)
+            targets = new_first + np.searchsorted(
+                new_starts, shifted_starts[old_first:old_last]
+            )
+            remap[old_first:old_last] = np.where(kept, targets, -1)
+
+        pattern_nodes = nodes[cultural_start:] - cultural_start
+        added = len(validated)
+        remap[cultural_start:] = np.where(
+            pattern_nodes < kept_before, pattern_nodes,
+            np.where(pattern_nodes < kept_before + dropped, -1,
+                     pattern_nodes - dropped + added)
+        )
+        remap[cultural_start:] += np.where(remap[cultural_start:] >= 0,
+                                           new_cultural_start, 0)
+
+        kinds = np.zeros(new_count, dtype=np.int8)
+        starts = np.zeros(new_count, dtype=np.int64)
+        ends = np.zeros(new_count, dtype=np.int64)
+        kept = remap >= 0
+        kinds[remap[kept]] = old_kinds[kept]
+        starts[remap[kept]] = shifted_starts[kept]
+        ends[remap[kept]] = shifted_ends[kept]
+        # Stories behind the region moved with it; the ones open in it
+        # may have moved an end only
+        for index in touched:
+            starts[new_block_starts[index]] = stories[index]['position']
+            ends[new_block_starts[index]] = stories[index]['end']
+        for index in changed:
+            for node, element in enumerate(stories[index]['elements'],
+                                           int(new_block_starts[index]) + 1):
+                kinds[node] = kind_id(element.type)
+                starts[node] = element.start
+                ends[node] = element.end
+        first_new = new_cultural_start + kept_before
+        for node, pattern in enumerate(validated, first_new):
+            kinds[node] = kind_id('cultural')
+            starts[node] = pattern.start
+            ends[node] = pattern.end
+
+        extra = graph.extra.renumber(remap, new_count)
+        for node, pattern in enumerate(validated, first_new):
+            extra.values[node] = {'category': pattern['category'], 'info': pattern['info']}
+
+        # Every story chains its story node and elements in order
+        last_in_block = np.zeros(new_cultural_start, dtype=bool)
+        last_in_block[new_block_starts + new_sizes - 1] = True
+        chain_sources = np.flatnonzero(~last_in_block)
+
+        old_sources, old_targets = graph.edge_arrays()
+        contains = old_kinds[old_targets] == kind_id('cultural')
+        keep = contains & (remap[old_sources] >= 0) & (remap[old_targets] >= 0)
+        sources = [remap[old_sources[keep]]]
+        targets = [remap[old_targets[keep]]]
+
+        # New patterns can only lie inside elements that reach the window
+        element_kinds = [kind_id('character'), kind_id('event')]
+        near = np.flatnonzero(
+            np.isin(kinds[:new_cultural_start], element_kinds) &
+            (starts[:new_cultural_start] < window_end) &
+            (ends[:new_cultural_start] > window_start)
+        )
+        pairs = list(containing_intervals(
+            zip(starts[near].tolist(), ends[near].tolist(), near.tolist()),
+            ((p.start, p.end, node) for node, p in enumerate(validated, first_new))
+        ))
+        sources.append(np.array([e for _, e in pairs], dtype=np.int64))
+        targets.append(np.array([p for p, _ in pairs], dtype=np.int64))
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        order = np.argsort(targets, kind='stable')
+
+        graph.update_from(CompactGraph.from_edges(
+            doc, names, kinds, starts, ends,
+            np.concatenate((chain_sources, sources[order])),
+            np.concatenate((chain_sources + 1, targets[order])),
+            graph.fields, extra
+        ))
+        return True
+
+
+def _characters(elements) -> Counter:
+    return Counter(e.text for e in elements if e.type == 'character')
+
+
+def _elements_of(
+    graph: CompactGraph,
+    first: int = 0,
+    last: int = None
+) -> List[NarrativeElement]:
+    return [
+        NarrativeElement(graph.doc, graph.kind_names[k], s, e)
+        for k, s, e in zip(graph.kinds[first:last].tolist(),
+                           graph.starts[first:last].tolist(),
+                           graph.ends[first:last].tolist())
+    ]
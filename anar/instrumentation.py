@@ -0,0 +1,367 @@
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import tempfile
+import threading
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Metrics of the stage currently running in this thread or task
+_current_stage = contextvars.ContextVar('anar_current_stage', default=None)
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+
+class StageMetrics:
+    """Wall time, peak memory and hot-method counters of one stage run."""
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.peak_memory = None
+        self.calls = {}
+        self._active = set()
+
+    def add_call(self, name: str, elapsed: float, matches: int):
+        entry = self.calls.get(name)
+        if entry is None:
+            entry = self.calls[name] = {
+                'calls': 0, 'wall_time': 0.0, 'matches': 0
+            }
+        entry['calls'] += 1
+        entry['wall_time'] += elapsed
+        entry['matches'] += matches
+
+    def to_dict(self) -> Dict:
+        return {
+            'wall_time': self.wall_time,
+            'peak_memory': self.peak_memory,
+            'calls': self.calls
+        }
+
+
+def _start_tracing() -> bool:
+    """Reset the traced memory peak, starting tracemalloc if it is off.
+
+    Python 3.8 cannot reset the peak while tracing, so there it keeps
+    covering everything traced since tracing started.
+
+    Returns:
+        Whether tracing was started here (and must be stopped by the caller)
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        return True
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    return False
+
+
+def instrumented(name: str, count: Callable[[Any], int] = len):
+    """Record calls of a hot method in the metrics of the running stage.
+
+    Outside an instrumented pipeline run the wrapper only performs one
+    context variable lookup. Recursive calls are attributed to the
+    outermost call.
+
+    Args:
+        name: Name under which the method is reported
+        count: Maps the return value to a number of matches
+
+    Returns:
+        Method decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _current_stage.get()
+            if metrics is None or name in metrics._active:
+                return func(*args, **kwargs)
+
+            metrics._active.add(name)
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                metrics._active.discard(name)
+            metrics.add_call(name, perf_counter() - start, count(result))
+            return result
+        return wrapper
+    return decorator
+
+
+def measure_stage(func: Callable, args: Tuple, memory: bool = False) -> Tuple[Any, Dict]:
+    """Run one pipeline stage and collect its metrics.
+
+    Used as the ``measure`` wrapper of StageScheduler.run_measured; it runs
+    wherever the stage executes, including worker processes.
+
+    Args:
+        func: Stage callable
+        args: Positional arguments of the stage
+        memory: Also record the peak of traced allocations (exact under the
+            serial executor; concurrent stages share one tracemalloc peak)
+
+    Returns:
+        Tuple of the stage value and its metrics dictionary
+    """
+    metrics = StageMetrics()
+    token = _current_stage.set(metrics)
+
+    started_tracing = False
+    if memory:
+        started_tracing = _start_tracing()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    start = perf_counter()
+    try:
+        value = func(*args)
+    finally:
+        metrics.wall_time = perf_counter() - start
+        _current_stage.reset(token)
+        if memory:
+            metrics.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+            if started_tracing:
+                tracemalloc.stop()
+
+    return value, metrics.to_dict()
+
+
+class Instrumentation:
+    """Per-document timing, profiling and metric callbacks for ANARSystem.
+
+    ``run`` executes the stage scheduler with every stage wrapped by
+    measure_stage and returns a ``timings`` dictionary::
+
+        {'total_time': seconds,
+         'stages': {stage: {'wall_time', 'peak_memory',
+                            'calls': {method: {'calls', 'wall_time', 'matches'}}}},
+         'cached': False,
+         'profile': {...}}   # only with a profile mode
+
+    With ``profile='cprofile'`` the document is run under cProfile (the
+    calling thread only) and the top functions by cumulative time are
+    included; with ``'tracemalloc'`` the top allocation sites are. Set
+    ``profile_dir`` to also write the raw cProfile stats of each document.
+    Every registered callback receives the timings dictionary.
+    """
+
+    def __init__(
+        self,
+        memory: bool = False,
+        profile: str = None,
+        profile_dir: str = None,
+        profile_limit: int = 30,
+        callbacks: Iterable[Callable[[Dict], None]] = ()
+    ):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile!r}")
+        self.memory = memory
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.profile_limit = profile_limit
+        self.callbacks = list(callbacks)
+        self._documents = 0
+
+    def add_callback(self, callback: Callable[[Dict], None]):
+        """Register a callable that receives the timings of every document."""
+        self.callbacks.append(callback)
+
+    def run(self, scheduler, **inputs) -> Tuple[Dict[str, Any], Dict]:
+        """Run the pipeline and measure it.
+
+        Args:
+            scheduler: StageScheduler of the pipeline
+            **inputs: Pipeline inputs
+
+        Returns:
+            Tuple of the stage values and the timings dictionary
+        """
+        measure = functools.partial(measure_stage, memory=self.memory)
+        profiler = None
+        started_tracing = False
+        if self.profile == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif self.profile == 'tracemalloc':
+            started_tracing = _start_tracing()
+
+        start = perf_counter()
+        try:
+            values, stages = scheduler.run_measured(measure, **inputs)
+        except BaseException:
+            if started_tracing:
+                tracemalloc.stop()
+            raise
+        finally:
+            total = perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+
+        timings = {'total_time': total, 'stages': stages, 'cached': False}
+        if profiler is not None:
+            timings['profile'] = self._cprofile_report(profiler)
+        elif self.profile == 'tracemalloc':
+            timings['profile'] = self._tracemalloc_report()
+            if started_tracing:
+                tracemalloc.stop()
+        self._documents += 1
+
+        self.emit(timings)
+        return values, timings
+
+    def __getstate__(self):
+        # Callbacks stay in the parent process, see process_corpus
+        state = self.__dict__.copy()
+        state['callbacks'] = []
+        return state
+
+    def emit(self, timings: Dict):
+        """Pass timings to every registered callback."""
+        for callback in self.callbacks:
+            callback(timings)
+
+    def _cprofile_report(self, profiler: cProfile.Profile) -> Dict:
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.profile_limit)
+        report = {'mode': 'cprofile', 'stats': stream.getvalue()}
+
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(
+                self.profile_dir, f'document_{os.getpid()}_{self._documents}.prof'
+            )
+            stats.dump_stats(path)
+            report['path'] = path
+        return report
+
+    def _tracemalloc_report(self) -> Dict:
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot()
+        top = snapshot.statistics('lineno')[:self.profile_limit]
+        return {
+            'mode': 'tracemalloc',
+            'peak_memory': peak,
+            'top': [str(stat) for stat in top]
+        }
+
+
+class PrometheusExporter:
+    """Callback that aggregates timings and writes Prometheus text metrics.
+
+    Register an instance with Instrumentation.add_callback (or the
+    ``metrics_path`` config key). Counters accumulate over documents and
+    the file is rewritten atomically every ``flush_every`` documents, so a
+    node_exporter textfile collector can pick it up.
+    """
+
+    def __init__(self, path: str, flush_every: int = 1, prefix: str = 'anar'):
+        self.path = path
+        self.flush_every = flush_every
+        self.prefix = prefix
+        self.documents = 0
+        self.document_seconds = 0.0
+        self.stage_seconds = {}
+        self.stage_runs = {}
+        self.stage_peak_memory = {}
+        self.method_calls = {}
+        self.method_seconds = {}
+        self.method_matches = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, timings: Dict):
+        with self._lock:
+            self.documents += 1
+            self.document_seconds += timings['total_time']
+            for stage, metrics in timings.get('stages', {}).items():
+                self.stage_seconds[stage] = (
+                    self.stage_seconds.get(stage, 0.0) + metrics['wall_time']
+                )
+                self.stage_runs[stage] = self.stage_runs.get(stage, 0) + 1
+                if metrics.get('peak_memory') is not None:
+                    self.stage_peak_memory[stage] = max(
+                        self.stage_peak_memory.get(stage, 0), metrics['peak_memory']
+                    )
+                for method, entry in metrics['calls'].items():
+                    self.method_calls[method] = (
+                        self.method_calls.get(method, 0) + entry['calls']
+                    )
+                    self.method_seconds[method] = (
+                        self.method_seconds.get(method, 0.0) + entry['wall_time']
+                    )
+                    self.method_matches[method] = (
+                        self.method_matches.get(method, 0) + entry['matches']
+                    )
+            if self.documents % self.flush_every == 0:
+                self._write()
+
+    def flush(self):
+        """Write the current metrics to the file."""
+        with self._lock:
+            self._write()
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {p}_{name} {help_text}')
+            lines.append(f'# TYPE {p}_{name} {kind}')
+            lines.extend(samples)
+
+        family('documents_total', 'counter', 'Documents processed.',
+               [f'{p}_documents_total {self.documents}'])
+        family('document_seconds_total', 'counter',
+               'Wall time spent processing documents.',
+               [f'{p}_document_seconds_total {self.document_seconds!r}'])
+        family('stage_seconds_total', 'counter', 'Wall time per pipeline stage.',
+               _samples(f'{p}_stage_seconds_total', 'stage', self.stage_seconds))
+        family('stage_runs_total', 'counter', 'Runs per pipeline stage.',
+               _samples(f'{p}_stage_runs_total', 'stage', self.stage_runs))
+        if self.stage_peak_memory:
+            family('stage_peak_memory_bytes', 'gauge',
+                   'Largest traced allocation peak per stage.',
+                   _samples(f'{p}_stage_peak_memory_bytes', 'stage',
+                            self.stage_peak_memory))
+        family('method_calls_total', 'counter', 'Calls of instrumented methods.',
+               _samples(f'{p}_method_calls_total', 'method', self.method_calls))
+        family('method_seconds_total', 'counter',
+               'Wall time in instrumented methods.',
+               _samples(f'{p}_method_seconds_total', 'method', self.method_seconds))
+        family('method_matches_total', 'counter',
+               'Matches returned by instrumented methods.',
+               _samples(f'{p}_method_matches_total', 'method', self.method_matches))
+        return '\n'.join(lines) + '\n'
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.prom.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def _samples(metric: str, label: str, values: Dict) -> List[str]:
+    return [
+        f'{metric}{{{label}="{_escape(key)}"}} {value!r}'
+        for key, value in sorted(values.items())
+    ]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -1,13 +1,71 @@
-import networkx as nx
-from typing import Dict, List
-import re
+from collections import deque
+from typing import Dict, List, Tuple
+
+from .compact_graph import CompactGraph, CompactGraphBuilder
+from .cooccurrence import CooccurrenceEngine
+from .instrumentation import instrumented
+from .patterns import BUILTIN_PATTERNS, PatternTables, get_registry
+from .segmentation import StorySegmenter
+from .spans import NarrativeElement
+from .utils.lazy import lazy_import
+
+nx = lazy_import('networkx')
+
+# Built-in character mention and event patterns (see anar.patterns; the
+# pattern tables actually used come from the shared registry)
+CHARACTER_PATTERNS = BUILTIN_PATTERNS['character']
+EVENT_PATTERNS = BUILTIN_PATTERNS['event']
+
+# Node attributes of the narrative graph's networkx view, per element type;
+# like the others, 'text' is only sliced from the document when the view is built
+NARRATIVE_GRAPH_FIELDS = {
+    element_type: ('type', 'text', 'position', 'element')
+    for element_type in ('character', 'event', 'frame')
+}
 
 class NarrativeAnalyzer:
-    """Analyzer for narrative structures in Classical Arabic texts."""
+    """Analyzer for narrative structures in Classical Arabic texts.
     
-    def __init__(self, config: Dict = None):
+    Every call to ``analyze`` builds its narrative graph from scratch, so
+    memory use does not grow with the number of documents processed. The
+    graph is a CompactGraph; its networkx view is only built on use. Set
+    ``accumulate_corpus`` in the config to additionally merge each document
+    graph into ``corpus_graph``; the oldest documents are evicted once
+    ``corpus_max_nodes`` or ``corpus_max_documents`` is exceeded.
+    
+    Element patterns come from the shared pattern registry selected by the
+    config (see get_registry) unless ``tables`` is given.
+    """
+    
+    def __init__(self, config: Dict = None, tables: PatternTables = None):
         self.config = config or {}
-        self.graph = nx.DiGraph()
+        self.graph = CompactGraphBuilder('', NARRATIVE_GRAPH_FIELDS).build()
+        self.corpus_graph = None
+        
+        if self.config.get('accumulate_corpus', False):
+            self.corpus_graph = nx.DiGraph()
+            self.corpus_max_nodes = self.config.get('corpus_max_nodes', 100000)
+            self.corpus_max_documents = self.config.get('corpus_max_documents')
+            self._corpus_documents = deque()
+            self._documents_seen = 0
+            
+        self.use_tables(tables or get_registry(self.config).tables)
+        self._segmenter = StorySegmenter(self.config.get('frame_marker_roles'))
+        self._cooccurrence = CooccurrenceEngine(
+            mode=self.config.get('cooccurrence_mode', 'story'),
+            window=self.config.get('cooccurrence_window', 50),
+            weighting=self.config.get('cooccurrence_weighting', 'binary')
+        )
+        
+    def use_tables(self, tables: PatternTables):
+        """Switch to another pattern snapshot.
+        
+        Args:
+            tables: Compiled pattern tables
+        """
+        self.tables = tables
+        self._element_scanner = tables.element_scanner
+        self._element_types = tables.element_types
         
     def analyze(self, processed_text: Dict) -> Dict:
         """Analyze narrative structure of processed text.
@@ -18,20 +76,27 @@ class NarrativeAnalyzer:
         Returns:
             Dict containing narrative analysis results
         """
+        text = processed_text['normalized_text']
+        
         # Extract narrative elements
         narrative_elements = self._extract_narrative_elements(
-            processed_text['normalized_text'],
+            text,
             processed_text['frame_markers']
         )
         
-        # Build narrative graph
-        self._build_narrative_graph(narrative_elements)
+        # Build narrative graph for this document only
+        self.graph = self._build_narrative_graph(text, narrative_elements)
         
-        # Detect nested stories
-        nested_stories = self._detect_nested_stories()
+        # Detect nested stories once, shared with the character network
+        nested_stories = self._detect_nested_stories(narrative_elements, len(text))
         
         # Analyze character relationships
-        character_network = self._analyze_character_network()
+        character_network = self._analyze_character_network(
+            text, narrative_elements, nested_stories
+        )
+        
+        if self.corpus_graph is not None:
+            self._accumulate(self.graph)
         
         return {
             'narrative_graph': self.graph,
@@ -51,143 +116,124 @@ class NarrativeAnalyzer:
             frame_markers: List of frame markers and positions
             
         Returns:
-            List of narrative element dictionaries
+            List of NarrativeElement records
         """
-        elements = []
-        
-        # Extract characters
-        character_patterns = [
-            r'[الـ]?ملك\s+\w+',
-            r'[الـ]?وزير\s+\w+',
-            r'[الـ]?تاجر\s+\w+'
-        ]
-        
-        for pattern in character_patterns:
-            for match in re.finditer(pattern, text):
-                elements.append({
-                    'type': 'character',
-                    'text': match.group(),
-                    'position': match.start()
-                })
-        
-        # Extract events
-        event_patterns = [
-            r'فلما كان [^،.]+',
-            r'ثم [^،.]+'
-        ]
-        
-        for pattern in event_patterns:
-            for match in re.finditer(pattern, text):
-                elements.append({
-                    'type': 'event',
-                    'text': match.group(),
-                    'position': match.start()
-                })
+        # Extract characters and events in one scan
+        elements = self._scan_elements(text)
                 
         # Add frame markers as narrative elements
         for marker, position in frame_markers:
-            elements.append({
-                'type': 'frame',
-                'text': marker,
-                'position': position
-            })
+            elements.append(NarrativeElement(
+                text, 'frame', position, position + len(marker)
+            ))
                 
         return sorted(elements, key=lambda x: x['position'])
         
-    def _build_narrative_graph(self, narrative_elements: List[Dict]):
-        """Build directed graph from narrative elements.
+    @instrumented('scan_elements')
+    def _scan_elements(
+        self,
+        text: str,
+        start: int = 0,
+        stop: int = None,
+        state: Dict[int, int] = None
+    ) -> List[Dict]:
+        """Find character and event mentions.
         
         Args:
-            narrative_elements: List of narrative elements
-        """
-        prev_node = None
-        
-        for element in narrative_elements:
-            # Add node
-            node_id = f"{element['type']}_{len(self.graph.nodes)}"
-            self.graph.add_node(
-                node_id,
-                type=element['type'],
-                text=element['text']
-            )
-            
-            # Add edge from previous node if it exists
-            if prev_node:
-                self.graph.add_edge(prev_node, node_id)
-                
-            prev_node = node_id
+            text: Normalized text
+            start: Offset at which scanning starts
+            stop: Only report mentions starting before this offset
+            state: Scanner state carried between consecutive calls
             
-    def _detect_nested_stories(self) -> List[Dict]:
-        """Detect nested story structures in the narrative graph.
-        
         Returns:
-            List of nested story dictionaries
+            List of character and event elements ordered by position
         """
-        nested_stories = []
-        frame_nodes = [
-            node for node, attr in self.graph.nodes(data=True)
-            if attr['type'] == 'frame'
+        return [
+            NarrativeElement(
+                text, self._element_types[index], match_start, match_end
+            )
+            for match_start, match_end, index in self._element_scanner.scan(
+                text, start, state=state, stop=stop
+            )
         ]
         
-        for frame_node in frame_nodes:
-            # Get subgraph between this frame and next frame
-            story = {
-                'frame_marker': self.graph.nodes[frame_node]['text'],
-                'elements': []
-            }
-            
-            # Add narrative elements until next frame
-            current = frame_node
-            while current in self.graph:
-                next_nodes = list(self.graph.successors(current))
-                if not next_nodes:
-                    break
-                    
-                current = next_nodes[0]
-                node_data = self.graph.nodes[current]
-                
-                if node_data['type'] != 'frame':
-                    story['elements'].append({
-                        'type': node_data['type'],
-                        'text': node_data['text']
-                    })
-                else:
-                    break
-                    
-            nested_stories.append(story)
-            
-        return nested_stories
+    def _build_narrative_graph(
+        self,
+        text: str,
+        narrative_elements: List[NarrativeElement]
+    ) -> CompactGraph:
+        """Build directed graph from narrative elements.
         
-    def _analyze_character_network(self) -> nx.Graph:
-        """Analyze character relationships in the narrative.
+        Node ``i`` has id ``f"{type}_{i}"`` and references its element
+        record through the document offsets instead of copying its text.
         
+        Args:
+            text: Normalized text
+            narrative_elements: List of narrative elements
+            
         Returns:
-            NetworkX graph of character relationships
+            CompactGraph chaining the elements of one document
         """
-        character_graph = nx.Graph()
+        return CompactGraph.chain(text, narrative_elements, NARRATIVE_GRAPH_FIELDS)
         
-        # Get character nodes
-        character_nodes = [
-            node for node, attr in self.graph.nodes(data=True)
-            if attr['type'] == 'character'
-        ]
+    def _accumulate(self, graph: CompactGraph):
+        """Merge a document graph into the corpus graph, evicting old documents.
+        
+        Args:
+            graph: Narrative graph of a single document
+        """
+        doc_id = self._documents_seen
+        self._documents_seen += 1
+        
+        view = graph.to_networkx(cache=False)
+        mapping = {node: f"doc{doc_id}/{node}" for node in view.nodes}
+        self.corpus_graph.update(nx.relabel_nodes(view, mapping, copy=False))
+        self._corpus_documents.append(list(mapping.values()))
+        
+        while len(self._corpus_documents) > 1 and (
+            self.corpus_graph.number_of_nodes() > self.corpus_max_nodes or
+            (self.corpus_max_documents is not None and
+             len(self._corpus_documents) > self.corpus_max_documents)
+        ):
+            self.corpus_graph.remove_nodes_from(self._corpus_documents.popleft())
+            
+    @instrumented('detect_nested_stories')
+    def _detect_nested_stories(
+        self,
+        narrative_elements: List[NarrativeElement],
+        text_length: int
+    ) -> List[Dict]:
+        """Detect nested story structures from the sorted narrative elements.
         
-        # Add characters to graph
-        for node in character_nodes:
-            character_name = self.graph.nodes[node]['text']
-            character_graph.add_node(character_name)
+        Args:
+            narrative_elements: Elements of the document sorted by position
+            text_length: Length of the normalized text
             
-        # Add edges between characters that appear in same story segment
-        for story in self._detect_nested_stories():
-            story_characters = [
-                elem['text'] for elem in story['elements']
-                if elem['type'] == 'character'
-            ]
+        Returns:
+            List of nested story dictionaries ordered by position
+        """
+        return self._segmenter.segment(narrative_elements, text_length)
+        
+    def _analyze_character_network(
+        self,
+        text: str,
+        narrative_elements: List[NarrativeElement],
+        nested_stories: List[Dict]
+    ) -> 'nx.Graph':
+        """Analyze character relationships in the narrative.
+        
+        Characters are linked when they co-occur in a story segment (or
+        within ``cooccurrence_window`` tokens in window mode); the edge
+        ``weight`` holds the co-occurrence count.
+        
+        Args:
+            text: Normalized text
+            narrative_elements: Elements of the document sorted by position
+            nested_stories: Output of _detect_nested_stories
             
-            # Create edges between all characters in story
-            for i, char1 in enumerate(story_characters):
-                for char2 in story_characters[i+1:]:
-                    if char1 in character_graph and char2 in character_graph:
-                        character_graph.add_edge(char1, char2)
-                        
-        return character_graph
+        Returns:
+            Weighted NetworkX graph of character relationships
+        """
+        return self._cooccurrence.from_document(
+            text, narrative_elements, nested_stories
+        ).to_networkx()
@@ -0,0 +1,390 @@
+import csv
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Node tables: name -> (label, property columns as (name, neo4j type))
+NODE_TABLES = {
+    'documents': ('Document', [('doc_id', None), ('length', 'int')]),
+    'stories': ('Story', [
+        ('doc_id', None), ('frame_marker', None), ('position', 'int'),
+        ('end', 'int'), ('depth', 'int')
+    ]),
+    'elements': ('Element', [
+        ('doc_id', None), ('type', None), ('text', None), ('position', 'int')
+    ]),
+    'characters': ('Character', [('name', None)]),
+    'patterns': ('CulturalPattern', [
+        ('category', None), ('pattern', None), ('info', None)
+    ]),
+}
+
+# Relationship tables: name -> (type, start label, end label,
+# property columns, properties that distinguish parallel relationships)
+RELATIONSHIP_TABLES = {
+    'has_story': ('HAS_STORY', 'Document', 'Story', [], []),
+    'nested_in': ('NESTED_IN', 'Story', 'Story', [], []),
+    'begins_with': ('BEGINS_WITH', 'Story', 'Element', [], []),
+    'next': ('NEXT', 'Element', 'Element', [], []),
+    'refers_to': ('REFERS_TO', 'Element', 'Character', [], []),
+    'expresses': ('EXPRESSES', 'Element', 'CulturalPattern',
+                  [('position', 'int')], ['position']),
+    'has_pattern': ('HAS_PATTERN', 'Document', 'CulturalPattern',
+                    [('position', 'int'), ('confidence', 'float')], ['position']),
+    'interacts_with': ('INTERACTS_WITH', 'Character', 'Character',
+                       [('doc_id', None), ('weight', 'float')], ['doc_id']),
+}
+
+
+def document_id(result: Dict) -> str:
+    """Stable id of a document derived from its normalized text."""
+    text = result['processed_text']['normalized_text']
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+
+def character_node_id(name: str) -> str:
+    return f"character/{name}"
+
+
+def pattern_node_id(category: str, pattern: str) -> str:
+    return f"pattern/{category}/{pattern}"
+
+
+class GraphExporter(ABC):
+    """Turns analysis results into rows of Neo4j node and relationship tables.
+
+    Every node gets a global id that is stable across runs: documents are
+    ``doc/<doc_id>``, their stories and elements ``doc/<doc_id>/<node>``
+    (node ids of the narrative_graph), while characters (by name) and
+    cultural patterns (by category and pattern) are shared by all
+    documents and emitted once. Cultural pattern occurrences become
+    HAS_PATTERN and EXPRESSES relationships to the shared pattern node.
+
+    Rows are buffered per table and handed in batches of ``batch_size``
+    to ``_write``, which subclasses implement; node tables are always
+    flushed before relationship tables so relationships never precede
+    their endpoints. close() flushes the remaining rows once; adding or
+    flushing afterwards raises ValueError.
+    """
+
+    def __init__(self, batch_size: int = 10000):
+        self.batch_size = batch_size
+        self.documents = 0
+        self._buffers = {name: [] for name in (*NODE_TABLES, *RELATIONSHIP_TABLES)}
+        self._buffered = 0
+        self._characters = set()
+        self._patterns = set()
+        self._closed = False
+
+    def add(self, result: Dict, doc_id: str = None):
+        """Export the graphs of one analyzed document.
+
+        Args:
+            result: Output of ANARSystem.process_text
+            doc_id: Document key; defaults to a hash of the normalized text
+
+        Raises:
+            ValueError: If the exporter is closed
+        """
+        self._check_open()
+        doc_id = doc_id or document_id(result)
+        doc_node = f"doc/{doc_id}"
+        text = result['processed_text']['normalized_text']
+        self._emit('documents', {'id': doc_node, 'doc_id': doc_id,
+                                 'length': len(text)})
+
+        graph = result['narrative_graph']
+        doc = graph.doc
+        stories = result['narrative_analysis']['nested_stories']
+        kinds = [graph.kind_names[k] for k in graph.kinds.tolist()]
+        starts, ends = graph.starts.tolist(), graph.ends.tolist()
+        ids = [f"{doc_node}/{kind}_{i}" for i, kind in enumerate(kinds)]
+
+        story_nodes = [i for i, kind in enumerate(kinds) if kind == 'story']
+        for node, story in zip(story_nodes, stories):
+            self._emit('stories', {
+                'id': ids[node], 'doc_id': doc_id,
+                'frame_marker': story['frame_marker'],
+                'position': story['position'], 'end': story['end'],
+                'depth': story['depth']
+            })
+            self._emit('has_story', {'start': doc_node, 'end': ids[node]})
+            if story['parent'] is not None:
+                self._emit('nested_in', {
+                    'start': ids[node], 'end': ids[story_nodes[story['parent']]]
+                })
+
+        pattern_ids = {}
+        for node, kind in enumerate(kinds):
+            if kind == 'story':
+                continue
+            if kind == 'cultural':
+                attributes = graph.extra[node]
+                pattern = doc[starts[node]:ends[node]]
+                pattern_ids[node] = self._pattern(
+                    attributes['category'], pattern, attributes['info']
+                )
+                continue
+            element_text = doc[starts[node]:ends[node]]
+            self._emit('elements', {
+                'id': ids[node], 'doc_id': doc_id, 'type': kind,
+                'text': element_text, 'position': starts[node]
+            })
+            if kind == 'character':
+                self._emit('refers_to', {
+                    'start': ids[node], 'end': self._character(element_text)
+                })
+
+        sources, targets = graph.edge_arrays()
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            if target in pattern_ids:
+                self._emit('expresses', {
+                    'start': ids[source], 'end': pattern_ids[target],
+                    'position': starts[target]
+                })
+            elif kinds[source] == 'story':
+                self._emit('begins_with', {'start': ids[source], 'end': ids[target]})
+            else:
+                self._emit('next', {'start': ids[source], 'end': ids[target]})
+
+        for pattern in result['cultural_analysis']['patterns']:
+            self._emit('has_pattern', {
+                'start': doc_node,
+                'end': self._pattern(
+                    pattern['category'], pattern['pattern'], pattern['info']
+                ),
+                'position': pattern['position'],
+                'confidence': pattern['confidence']
+            })
+
+        characters = result['character_graph']
+        for name in characters.nodes:
+            self._character(name)
+        for u, v, weight in characters.edges(data='weight', default=1.0):
+            self._emit('interacts_with', {
+                'start': character_node_id(u), 'end': character_node_id(v),
+                'doc_id': doc_id, 'weight': weight
+            })
+
+        self.documents += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def add_all(self, results: Iterable, doc_ids: Iterable[str] = None):
+        """Export many results, e.g. the output of ANARSystem.process_corpus."""
+        doc_ids = iter(doc_ids) if doc_ids is not None else None
+        for result in results:
+            self.add(result, next(doc_ids) if doc_ids is not None else None)
+
+    def _character(self, name: str) -> str:
+        node_id = character_node_id(name)
+        if node_id not in self._characters:
+            self._characters.add(node_id)
+            self._emit('characters', {'id': node_id, 'name': name})
+        return node_id
+
+    def _pattern(self, category: str, pattern: str, info: Dict) -> str:
+        node_id = pattern_node_id(category, pattern)
+        if node_id not in self._patterns:
+            self._patterns.add(node_id)
+            self._emit('patterns', {
+                'id': node_id, 'category': category, 'pattern': pattern,
+                'info': json.dumps(info, ensure_ascii=False, sort_keys=True)
+            })
+        return node_id
+
+    def _emit(self, table: str, row: Dict):
+        self._buffers[table].append(row)
+        self._buffered += 1
+
+    def _check_open(self):
+        if self._closed:
+            raise ValueError("Exporter is closed")
+
+    def flush(self):
+        """Write all buffered rows, nodes first."""
+        self._check_open()
+        for table, rows in self._buffers.items():
+            for start in range(0, len(rows), self.batch_size):
+                self._write(table, rows[start:start + self.batch_size])
+            rows.clear()
+        self._buffered = 0
+
+    @abstractmethod
+    def _write(self, table: str, rows: List[Dict]):
+        """Write one batch of rows of a table."""
+
+    def close(self):
+        """Write the remaining rows and release the output; later calls do nothing."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._release()
+
+    def _release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Neo4jCSVExporter(GraphExporter):
+    """Writes ``neo4j-admin import`` CSV files, one per node or relationship table.
+
+    Files carry their own header row (``id:ID``, ``:START_ID``,
+    ``position:int`` ...); labels and relationship types are given per
+    file on the command line, see import_arguments(). No database or
+    driver is needed.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 10000):
+        super().__init__(batch_size)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+        self._writers = {}
+
+    def path(self, table: str) -> str:
+        kind = 'nodes' if table in NODE_TABLES else 'relationships'
+        return os.path.join(self.directory, f"{kind}_{table}.csv")
+
+    def _writer(self, table: str):
+        writer = self._writers.get(table)
+        if writer is None:
+            handle = open(self.path(table), 'w', encoding='utf-8', newline='')
+            writer = csv.writer(handle)
+            writer.writerow(_csv_header(table))
+            self._files[table] = handle
+            self._writers[table] = writer
+        return writer
+
+    def _write(self, table: str, rows: List[Dict]):
+        writer = self._writer(table)
+        writer.writerows([row.get(field, '') for field in _row_fields(table)]
+                         for row in rows)
+
+    def import_arguments(self) -> List[str]:
+        """``--nodes``/``--relationships`` arguments for neo4j-admin import.
+
+        Use as ``neo4j-admin database import full <database>
+        --multiline-fields=true <arguments>`` (Neo4j 5).
+        """
+        arguments = [
+            f"--nodes={label}={self.path(table)}"
+            for table, (label, _) in NODE_TABLES.items()
+        ]
+        arguments.extend(
+            f"--relationships={rel_type}={self.path(table)}"
+            for table, (rel_type, *_) in RELATIONSHIP_TABLES.items()
+        )
+        return arguments
+
+    def _release(self):
+        # Tables that never received rows still get a file with just the header
+        for table in (*NODE_TABLES, *RELATIONSHIP_TABLES):
+            if table not in self._writers:
+                self._writer(table)
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        self._writers.clear()
+
+
+class Neo4jCypherWriter(GraphExporter):
+    """Writes the same tables to a live database with batched UNWIND queries.
+
+    Nodes are MERGEd on ``id`` and relationships on their endpoints (plus
+    the distinguishing properties of the table), so re-exporting a
+    document is idempotent. Pass a ``neo4j`` driver; the package itself
+    only imports ``neo4j`` in connect().
+    """
+
+    def __init__(self, driver, database: Optional[str] = None, batch_size: int = 1000):
+        super().__init__(batch_size)
+        self.driver = driver
+        self.database = database
+        self._owns_driver = False
+
+    @classmethod
+    def connect(cls, uri: str, auth: Tuple[str, str] = None, **kwargs) -> 'Neo4jCypherWriter':
+        """Create a writer with a new driver from the ``neo4j`` package.
+
+        Args:
+            uri: Bolt or neo4j URI of the database
+            auth: (user, password) tuple
+            **kwargs: Further Neo4jCypherWriter arguments
+
+        Returns:
+            Neo4jCypherWriter owning the driver; close() also closes it
+        """
+        from neo4j import GraphDatabase
+
+        writer = cls(GraphDatabase.driver(uri, auth=auth), **kwargs)
+        writer._owns_driver = True
+        return writer
+
+    def create_constraints(self):
+        """Create the unique id constraints that make the MERGEs fast."""
+        with self._session() as session:
+            for label, _ in NODE_TABLES.values():
+                session.run(
+                    f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:{label}) "
+                    f"REQUIRE n.id IS UNIQUE"
+                )
+
+    def _session(self):
+        if self.database is None:
+            return self.driver.session()
+        return self.driver.session(database=self.database)
+
+    def _write(self, table: str, rows: List[Dict]):
+        with self._session() as session:
+            session.run(_cypher(table), rows=[_cypher_row(table, row) for row in rows])
+
+    def _release(self):
+        if self._owns_driver:
+            self.driver.close()
+
+
+def _row_fields(table: str) -> List[str]:
+    if table in NODE_TABLES:
+        return ['id'] + [name for name, _ in NODE_TABLES[table][1]]
+    return ['start', 'end'] + [name for name, _ in RELATIONSHIP_TABLES[table][3]]
+
+
+def _csv_header(table: str) -> List[str]:
+    if table in NODE_TABLES:
+        columns = NODE_TABLES[table][1]
+        header = ['id:ID']
+    else:
+        columns = RELATIONSHIP_TABLES[table][3]
+        header = [':START_ID', ':END_ID']
+    return header + [f"{name}:{kind}" if kind else name for name, kind in columns]
+
+
+def _cypher(table: str) -> str:
+    if table in NODE_TABLES:
+        label = NODE_TABLES[table][0]
+        return (f"UNWIND $rows AS row MERGE (n:{label} {{id: row.id}}) "
+                f"SET n += row.properties")
+    rel_type, start, end, _, keys = RELATIONSHIP_TABLES[table]
+    key_map = ', '.join(f"{key}: row.properties.{key}" for key in keys)
+    key_map = f" {{{key_map}}}" if key_map else ''
+    return (f"UNWIND $rows AS row "
+            f"MATCH (a:{start} {{id: row.start}}) MATCH (b:{end} {{id: row.end}}) "
+            f"MERGE (a)-[r:{rel_type}{key_map}]->(b) SET r += row.properties")
+
+
+def _cypher_row(table: str, row: Dict) -> Dict:
+    fields = _row_fields(table)
+    keys = fields[:1] if table in NODE_TABLES else fields[:2]
+    return dict(
+        {key: row[key] for key in keys},
+        properties={field: row[field] for field in fields[len(keys):]}
+    )
@@ -0,0 +1,363 @@
+import csv
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, List
+
+from . import __version__
+from .utils.aho_corasick import AhoCorasick
+from .utils.marker_scanner import MarkerScanner
+from .utils.memo import SEGMENT_DELIMITERS, regex_crosses_segments
+
+# Lexicon shipped with the package
+BUILTIN_PATTERNS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'patterns.json')
+
+# Bumped whenever the pickled layout of PatternTables changes; cache keys
+# also cover the package and Python versions
+_CACHE_FORMAT = 3
+
+# Table kinds and whether their entries are grouped (by marker type or
+# cultural category)
+TABLE_KINDS = {
+    'frame': False,
+    'cultural_marker': True,
+    'character': False,
+    'event': False,
+    'cultural': True
+}
+
+# Info keys the patterns of each cultural category must define
+CULTURAL_INFO_KEYS = {
+    'historical': ('period', 'year_range'),
+    'social_custom': ('meaning', 'context'),
+    'idiomatic': ('context', 'meaning')
+}
+
+
+def load_pattern_file(path: str) -> Dict:
+    """Read a pattern lexicon from a JSON or TSV file.
+
+    JSON files hold one object keyed by table kind: ``frame``,
+    ``character`` and ``event`` map to lists of regular expressions,
+    ``cultural_marker`` maps marker types to lists of regular expressions
+    and ``cultural`` maps categories to ``{pattern: info}`` objects. Any
+    other extension is read as TSV with one ``kind, group, pattern[, info]``
+    row per line, where ``group`` is the marker type or category (empty for
+    ungrouped kinds) and ``info`` a JSON object. Blank lines and lines
+    starting with '#' are skipped.
+
+    The info of a cultural pattern must define the keys its category
+    requires (see CULTURAL_INFO_KEYS); ``year_range`` is returned as a
+    (first, last) tuple.
+
+    Args:
+        path: Lexicon file
+
+    Returns:
+        Dict of pattern tables; kinds missing from the file are empty
+
+    Raises:
+        ValueError: If a row or key names an unknown table kind, or
+            cultural pattern info is malformed
+    """
+    tables = _empty_tables()
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+            unknown = set(data) - set(TABLE_KINDS)
+            if unknown:
+                raise ValueError(f"{path}: unknown pattern tables {sorted(unknown)}")
+            tables.update(data)
+            for category, patterns in tables['cultural'].items():
+                for pattern, info in patterns.items():
+                    patterns[pattern] = _check_info(
+                        info, category, f"{path}: cultural/{category}/{pattern}"
+                    )
+            return tables
+
+        rows = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        for line, row in enumerate(rows, 1):
+            if not row or not row[0] or row[0].startswith('#'):
+                continue
+            if row[0] not in TABLE_KINDS or len(row) < 3:
+                raise ValueError(f"{path}:{line}: malformed pattern row")
+            kind, group, pattern = row[:3]
+            if kind == 'cultural':
+                try:
+                    info = json.loads(row[3]) if len(row) > 3 and row[3] else {}
+                except json.JSONDecodeError as error:
+                    raise ValueError(
+                        f"{path}:{line}: invalid pattern info: {error}"
+                    ) from None
+                tables[kind].setdefault(group, {})[pattern] = _check_info(
+                    info, group, f"{path}:{line}"
+                )
+            elif TABLE_KINDS[kind]:
+                tables[kind].setdefault(group, []).append(pattern)
+            else:
+                tables[kind].append(pattern)
+    return tables
+
+
+def merge_tables(sources: Iterable[Dict]) -> Dict:
+    """Merge pattern tables, later sources extending or overriding earlier ones.
+
+    Args:
+        sources: Pattern tables as returned by load_pattern_file
+
+    Returns:
+        Merged pattern tables; duplicate regular expressions are dropped
+        and cultural pattern info is replaced by the last definition
+    """
+    merged = _empty_tables()
+    for tables in sources:
+        for kind, grouped in TABLE_KINDS.items():
+            entries = tables.get(kind) or ({} if grouped else [])
+            if kind == 'cultural':
+                for category, patterns in entries.items():
+                    merged[kind].setdefault(category, {}).update(patterns)
+            elif grouped:
+                for group, patterns in entries.items():
+                    _extend_unique(merged[kind].setdefault(group, []), patterns)
+            else:
+                _extend_unique(merged[kind], entries)
+    return merged
+
+
+def tables_digest(tables: Dict) -> str:
+    """Hash pattern tables.
+
+    Args:
+        tables: Pattern tables
+
+    Returns:
+        Hex digest of their canonical JSON encoding
+    """
+    encoded = json.dumps(tables, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _check_info(info, category: str, where: str) -> Dict:
+    if not isinstance(info, dict):
+        raise ValueError(f"{where}: pattern info must be an object")
+    missing = [key for key in CULTURAL_INFO_KEYS.get(category, ()) if key not in info]
+    if missing:
+        raise ValueError(f"{where}: {category} pattern info lacks {', '.join(missing)}")
+    if 'year_range' in info:
+        year_range = info['year_range']
+        if not (isinstance(year_range, (list, tuple)) and len(year_range) == 2 and
+                all(isinstance(year, int) for year in year_range)):
+            raise ValueError(f"{where}: year_range must be a pair of years")
+        info = dict(info, year_range=tuple(year_range))
+    return info
+
+
+def _empty_tables() -> Dict:
+    return {kind: {} if grouped else [] for kind, grouped in TABLE_KINDS.items()}
+
+
+def _extend_unique(target: List[str], patterns: Iterable[str]):
+    seen = set(target)
+    for pattern in patterns:
+        if pattern not in seen:
+            seen.add(pattern)
+            target.append(pattern)
+
+
+class PatternTables:
+    """Immutable snapshot of the pattern tables and their compiled matchers.
+
+    Snapshots are shared by every component using them and must be treated
+    as read-only; CulturalProcessor hands out a private copy of the
+    cultural patterns for callers that want to edit them.
+
+    Attributes:
+        data: Source pattern tables, see load_pattern_file
+        digest: Hash of ``data``
+        marker_scanner: MarkerScanner over frame and cultural markers
+        marker_types: Cultural marker type per marker pattern, None for
+            frame markers
+        element_scanner: MarkerScanner over character and event patterns
+        element_types: Element type per element pattern
+        pattern_table: (category, pattern, info) per cultural pattern
+        matcher: AhoCorasick automaton over ``pattern_table``
+        categories: Sorted cultural categories
+        category_codes: Index into ``categories`` per cultural pattern
+        crossing_tables: Kinds of the tables with a pattern that may match
+            across a segment delimiter (see regex_crosses_segments); the
+            per-segment memos and incremental updates are only exact for
+            the other tables
+    """
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.digest = tables_digest(data)
+
+        markers = list(data['frame'])
+        self.marker_types = [None] * len(markers)
+        for marker_type, patterns in data['cultural_marker'].items():
+            markers.extend(patterns)
+            self.marker_types.extend([marker_type] * len(patterns))
+        self.marker_scanner = MarkerScanner(markers)
+
+        self.element_types = (
+            ['character'] * len(data['character']) +
+            ['event'] * len(data['event'])
+        )
+        self.element_scanner = MarkerScanner(data['character'] + data['event'])
+
+        self.pattern_table = [
+            (category, pattern, info)
+            for category, patterns in data['cultural'].items()
+            for pattern, info in patterns.items()
+        ]
+        self.matcher = AhoCorasick(pattern for _, pattern, _ in self.pattern_table)
+        self.categories = sorted(data['cultural'])
+        codes = {category: code for code, category in enumerate(self.categories)}
+        self.category_codes = [codes[category] for category, _, _ in self.pattern_table]
+        regexes = {
+            'frame': data['frame'],
+            'cultural_marker': [pattern for patterns in data['cultural_marker'].values()
+                                for pattern in patterns],
+            'character': data['character'],
+            'event': data['event']
+        }
+        crossing = {
+            kind for kind, patterns in regexes.items()
+            if any(regex_crosses_segments(pattern) for pattern in patterns)
+        }
+        # Cultural patterns are literals
+        if any(delimiter in pattern
+               for _, pattern, _ in self.pattern_table
+               for delimiter in SEGMENT_DELIMITERS):
+            crossing.add('cultural')
+        self.crossing_tables = frozenset(crossing)
+
+
+class PatternRegistry:
+    """Shared, reloadable source of compiled pattern tables.
+
+    Lexicon files are merged in order and compiled into a PatternTables
+    snapshot on first use. With a ``cache_dir`` the compiled snapshot is
+    pickled under a key derived from the file contents and the package and
+    Python versions, so a cold start only reads and unpickles the automata
+    instead of rebuilding them. An entry that fails to unpickle is
+    recompiled.
+
+    reload() compiles the new snapshot without holding the registry lock
+    and then publishes it with a single reference swap. Readers never block
+    and always see a complete snapshot; analyses that already hold the old
+    one finish with it. Processes forked after the first load share the
+    snapshot's pages with their parent.
+    """
+
+    def __init__(self, sources: Iterable[str] = None, cache_dir: str = None):
+        self.sources = list(sources) if sources else [BUILTIN_PATTERNS_PATH]
+        self.cache_dir = cache_dir
+        self._tables = None
+        self._lock = threading.Lock()
+
+    @property
+    def tables(self) -> PatternTables:
+        """The current snapshot, loading it on first access."""
+        tables = self._tables
+        if tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self._load(self.sources)
+                tables = self._tables
+        return tables
+
+    def reload(self, sources: Iterable[str] = None) -> PatternTables:
+        """Re-read the lexicon files and publish the new snapshot.
+
+        Args:
+            sources: Replacement lexicon files (defaults to the current ones)
+
+        Returns:
+            The new snapshot
+        """
+        sources = [os.path.abspath(p) for p in sources] if sources else self.sources
+        tables = self._load(sources)
+        with self._lock:
+            self.sources = sources
+            self._tables = tables
+        return tables
+
+    def _load(self, sources: List[str]) -> PatternTables:
+        key = hashlib.sha256(
+            f'{_CACHE_FORMAT}:{__version__}:{sys.version_info[:2]}'.encode('utf-8')
+        )
+        for path in sources:
+            with open(path, 'rb') as f:
+                key.update(hashlib.sha256(f.read()).digest())
+
+        cache_path = None
+        if self.cache_dir:
+            cache_path = os.path.join(self.cache_dir, f'patterns-{key.hexdigest()}.pickle')
+            try:
+                with open(cache_path, 'rb') as f:
+                    tables = pickle.load(f)
+                if isinstance(tables, PatternTables):
+                    return tables
+            except Exception:
+                # Unreadable or stale entries are recompiled and overwritten
+                pass
+
+        tables = PatternTables(merge_tables(load_pattern_file(p) for p in sources))
+        if cache_path is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.pickle.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                # The cache is an optimisation; an unwritable directory is not fatal
+                pass
+        return tables
+
+    def __reduce__(self):
+        # Unpickling yields the receiving process's shared registry
+        return get_registry, ({'pattern_files': self.sources,
+                               'pattern_cache_dir': self.cache_dir},)
+
+
+_registries: Dict = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(config: Dict = None) -> PatternRegistry:
+    """Return the registry shared by every component with the same lexicons.
+
+    Reads ``pattern_files`` (lexicon paths, default the built-in lexicon)
+    and ``pattern_cache_dir`` (compiled snapshot cache, default the
+    ``ANAR_PATTERN_CACHE_DIR`` environment variable, unset disables it)
+    from the config.
+
+    Args:
+        config: Component configuration
+
+    Returns:
+        PatternRegistry shared within this process
+    """
+    config = config or {}
+    sources = [
+        os.path.abspath(path)
+        for path in config.get('pattern_files') or [BUILTIN_PATTERNS_PATH]
+    ]
+    cache_dir = config.get('pattern_cache_dir', os.environ.get('ANAR_PATTERN_CACHE_DIR'))
+    key = (tuple(sources), cache_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = PatternRegistry(sources, cache_dir)
+    return registry
+
+
+# Built-in tables, also exposed through the legacy module constants
+BUILTIN_PATTERNS = load_pattern_file(BUILTIN_PATTERNS_PATH)
@@ -0,0 +1,167 @@
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+
+class Stage:
+    """A named pipeline step and the stages (or inputs) it depends on."""
+
+    def __init__(self, name: str, func: Callable, requires: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, requires={self.requires!r})"
+
+
+class StageScheduler:
+    """Runs a dependency graph of stages, independent stages concurrently.
+
+    Each stage receives the outputs of its required stages as positional
+    arguments, in the order listed in ``requires``. A stage is submitted as
+    soon as all of its dependencies have finished, so the wall time of a run
+    approaches the length of the critical path.
+
+    The executor is ``'serial'`` (run inline in dependency order),
+    ``'thread'``, ``'process'`` or any ``concurrent.futures.Executor``.
+    Under ``'process'`` the stage callables are pickled together with their
+    component, so side effects on component state stay in the worker.
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        executor: Union[str, Executor] = 'serial',
+        max_workers: int = None
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.executor = executor
+        self.max_workers = max_workers
+        self._executor = executor if isinstance(executor, Executor) else None
+        self._order = self._topological_order()
+
+    def _topological_order(self) -> List[Stage]:
+        order, done, visiting = [], set(), set()
+
+        def visit(name):
+            if name in done or name not in self.stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline stages at {name!r}")
+            visiting.add(name)
+            for dependency in self.stages[name].requires:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            order.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor == 'thread':
+                self._executor = ThreadPoolExecutor(self.max_workers)
+            elif self.executor == 'process':
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                raise ValueError(f"Unknown stage executor: {self.executor!r}")
+        return self._executor
+
+    def run(self, **inputs: Any) -> Dict[str, Any]:
+        """Run all stages.
+
+        Args:
+            **inputs: Initial values that stages may require by name
+
+        Returns:
+            Dictionary mapping input and stage names to their values
+        """
+        return self._execute(inputs, None)[0]
+
+    def run_measured(
+        self,
+        measure: Callable,
+        **inputs: Any
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run all stages through a measuring wrapper.
+
+        ``measure(func, args)`` is called in place of ``func(*args)`` for
+        every stage, wherever the stage executes, and must return a
+        (value, metrics) pair. Under the process executor it must be
+        picklable.
+
+        Args:
+            measure: Stage wrapper returning (value, metrics)
+            **inputs: Initial values that stages may require by name
+
+        Returns:
+            Tuple of the values as returned by run() and a dictionary
+            mapping stage names to their metrics
+        """
+        return self._execute(inputs, measure)
+
+    def _execute(
+        self,
+        inputs: Dict[str, Any],
+        measure: Callable = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        missing = {
+            dependency
+            for stage in self._order for dependency in stage.requires
+            if dependency not in self.stages and dependency not in inputs
+        }
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {sorted(missing)}")
+
+        values = dict(inputs)
+        metrics = {}
+
+        def store(name, output):
+            if measure is None:
+                values[name] = output
+            else:
+                values[name], metrics[name] = output
+
+        if self.executor == 'serial':
+            for stage in self._order:
+                args = tuple(values[dep] for dep in stage.requires)
+                store(stage.name, stage.func(*args) if measure is None
+                      else measure(stage.func, args))
+            return values, metrics
+
+        executor = self._get_executor()
+        pending = list(self._order)
+        running = {}
+
+        while pending or running:
+            for stage in [s for s in pending
+                          if all(dep in values for dep in s.requires)]:
+                pending.remove(stage)
+                args = tuple(values[dep] for dep in stage.requires)
+                if measure is None:
+                    future = executor.submit(stage.func, *args)
+                else:
+                    future = executor.submit(measure, stage.func, args)
+                running[future] = stage.name
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                store(running.pop(future), future.result())
+
+        return values, metrics
+
+    def close(self):
+        """Shut down an executor created by the scheduler."""
+        if self._executor is not None and not isinstance(self.executor, Executor):
+            self._executor.shutdown()
+            self._executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if not isinstance(self.executor, Executor):
+            state['_executor'] = None
+        return state
@@ -1,13 +1,56 @@
-import re
 from typing import Dict, List, Tuple
-from camel_tools.utils.normalize import normalize_unicode
-from camel_tools.tokenizers.word import simple_word_tokenize
+
+from .instrumentation import instrumented
+from .patterns import BUILTIN_PATTERNS, PatternTables, get_registry
+from .spans import CulturalMarker
+from .utils.arabic_utils import TokenSpans, normalize_arabic
+from .utils.memo import SegmentMemo, iter_segments
+
+# Built-in frame markers and cultural marker patterns (see anar.patterns;
+# the pattern tables actually used come from the shared registry)
+FRAME_PATTERNS = BUILTIN_PATTERNS['frame']
+CULTURAL_MARKER_PATTERNS = BUILTIN_PATTERNS['cultural_marker']
 
 class TextPreprocessor:
-    """Preprocessor for Classical Arabic texts."""
+    """Preprocessor for Classical Arabic texts.
+    
+    Texts are processed sentence by sentence (segments ending in '.' or
+    '،'), and the normalized text, tokens and markers of each segment are
+    memoized, so formulaic passages repeated throughout a volume are only
+    analysed once. ``segment_memo_size`` in the config bounds the number of
+    memoized segments (default 4096, 0 disables the memo). The memo is
+    bypassed when a marker pattern may match across a segment delimiter.
+    
+    Set ``normalizer`` to ``'builtin'`` to normalize and tokenize with the
+    table-driven equivalents in arabic_utils instead of camel_tools
+    (default ``'camel'``); tokens are then returned as TokenSpans offset
+    arrays rather than a list of strings.
+    
+    Marker tables come from the shared pattern registry selected by the
+    config (see get_registry) unless ``tables`` is given.
+    """
     
-    def __init__(self, config: Dict = None):
+    NORMALIZERS = ('camel', 'builtin')
+    
+    def __init__(self, config: Dict = None, tables: PatternTables = None):
         self.config = config or {}
+        self.normalizer = self.config.get('normalizer', 'camel')
+        if self.normalizer not in self.NORMALIZERS:
+            raise ValueError(f"Unknown normalizer: {self.normalizer!r}")
+        self.use_tables(tables or get_registry(self.config).tables)
+        
+    def use_tables(self, tables: PatternTables):
+        """Switch to another pattern snapshot, discarding memoized segments.
+        
+        Args:
+            tables: Compiled pattern tables
+        """
+        memo_size = self.config.get('segment_memo_size', 4096)
+        self.tables = tables
+        self._marker_scanner = tables.marker_scanner
+        self._marker_types = tables.marker_types
+        crosses = tables.crossing_tables & {'frame', 'cultural_marker'}
+        self._memo = SegmentMemo(memo_size) if memo_size and not crosses else None
         
     def process(self, text: str) -> Dict:
         """Process raw text through the preprocessing pipeline.
@@ -18,17 +61,17 @@ class TextPreprocessor:
         Returns:
             Dict containing processed text and metadata
         """
+        if self._memo is not None:
+            return self._process_segments(text)
+            
         # Unicode normalization
-        normalized = normalize_unicode(text)
+        normalized = self.normalize(text)
         
         # Tokenization
-        tokens = simple_word_tokenize(normalized)
-        
-        # Detect frame markers
-        frame_markers = self._detect_frame_markers(normalized)
+        tokens = self.tokenize(normalized)
         
-        # Detect cultural markers
-        cultural_markers = self._detect_cultural_markers(normalized)
+        # Detect frame and cultural markers
+        frame_markers, cultural_markers = self._detect_markers(normalized)
         
         return {
             'normalized_text': normalized,
@@ -37,6 +80,163 @@ class TextPreprocessor:
             'cultural_markers': cultural_markers
         }
         
+    def _process_segments(self, text: str) -> Dict:
+        """Process text segment by segment, reusing memoized segments.
+        
+        Normalization, tokenization and marker detection never cross a
+        segment delimiter, so the concatenated per-segment results equal
+        those of processing the whole text at once.
+        
+        Args:
+            text: Raw Arabic text input
+            
+        Returns:
+            Dict containing processed text and metadata
+        """
+        parts, tokens, frame_markers, cultural_markers = [], [], [], []
+        offsets = []
+        offset = 0
+        
+        for start, end in iter_segments(text):
+            normalized, segment_tokens, frames, markers = self.process_segment(
+                text[start:end]
+            )
+            parts.append(normalized)
+            offsets.append(offset)
+            tokens.append(segment_tokens)
+            frame_markers.extend(
+                (marker, position + offset) for marker, position in frames
+            )
+            cultural_markers.extend(
+                (marker.type, marker.start + offset, marker.end + offset)
+                for marker in markers
+            )
+            offset += len(normalized)
+            
+        normalized = ''.join(parts)
+        cultural_markers = [
+            CulturalMarker(normalized, marker_type, start, end)
+            for marker_type, start, end in cultural_markers
+        ]
+        return {
+            'normalized_text': normalized,
+            'tokens': self.join_tokens(normalized, tokens, offsets),
+            'frame_markers': frame_markers,
+            'cultural_markers': cultural_markers
+        }
+        
+    def process_segment(self, segment: str) -> Tuple[str, List[str], List, List]:
+        """Process one segment, using the memo when it is enabled.
+        
+        Args:
+            segment: Raw text of one segment from iter_segments
+            
+        Returns:
+            Tuple of (normalized text, tokens, frame markers, cultural
+            markers) with positions relative to the segment
+        """
+        entry = self._memo.get(segment) if self._memo is not None else None
+        if entry is None:
+            normalized = self.normalize(segment)
+            entry = (
+                normalized,
+                self.tokenize(normalized),
+                *self._detect_markers(normalized)
+            )
+            if self._memo is not None:
+                self._memo.put(segment, entry)
+        return entry
+        
+    def join_tokens(self, text: str, parts: List, offsets: List[int]):
+        """Concatenate the tokens of consecutive segments.
+        
+        Args:
+            text: Concatenated normalized text of the segments
+            parts: Tokens of each segment, as returned by tokenize()
+            offsets: Offset of each segment in ``text``
+            
+        Returns:
+            Tokens of ``text``, of the type tokenize() returns
+        """
+        if self.normalizer == 'builtin':
+            return TokenSpans.join(text, parts, offsets)
+        return [token for part in parts for token in part]
+        
+    def cache_info(self) -> Dict:
+        """Report segment memo statistics.
+        
+        Returns:
+            Dict of hits, misses, size and hit rate (empty if disabled)
+        """
+        return self._memo.cache_info() if self._memo is not None else {}
+        
+    def normalize(self, text: str) -> str:
+        """Apply Unicode normalization to raw text.
+        
+        Args:
+            text: Raw Arabic text
+            
+        Returns:
+            Normalized text
+        """
+        if self.normalizer == 'builtin':
+            return normalize_arabic(text)
+            
+        # camel_tools is slow to import, so load it on first use
+        from camel_tools.utils.normalize import normalize_unicode
+        return normalize_unicode(text)
+        
+    def tokenize(self, text: str) -> List[str]:
+        """Split normalized text into word tokens.
+        
+        Args:
+            text: Normalized text
+            
+        Returns:
+            List of tokens, or TokenSpans with the builtin normalizer
+        """
+        if self.normalizer == 'builtin':
+            return TokenSpans.tokenize(text)
+            
+        from camel_tools.tokenizers.word import simple_word_tokenize
+        return simple_word_tokenize(text)
+        
+    @instrumented('detect_markers', lambda markers: len(markers[0]) + len(markers[1]))
+    def _detect_markers(
+        self,
+        text: str,
+        start: int = 0,
+        stop: int = None,
+        state: Dict[int, int] = None
+    ) -> Tuple[List[Tuple[str, int]], List[CulturalMarker]]:
+        """Detect frame and cultural markers in a single scan.
+        
+        Args:
+            text: Normalized Arabic text
+            start: Offset at which scanning starts
+            stop: Only report markers starting before this offset
+            state: Scanner state carried between consecutive calls
+            
+        Returns:
+            Tuple of (frame markers, cultural markers), both ordered by
+            position
+        """
+        frame_markers = []
+        cultural_markers = []
+        
+        for match_start, match_end, index in self._marker_scanner.scan(
+            text, start, state=state, stop=stop
+        ):
+            marker_type = self._marker_types[index]
+            if marker_type is None:
+                frame_markers.append((text[match_start:match_end], match_start))
+            else:
+                cultural_markers.append(
+                    CulturalMarker(text, marker_type, match_start, match_end)
+                )
+                
+        return frame_markers, cultural_markers
+        
     def _detect_frame_markers(self, text: str) -> List[Tuple[str, int]]:
         """Detect frame story markers in the text.
         
@@ -46,56 +246,15 @@ class TextPreprocessor:
         Returns:
             List of (marker, position) tuples
         """
-        markers = []
-        
-        # Common frame markers
-        frame_patterns = [
-            r'قالت شهرزاد',
-            r'وأدرك شهرزاد الصباح',
-            r'حكى أن',
-            r'وحدثني أيها الملك'
-        ]
+        return self._detect_markers(text)[0]
         
-        for pattern in frame_patterns:
-            for match in re.finditer(pattern, text):
-                markers.append((match.group(), match.start()))
-                
-        return sorted(markers, key=lambda x: x[1])
-        
-    def _detect_cultural_markers(self, text: str) -> List[Dict]:
+    def _detect_cultural_markers(self, text: str) -> List[CulturalMarker]:
         """Detect cultural markers and references.
         
         Args:
             text: Normalized Arabic text
             
         Returns:
-            List of cultural marker dictionaries
+            List of CulturalMarker records
         """
-        markers = []
-        
-        # Common cultural patterns
-        cultural_patterns = {
-            'historical_era': [
-                r'في عهد [^،.]+',
-                r'زمن [^،.]+'
-            ],
-            'social_custom': [
-                r'قبّل الأرض',
-                r'ضرب في الأرض'
-            ],
-            'idiomatic': [
-                r'بين حانا ومانا',
-                r'يضرب أخماساً في أسداس'
-            ]
-        }
-        
-        for marker_type, patterns in cultural_patterns.items():
-            for pattern in patterns:
-                for match in re.finditer(pattern, text):
-                    markers.append({
-                        'type': marker_type,
-                        'text': match.group(),
-                        'position': match.start()
-                    })
-                    
-        return sorted(markers, key=lambda x: x['position'])
+        return self._detect_markers(text)[1]
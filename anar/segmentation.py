@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List
+
+# How each frame marker affects the stack of open stories:
+#   'narrator' - closes every open story and opens a top-level one
+#   'nested'   - opens a story inside the innermost open story; when that
+#                story was opened by the same marker, it is closed first and
+#                the new story becomes its sibling (a narrator telling one
+#                tale after another)
+#   'close'    - closes the innermost open story without opening another
+FRAME_MARKER_ROLES = {
+    'قالت شهرزاد': 'narrator',
+    'وأدرك شهرزاد الصباح': 'narrator',
+    'وحدثني أيها الملك': 'narrator',
+    'حكى أن': 'nested'
+}
+
+
+class StorySegmenter:
+    """Assigns narrative elements to nested frame-story intervals.
+
+    Elements are consumed in position order in a single merge pass while a
+    stack holds the currently open stories; every non-frame element belongs
+    to the innermost open story. Each story records its ``position`` and
+    ``end`` offsets, its nesting ``depth``, its own ``index`` and the index
+    of its ``parent``, and the elements directly inside it (elements of
+    nested stories belong to those stories only).
+
+    ``feed`` can be used incrementally: it returns the stories closed by
+    each element, which lets streaming callers emit them as soon as they
+    are complete.
+    """
+
+    def __init__(self, roles: Dict[str, str] = None, default_role: str = 'nested'):
+        self.roles = dict(FRAME_MARKER_ROLES, **(roles or {}))
+        self.default_role = default_role
+        self.reset()
+
+    def reset(self):
+        """Forget all open stories."""
+        self._stack = []
+        self._count = 0
+
+    def feed(self, element) -> List[Dict]:
+        """Consume the next element in position order.
+
+        Args:
+            element: Narrative element with type, text and position
+
+        Returns:
+            Stories closed by this element, innermost first
+        """
+        if element['type'] != 'frame':
+            if self._stack:
+                self._stack[-1]['elements'].append(element)
+            return []
+
+        marker = element['text']
+        position = element['position']
+        role = self.roles.get(marker, self.default_role)
+
+        if role == 'close':
+            return self._close(max(0, len(self._stack) - 1), position)
+
+        if role == 'narrator':
+            closed = self._close(0, position)
+        elif self._stack and self._stack[-1]['frame_marker'] == marker:
+            closed = self._close(len(self._stack) - 1, position)
+        else:
+            closed = []
+        story = {
+            'frame_marker': marker,
+            'position': position,
+            'end': None,
+            'depth': len(self._stack),
+            'index': self._count,
+            'parent': self._stack[-1]['index'] if self._stack else None,
+            'elements': []
+        }
+        self._count += 1
+        self._stack.append(story)
+        return closed
+
+    def finish(self, end: int) -> List[Dict]:
+        """Close all stories still open at the end of the text.
+
+        Args:
+            end: Offset of the end of the text
+
+        Returns:
+            The closed stories, innermost first
+        """
+        return self._close(0, end)
+
+    def _close(self, depth: int, position: int) -> List[Dict]:
+        closed = []
+        while len(self._stack) > depth:
+            story = self._stack.pop()
+            story['end'] = position
+            closed.append(story)
+        return closed
+
+    def segment(self, elements: Iterable, end: int) -> List[Dict]:
+        """Segment one document.
+
+        Args:
+            elements: Narrative elements sorted by position
+            end: Offset of the end of the text
+
+        Returns:
+            List of stories ordered by position
+        """
+        self.reset()
+        stories = []
+        for element in elements:
+            stories.extend(self.feed(element))
+        stories.extend(self.finish(end))
+        stories.sort(key=lambda story: story['index'])
+        return stories
@@ -0,0 +1,624 @@
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from .compact_graph import CompactGraph
+from .spans import CulturalMarker, NarrativeElement, PatternMatch
+from .utils.lazy import lazy_import
+
+nx = lazy_import('networkx')
+
+MAGIC = b'ANARRES1'
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+# The byte offset of every TEXT_STRIDE-th character of the UTF-8 text is
+# indexed, so slices decode without scanning from the start
+TEXT_STRIDE = 64
+
+_HEADER = struct.Struct('<8sQ')
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _tag_tuples(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return {'__tuple__': [_tag_tuples(item) for item in value]}
+    if isinstance(value, list):
+        return [_tag_tuples(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _tag_tuples(item) for key, item in value.items()}
+    return value
+
+
+def _untag_tuples(value: Dict) -> Any:
+    if len(value) == 1 and '__tuple__' in value:
+        return tuple(value['__tuple__'])
+    return value
+
+
+def _to_json(value: Any) -> str:
+    return json.dumps(_tag_tuples(value), ensure_ascii=False, sort_keys=True)
+
+
+def _from_json(encoded: str) -> Any:
+    return json.loads(encoded, object_hook=_untag_tuples)
+
+
+def _text_arrays(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = text.encode('utf-8', 'surrogatepass')
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+    widths = 1 + (codes >= 0x80) + (codes >= 0x800) + (codes >= 0x10000)
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(widths, out=offsets[1:])
+    index = offsets[::TEXT_STRIDE]
+    if (len(codes)) % TEXT_STRIDE:
+        index = np.append(index, offsets[-1])
+    return np.frombuffer(encoded, dtype=np.uint8), index
+
+
+class _StringTable:
+    """Deduplicating string table: each distinct string is stored once."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def add(self, value: str) -> int:
+        return self._ids.setdefault(value, len(self._ids))
+
+    def add_json(self, value: Any) -> int:
+        return self.add(_to_json(value))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        encoded = [value.encode('utf-8', 'surrogatepass') for value in self._ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _graph_arrays(
+    prefix: str,
+    graph: CompactGraph,
+    strings: _StringTable,
+    arrays: Dict[str, np.ndarray]
+) -> Dict:
+    arrays[f'{prefix}.kinds'] = graph.kinds
+    arrays[f'{prefix}.starts'] = graph.starts
+    arrays[f'{prefix}.ends'] = graph.ends
+    arrays[f'{prefix}.indptr'] = graph.indptr
+    arrays[f'{prefix}.indices'] = graph.indices
+
+    # Sparse per-node attributes, one column pair per attribute name
+    columns = {}
+    for node, attributes in graph.extra.items():
+        for key, value in attributes.items():
+            columns.setdefault(key, []).append((node, value))
+    encodings = {}
+    for key, entries in columns.items():
+        encoding = 'str' if all(isinstance(v, str) for _, v in entries) else 'json'
+        encodings[key] = encoding
+        add = strings.add if encoding == 'str' else strings.add_json
+        arrays[f'{prefix}.extra.{key}.nodes'] = np.array(
+            [node for node, _ in entries], dtype=np.int64
+        )
+        arrays[f'{prefix}.extra.{key}.values'] = np.array(
+            [add(value) for _, value in entries], dtype=np.int32
+        )
+
+    return {
+        'kind_names': list(graph.kind_names),
+        'fields': {kind: list(fields) for kind, fields in graph.fields.items()},
+        'extra': encodings
+    }
+
+
+def _offsets(records, key: str = 'text') -> Tuple[np.ndarray, np.ndarray]:
+    starts = np.fromiter((r['position'] for r in records), np.int64, len(records))
+    lengths = np.fromiter((len(r[key]) for r in records), np.int64, len(records))
+    return starts, starts + lengths
+
+
+def dumps(result: Dict) -> bytes:
+    """Encode an ANARSystem.process_text result in the binary format.
+
+    The file holds a JSON header and 64-byte aligned arrays. Elements,
+    markers, stories and patterns are stored column by column as offsets
+    into the normalized text, which is kept as UTF-8 with a sparse
+    character-to-byte index. Both graphs are stored as CSR or edge-list
+    arrays, and every other string goes into one deduplicated string
+    table.
+
+    Args:
+        result: Output of ANARSystem.process_text
+
+    Returns:
+        Encoded bytes, loadable with loads() or load()
+    """
+    processed = result['processed_text']
+    narrative = result['narrative_analysis']
+    cultural = result['cultural_analysis']
+    text = processed['normalized_text']
+
+    strings = _StringTable()
+    arrays = {}
+    meta = {'version': FORMAT_VERSION}
+
+    arrays['text.utf8'], arrays['text.index'] = _text_arrays(text)
+    meta['text_length'] = len(text)
+    arrays['tokens'] = np.fromiter(
+        (strings.add(token) for token in processed['tokens']),
+        np.int32, len(processed['tokens'])
+    )
+
+    frames = [{'text': m, 'position': p} for m, p in processed['frame_markers']]
+    arrays['frame_markers.start'], arrays['frame_markers.end'] = _offsets(frames)
+    markers = processed['cultural_markers']
+    arrays['cultural_markers.start'], arrays['cultural_markers.end'] = _offsets(markers)
+    arrays['cultural_markers.type'] = np.fromiter(
+        (strings.add(m['type']) for m in markers), np.int32, len(markers)
+    )
+
+    # Narrative elements live in the narrative graph; stories refer to them
+    element_graph = narrative['narrative_graph']
+    meta['narrative'] = _graph_arrays('narrative', element_graph, strings, arrays)
+    node_of = {
+        (element_graph.kind_names[kind], start, end): node
+        for node, (kind, start, end) in enumerate(zip(
+            element_graph.kinds.tolist(),
+            element_graph.starts.tolist(),
+            element_graph.ends.tolist()
+        ))
+    }
+
+    stories = narrative['nested_stories']
+    for key in ('position', 'end', 'depth', 'index'):
+        arrays[f'stories.{key}'] = np.fromiter(
+            (story[key] for story in stories), np.int64, len(stories)
+        )
+    arrays['stories.parent'] = np.fromiter(
+        (-1 if s['parent'] is None else s['parent'] for s in stories),
+        np.int64, len(stories)
+    )
+    arrays['stories.frame_marker'] = np.fromiter(
+        (strings.add(story['frame_marker']) for story in stories),
+        np.int32, len(stories)
+    )
+    element_nodes = [
+        [
+            node_of[element['type'], start, end]
+            for element, start, end in zip(
+                story['elements'], *_offsets(story['elements'])
+            )
+        ]
+        for story in stories
+    ]
+    indptr = np.zeros(len(stories) + 1, dtype=np.int64)
+    np.cumsum([len(nodes) for nodes in element_nodes], out=indptr[1:])
+    arrays['stories.element_indptr'] = indptr
+    arrays['stories.element_nodes'] = np.array(
+        [node for nodes in element_nodes for node in nodes], dtype=np.int64
+    )
+
+    # Patterns reference a table that is stored once in the header
+    patterns = cultural['patterns']
+    table_index, table = {}, []
+    for pattern in patterns:
+        key = (pattern['category'], pattern['pattern'])
+        if key not in table_index:
+            table_index[key] = len(table)
+            table.append([pattern['category'], pattern['pattern'], pattern['info']])
+    meta['pattern_table'] = strings.add_json(table)
+    arrays['patterns.start'], arrays['patterns.end'] = _offsets(patterns, 'pattern')
+    arrays['patterns.index'] = np.fromiter(
+        (table_index[p['category'], p['pattern']] for p in patterns),
+        np.int64, len(patterns)
+    )
+    arrays['patterns.confidence'] = np.fromiter(
+        (p['confidence'] for p in patterns), np.float64, len(patterns)
+    )
+    meta['contexts'] = strings.add_json(cultural['contexts'])
+
+    meta['structure'] = _graph_arrays(
+        'structure', result['narrative_graph'], strings, arrays
+    )
+
+    characters = result['character_graph']
+    names = list(characters.nodes)
+    character_ids = {name: i for i, name in enumerate(names)}
+    edges = list(characters.edges(data='weight', default=1.0))
+    arrays['characters.names'] = np.array(
+        [strings.add(name) for name in names], dtype=np.int32
+    )
+    arrays['characters.source'] = np.array(
+        [character_ids[u] for u, _, _ in edges], dtype=np.int64
+    )
+    arrays['characters.target'] = np.array(
+        [character_ids[v] for _, v, _ in edges], dtype=np.int64
+    )
+    arrays['characters.weight'] = np.array(
+        [w for _, _, w in edges], dtype=np.float64
+    )
+
+    if 'timings' in result:
+        meta['timings'] = strings.add_json(result['timings'])
+
+    arrays['strings.data'], arrays['strings.offsets'] = strings.arrays()
+    return _pack(meta, arrays)
+
+
+def _pack(meta: Dict, arrays: Dict[str, np.ndarray]) -> bytes:
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps(
+        {'meta': meta, 'arrays': layout}, ensure_ascii=False
+    ).encode('utf-8')
+    data_start = _align(_HEADER.size + len(header))
+
+    buffer = bytearray(data_start + offset)
+    _HEADER.pack_into(buffer, 0, MAGIC, len(header))
+    buffer[_HEADER.size:_HEADER.size + len(header)] = header
+    for name, array in arrays.items():
+        start = data_start + layout[name]['offset']
+        buffer[start:start + array.nbytes] = array.tobytes()
+    return bytes(buffer)
+
+
+def dump(result: Dict, file: Union[str, BinaryIO]):
+    """Write a result in the binary format to a path or binary file."""
+    data = dumps(result)
+    if hasattr(file, 'write'):
+        file.write(data)
+    else:
+        with open(file, 'wb') as f:
+            f.write(data)
+
+
+def loads(buffer) -> 'StoredResult':
+    """Open an encoded result held in memory (bytes or any buffer)."""
+    return StoredResult(buffer)
+
+
+def load(path: str, use_mmap: bool = True) -> 'StoredResult':
+    """Open a stored result.
+
+    Args:
+        path: File written by dump()
+        use_mmap: Memory-map the file so arrays are read lazily by the OS
+            instead of being copied into memory
+
+    Returns:
+        StoredResult backed by the file contents
+    """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    return StoredResult(buffer)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (CompactGraph, nx.Graph)):
+        return graph_to_dict(value)
+    if isinstance(value, Mapping):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return [_plain(item) for item in value]
+
+
+def graph_to_dict(graph: Union[CompactGraph, 'nx.Graph']) -> Dict:
+    """Convert a result graph into JSON-compatible node and edge lists.
+
+    Args:
+        graph: CompactGraph or networkx graph of a result
+
+    Returns:
+        Dictionary with 'directed', 'nodes' (each with its 'id' and
+        attributes) and 'edges' (each with 'source', 'target' and
+        attributes)
+    """
+    if isinstance(graph, CompactGraph):
+        graph = graph.to_networkx()
+    return {
+        'directed': graph.is_directed(),
+        'nodes': [
+            dict(_plain(attributes), id=node)
+            for node, attributes in graph.nodes(data=True)
+        ],
+        'edges': [
+            dict(_plain(attributes), source=source, target=target)
+            for source, target, attributes in graph.edges(data=True)
+        ]
+    }
+
+
+def result_to_dict(result: Dict) -> Dict:
+    """Convert a result into plain dictionaries, lists and scalars.
+
+    Results hold span records, TokenSpans, tuples and graph objects, so
+    they cannot be passed to ``json.dumps`` directly. The converted copy
+    can: span records become dictionaries of their fields, sequences
+    become lists and graphs become node and edge lists (see
+    graph_to_dict). Converting materializes every record, so the copy
+    is larger than the result itself.
+
+    Args:
+        result: Output of ANARSystem.process_text, or a StoredResult
+
+    Returns:
+        JSON-serializable copy of the result
+    """
+    return _plain(result)
+
+
+class StoredResult(Mapping):
+    """Read-only view of a serialized result.
+
+    Every array is a zero-copy NumPy view of the underlying buffer (a
+    memory map for load()), and the result sections ('processed_text',
+    'narrative_analysis', 'cultural_analysis', 'narrative_graph',
+    'character_graph' and optionally 'timings') are only rebuilt when
+    first accessed. The graphs come back as CompactGraph objects over the
+    stored arrays. Small queries such as text_slice(), string() and
+    patterns_between() work without rebuilding any section.
+    """
+
+    SECTIONS = (
+        'processed_text', 'narrative_analysis', 'cultural_analysis',
+        'narrative_graph', 'character_graph'
+    )
+
+    def __init__(self, buffer):
+        magic, header_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an ANAR result file")
+        header = json.loads(
+            bytes(buffer[_HEADER.size:_HEADER.size + header_length]).decode('utf-8')
+        )
+        self.meta = header['meta']
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version: {self.meta.get('version')}")
+        self._buffer = buffer
+        self._layout = header['arrays']
+        self._data_start = _align(_HEADER.size + header_length)
+        self._arrays = {}
+        self._sections = {}
+        self._text = None
+        self._table = [
+            tuple(entry) for entry in _from_json(self.string(self.meta['pattern_table']))
+        ]
+
+    # Raw access
+
+    def array(self, name: str) -> np.ndarray:
+        """Return a stored array as a read-only zero-copy view."""
+        array = self._arrays.get(name)
+        if array is None:
+            spec = self._layout[name]
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            array = np.frombuffer(
+                self._buffer, dtype=dtype, count=count,
+                offset=self._data_start + spec['offset']
+            ).reshape(spec['shape'])
+            self._arrays[name] = array
+        return array
+
+    def string(self, string_id: int) -> str:
+        """Decode one entry of the string table."""
+        offsets = self.array('strings.offsets')
+        start, end = int(offsets[string_id]), int(offsets[string_id + 1])
+        return self.array('strings.data')[start:end].tobytes().decode(
+            'utf-8', 'surrogatepass'
+        )
+
+    def text_slice(self, start: int, end: int) -> str:
+        """Decode characters [start, end) of the normalized text."""
+        if self._text is not None:
+            return self._text[start:end]
+        length = self.meta['text_length']
+        start, end = max(0, min(start, length)), max(0, min(end, length))
+        if start >= end:
+            return ''
+        index = self.array('text.index')
+        first = start // TEXT_STRIDE
+        last = min(-(-end // TEXT_STRIDE), len(index) - 1)
+        chunk = self.array('text.utf8')[index[first]:index[last]].tobytes()
+        local = start - first * TEXT_STRIDE
+        return chunk.decode('utf-8', 'surrogatepass')[local:local + end - start]
+
+    @property
+    def text(self) -> str:
+        """The full normalized text (decoded once on first access)."""
+        if self._text is None:
+            self._text = self.array('text.utf8').tobytes().decode(
+                'utf-8', 'surrogatepass'
+            )
+        return self._text
+
+    def patterns_between(self, start: int, end: int) -> np.ndarray:
+        """Indices of the cultural patterns starting in [start, end)."""
+        starts = self.array('patterns.start')
+        return np.arange(
+            np.searchsorted(starts, start, 'left'),
+            np.searchsorted(starts, end, 'left')
+        )
+
+    # Mapping interface
+
+    def __getitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        if key not in self._sections:
+            self._sections[key] = getattr(self, f'_build_{key}')()
+        return self._sections[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.SECTIONS
+        if 'timings' in self.meta:
+            yield 'timings'
+
+    def __len__(self) -> int:
+        return len(self.SECTIONS) + ('timings' in self.meta)
+
+    def __contains__(self, key) -> bool:
+        return key in self.SECTIONS or (key == 'timings' and 'timings' in self.meta)
+
+    def to_dict(self) -> Dict:
+        """Rebuild every section as a plain result dictionary."""
+        return {key: self[key] for key in self}
+
+    # Section builders
+
+    def _strings(self, name: str) -> List[str]:
+        return [self.string(i) for i in self.array(name).tolist()]
+
+    def _spans(self, prefix: str) -> List[Tuple[int, int]]:
+        return list(zip(self.array(f'{prefix}.start').tolist(),
+                        self.array(f'{prefix}.end').tolist()))
+
+    def _build_processed_text(self) -> Dict:
+        text = self.text
+        types = self._strings('cultural_markers.type')
+        return {
+            'normalized_text': text,
+            'tokens': self._strings('tokens'),
+            'frame_markers': [
+                (text[start:end], start)
+                for start, end in self._spans('frame_markers')
+            ],
+            'cultural_markers': [
+                CulturalMarker(text, marker_type, start, end)
+                for marker_type, (start, end)
+                in zip(types, self._spans('cultural_markers'))
+            ]
+        }
+
+    def _graph(self, prefix: str) -> CompactGraph:
+        meta = self.meta[prefix]
+        extra = {}
+        for key, encoding in meta['extra'].items():
+            nodes = self.array(f'{prefix}.extra.{key}.nodes').tolist()
+            values = self._strings(f'{prefix}.extra.{key}.values')
+            if encoding == 'json':
+                values = [_from_json(value) for value in values]
+            for node, value in zip(nodes, values):
+                extra.setdefault(node, {})[key] = value
+        return CompactGraph(
+            self.text,
+            meta['kind_names'],
+            self.array(f'{prefix}.kinds'),
+            self.array(f'{prefix}.starts'),
+            self.array(f'{prefix}.ends'),
+            self.array(f'{prefix}.indptr'),
+            self.array(f'{prefix}.indices'),
+            {kind: tuple(fields) for kind, fields in meta['fields'].items()},
+            extra
+        )
+
+    def _build_narrative_analysis(self) -> Dict:
+        graph = self._graph('narrative')
+        text = self.text
+        kinds, starts, ends = graph.kinds.tolist(), graph.starts, graph.ends
+        indptr = self.array('stories.element_indptr').tolist()
+        nodes = self.array('stories.element_nodes').tolist()
+        frames = self._strings('stories.frame_marker')
+
+        columns = zip(
+            *(self.array(f'stories.{key}').tolist()
+              for key in ('position', 'end', 'depth', 'index', 'parent'))
+        )
+        stories = []
+        for i, (position, end, depth, index, parent) in enumerate(columns):
+            stories.append({
+                'frame_marker': frames[i],
+                'position': position,
+                'end': end,
+                'depth': depth,
+                'index': index,
+                'parent': None if parent < 0 else parent,
+                'elements': [
+                    NarrativeElement(
+                        text, graph.kind_names[kinds[node]],
+                        int(starts[node]), int(ends[node])
+                    )
+                    for node in nodes[indptr[i]:indptr[i + 1]]
+                ]
+            })
+
+        return {
+            'narrative_graph': graph,
+            'nested_stories': stories,
+            'character_network': self['character_graph']
+        }
+
+    def _build_cultural_analysis(self) -> Dict:
+        text = self.text
+        patterns = []
+        for (start, end), index, confidence in zip(
+                self._spans('patterns'),
+                self.array('patterns.index').tolist(),
+                self.array('patterns.confidence').tolist()):
+            pattern = PatternMatch(text, start, end, index, self._table)
+            pattern.confidence = confidence
+            patterns.append(pattern)
+        return {
+            'patterns': patterns,
+            'contexts': _from_json(self.string(self.meta['contexts']))
+        }
+
+    def _build_narrative_graph(self) -> CompactGraph:
+        return self._graph('structure')
+
+    def _build_character_graph(self) -> 'nx.Graph':
+        names = self._strings('characters.names')
+        graph = nx.Graph()
+        graph.add_nodes_from(names)
+        graph.add_weighted_edges_from(
+            (names[u], names[v], w) for u, v, w in zip(
+                self.array('characters.source').tolist(),
+                self.array('characters.target').tolist(),
+                self.array('characters.weight').tolist()
+            )
+        )
+        return graph
+
+    def _build_timings(self) -> Dict:
+        return _from_json(self.string(self.meta['timings']))
+
+    def close(self):
+        """Release the memory map once no array views are in use."""
+        self._arrays.clear()
+        self._sections.clear()
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                # Views handed out to callers still reference the map
+                pass
+
+    def __enter__(self) -> 'StoredResult':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,215 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Characters of context on each side of a cultural pattern match
+CONTEXT_CHARS = 50
+
+
+class Revision:
+    """One version of a document that is being edited incrementally.
+
+    Superseding a revision records the edit that replaced it: every offset
+    at or after ``end`` moves by ``delta``. Span records following a
+    revision (see SpanRecord.follow) apply the edits made since on their
+    next access, so untouched records are never shifted one by one.
+    """
+
+    __slots__ = ('doc', 'next', 'end', 'delta')
+
+    def __init__(self, doc: str):
+        self.doc = doc
+        self.next = None
+        self.end = 0
+        self.delta = 0
+
+    def supersede(self, doc: str, end: int, delta: int) -> 'Revision':
+        """Record an edit and return the revision of the edited document.
+
+        Args:
+            doc: Edited document
+            end: End of the replaced range, in offsets of this revision
+            delta: Length change of the document
+
+        Returns:
+            The new current revision
+        """
+        self.next = Revision(doc)
+        self.end = end
+        self.delta = delta
+        # Followers read the text of the newest revision only
+        self.doc = None
+        return self.next
+
+
+class SpanRecord(MutableMapping):
+    """Compact analysis record backed by offsets into a document buffer.
+
+    Records keep the shared document string and (start, end) offsets in
+    ``__slots__`` instead of copied substrings; text fields are materialized
+    only when read. They behave like the dictionaries they replace, exposing
+    the keys listed in ``_fields``.
+    """
+
+    __slots__ = ('_buffer', '_start', '_end', '_revision')
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, doc: str, start: int, end: int):
+        self._buffer = doc
+        self._start = start
+        self._end = end
+        self._revision = None
+
+    def follow(self, revision: Optional[Revision]):
+        """Track the edits made after ``revision``, or stop with None.
+
+        Args:
+            revision: Current revision of the document the record points
+                into, or None to keep the current offsets and document
+        """
+        if self._revision is not None:
+            self._catch_up()
+        self._revision = revision
+
+    def _catch_up(self):
+        revision = self._revision
+        while revision.next is not None:
+            if self._start >= revision.end:
+                self._start += revision.delta
+                self._end += revision.delta
+            revision = revision.next
+        self._revision = revision
+        self._buffer = revision.doc
+
+    @property
+    def _doc(self) -> str:
+        if self._revision is not None and self._revision.next is not None:
+            self._catch_up()
+        return self._buffer
+
+    @property
+    def start(self) -> int:
+        if self._revision is not None and self._revision.next is not None:
+            self._catch_up()
+        return self._start
+
+    @property
+    def end(self) -> int:
+        if self._revision is not None and self._revision.next is not None:
+            self._catch_up()
+        return self._end
+
+    @property
+    def text(self) -> str:
+        if self._revision is not None and self._revision.next is not None:
+            self._catch_up()
+        return self._buffer[self._start:self._end]
+
+    @property
+    def position(self) -> int:
+        return self.start
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self._fields or key in ('text', 'position'):
+            raise KeyError(f"{type(self).__name__} field {key!r} is read-only")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError(f"{type(self).__name__} fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._fields if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        """Materialize the record as a plain dictionary."""
+        return {key: self[key] for key in self}
+
+    def __getstate__(self):
+        if self._revision is not None and self._revision.next is not None:
+            self._catch_up()
+        state = {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, '__slots__', ())
+            if hasattr(self, name)
+        }
+        # Copies do not follow later edits
+        state['_revision'] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class NarrativeElement(SpanRecord):
+    """A character, event or frame mention in a document."""
+
+    __slots__ = ('type',)
+    _fields = ('type', 'text', 'position')
+
+    def __init__(self, doc: str, element_type: str, start: int, end: int):
+        super().__init__(doc, start, end)
+        self.type = element_type
+
+
+class CulturalMarker(SpanRecord):
+    """A cultural marker found by the preprocessor."""
+
+    __slots__ = ('type',)
+    _fields = ('type', 'text', 'position')
+
+    def __init__(self, doc: str, marker_type: str, start: int, end: int):
+        super().__init__(doc, start, end)
+        self.type = marker_type
+
+
+class PatternMatch(SpanRecord):
+    """A cultural pattern occurrence, resolved lazily from the pattern table."""
+
+    __slots__ = ('index', '_table', 'confidence')
+    _fields = (
+        'category', 'pattern', 'position', 'info', 'context_window', 'confidence'
+    )
+
+    def __init__(self, doc: str, start: int, end: int, index: int, table: List):
+        super().__init__(doc, start, end)
+        self.index = index
+        self._table = table
+
+    @property
+    def category(self) -> str:
+        return self._table[self.index][0]
+
+    @property
+    def pattern(self) -> str:
+        return self._table[self.index][1]
+
+    @property
+    def info(self) -> Dict:
+        return self._table[self.index][2]
+
+    @property
+    def context_start(self) -> int:
+        return max(0, self.start - CONTEXT_CHARS)
+
+    @property
+    def context_end(self) -> int:
+        return min(len(self._doc), self.end + CONTEXT_CHARS)
+
+    @property
+    def context_window(self) -> str:
+        return self._doc[self.context_start:self.context_end]
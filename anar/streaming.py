@@ -0,0 +1,193 @@
+import unicodedata
+from typing import Dict, Iterable, Iterator, Union
+
+from .segmentation import StorySegmenter
+from .spans import CONTEXT_CHARS
+from .utils.memo import SEGMENT_DELIMITERS
+
+
+def _shift(state: Dict[int, int], offset: int) -> Dict[int, int]:
+    return {index: end + offset for index, end in state.items()}
+
+
+def _letter_boundary(text: str) -> int:
+    # Last offset that does not separate a letter from its combining marks
+    end = len(text) - 1
+    while end > 0 and unicodedata.combining(text[end]):
+        end -= 1
+    return end or len(text)
+
+
+class StreamAnalyzer:
+    """Incremental analysis of texts too large to hold in memory at once.
+
+    Input is read in chunks, normalized and scanned window by window. Each
+    window extends ``overlap`` characters past the region it reports on,
+    and the region ends right after a segment delimiter ('.' or '،'). As
+    long as no pattern table matches across segment delimiters (see
+    PatternTables.crossing_tables), no match can straddle two regions, so
+    the records equal those of ANARSystem.process_text however long the
+    matches are. A region without any delimiter is held until it reaches
+    ``stream_max_window`` characters (at least 1M); only then, or when a
+    lexicon has regexes that cross delimiters, is it cut at the overlap,
+    which finds matches exactly once as long as they are not longer than
+    the overlap. All reported positions are absolute offsets into the
+    normalized stream.
+
+    Yielded records carry a ``kind`` key:
+
+    - ``'segment'``: a frame story as produced by StorySegmenter, yielded
+      as soon as a later frame marker (or the end of the stream) closes it
+    - ``'cultural_marker'``: a preprocessor cultural marker
+    - ``'cultural_pattern'``: a validated CulturalProcessor pattern
+    """
+
+    def __init__(self, system, chunk_size: int = None, overlap: int = None):
+        config = system.config
+        self.preprocessor = system.preprocessor
+        self.narrative_analyzer = system.narrative_analyzer
+        self.cultural_processor = system.cultural_processor
+        self.chunk_size = chunk_size or config.get('stream_chunk_size', 1 << 16)
+        self.overlap = overlap or config.get('stream_overlap', max(
+            1024, self.cultural_processor._matcher.max_length + CONTEXT_CHARS
+        ))
+        self.max_window = config.get(
+            'stream_max_window', max(1 << 20, 16 * self.chunk_size)
+        )
+
+    def _read_normalized(
+        self,
+        source: Union[Iterable[str], object]
+    ) -> Iterator[str]:
+        """Read raw chunks and normalize them at whitespace boundaries.
+
+        Text without whitespace is carried over to the next chunk only up to
+        ``chunk_size`` characters; longer runs are cut between letters.
+        """
+        if hasattr(source, 'read'):
+            chunks = iter(lambda: source.read(self.chunk_size), '')
+        else:
+            chunks = iter(source)
+
+        carry = ''
+        for chunk in chunks:
+            raw = carry + chunk
+            # Never split a word (or a base letter from its diacritics)
+            cut = max(raw.rfind(' '), raw.rfind('\n')) + 1
+            if not cut:
+                if len(raw) < self.chunk_size:
+                    carry = raw
+                    continue
+                # A run without whitespace is cut before a base letter
+                cut = _letter_boundary(raw)
+            carry = raw[cut:]
+            yield self.preprocessor.normalize(raw[:cut])
+
+        if carry:
+            yield self.preprocessor.normalize(carry)
+
+    def process(self, source: Union[Iterable[str], object]) -> Iterator[Dict]:
+        """Analyze a file object or an iterable of text chunks.
+
+        Args:
+            source: Text file object or iterable of raw text chunks
+
+        Returns:
+            Generator of segment and cultural match records
+        """
+        buffer, base, emit_from = '', 0, 0
+        self._marker_state, self._element_state, self._pattern_state = {}, {}, {}
+        segmenter = self._segmenter = StorySegmenter(
+            self.narrative_analyzer.config.get('frame_marker_roles')
+        )
+
+        # Regions can only end on a segment delimiter when no match spans one
+        aligned = not self.preprocessor.tables.crossing_tables - {'cultural'}
+        pieces = self._read_normalized(source)
+        piece = next(pieces, None)
+
+        while piece is not None:
+            buffer += piece
+            piece = next(pieces, None)
+            final = piece is None
+
+            if not final and len(buffer) - (emit_from - base) < (
+                    self.chunk_size + self.overlap):
+                continue
+
+            if final:
+                cutoff = base + len(buffer)
+            else:
+                cutoff = base + len(buffer) - self.overlap
+                if aligned:
+                    delimiter = max(
+                        buffer.rfind(d, emit_from - base, cutoff - base)
+                        for d in SEGMENT_DELIMITERS
+                    )
+                    if delimiter >= 0:
+                        cutoff = base + delimiter + 1
+                    elif cutoff - emit_from < self.max_window:
+                        continue
+            yield from self._scan_window(buffer, base, emit_from, cutoff)
+            emit_from = cutoff
+
+            # Keep the overlap plus leading context for the next window
+            keep_from = max(0, cutoff - CONTEXT_CHARS - base)
+            buffer = buffer[keep_from:]
+            base += keep_from
+
+        for story in segmenter.finish(emit_from):
+            yield dict(story, kind='segment')
+
+    def _scan_window(
+        self,
+        buffer: str,
+        base: int,
+        emit_from: int,
+        cutoff: int
+    ) -> Iterator[Dict]:
+        """Report everything starting in [emit_from, cutoff) of the stream."""
+        start, stop = emit_from - base, cutoff - base
+
+        state = _shift(self._marker_state, -base)
+        frame_markers, cultural_markers = self.preprocessor._detect_markers(
+            buffer, start, stop, state
+        )
+        self._marker_state = _shift(state, base)
+
+        state = _shift(self._element_state, -base)
+        elements = self.narrative_analyzer._scan_elements(
+            buffer, start, stop, state
+        )
+        self._element_state = _shift(state, base)
+
+        # Records from the window buffer are materialized so that the
+        # buffer itself can be released
+        elements = [element.to_dict() for element in elements]
+        elements.extend(
+            {'type': 'frame', 'text': marker, 'position': position}
+            for marker, position in frame_markers
+        )
+        elements.sort(key=lambda x: x['position'])
+
+        for element in elements:
+            element['position'] += base
+            for story in self._segmenter.feed(element):
+                yield dict(story, kind='segment')
+
+        for marker in cultural_markers:
+            record = marker.to_dict()
+            record['position'] += base
+            record['kind'] = 'cultural_marker'
+            yield record
+
+        state = _shift(self._pattern_state, -base)
+        patterns = self.cultural_processor._detect_patterns(
+            buffer, start, stop, state
+        )
+        self._pattern_state = _shift(state, base)
+        for pattern in self.cultural_processor._validate_patterns(patterns):
+            record = pattern.to_dict()
+            record['position'] += base
+            record['kind'] = 'cultural_pattern'
+            yield record
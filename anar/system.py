@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, Union
+
+from . import __version__
+from .cache import ResultCache, content_key
+from .corpus import process_corpus
+from .file_reader import DEFAULT_WINDOW, MappedTextFile, iter_file
+from .preprocessor import TextPreprocessor
+from .narrative_analyzer import NarrativeAnalyzer
+from .cultural_processor import CATEGORY_MARKERS, CulturalProcessor
+from .graph_builder import GraphBuilder
+from .incremental import IncrementalAnalyzer
+from .instrumentation import Instrumentation, PrometheusExporter
+from .patterns import get_registry
+from .pipeline import Stage, StageScheduler
+from .streaming import StreamAnalyzer
+
+# Config keys that affect how, not what, results are computed
+_RUNTIME_CONFIG_KEYS = {
+    'cache_path', 'cache_max_bytes', 'stage_executor', 'stage_workers',
+    'stream_chunk_size', 'stream_overlap', 'stream_max_window', 'segment_memo_size',
+    'instrument', 'instrument_memory', 'profile', 'profile_dir',
+    'metrics_path', 'metrics_flush_every', 'pattern_files', 'pattern_cache_dir',
+    'file_stream_threshold', 'file_window'
+}
+
+class ANARSystem:
+    """Main ANAR system class combining all components.
+    
+    The pipeline is modelled as a small stage graph: preprocessing feeds the
+    narrative and cultural stages, which are independent of each other, and
+    graph building runs once both are done. Set ``stage_executor`` to
+    ``'thread'`` or ``'process'`` in the config to run independent stages
+    concurrently (default ``'serial'``).
+    
+    Set ``cache_path`` to keep results in a persistent ResultCache keyed by
+    the input text and the pipeline fingerprint (``cache_max_bytes`` bounds
+    its size, default 1 GiB). Cache hits skip the pipeline entirely,
+    including side effects such as corpus graph accumulation.
+    
+    Set ``instrument`` to add per-stage wall times and hot-method call and
+    match counts to each result under ``'timings'`` (see Instrumentation).
+    ``instrument_memory`` adds per-stage peak memory, ``profile`` selects a
+    per-document ``'cprofile'`` or ``'tracemalloc'`` capture (raw cProfile
+    stats go to ``profile_dir`` when set), and ``metrics_path`` writes
+    Prometheus text metrics to a file. Any of these turns instrumentation
+    on, as does add_timings_callback().
+    
+    The last processed document is kept so that update_text() can
+    re-analyze edits to it incrementally.
+    
+    Pattern tables come from the PatternRegistry shared by all systems with
+    the same ``pattern_files`` (see get_registry). reload_patterns(), or a
+    reload of the registry by any other system, takes effect at the start
+    of the next document; documents being analyzed keep their tables.
+    """
+    
+    def __init__(self, config: Dict = None):
+        self.config = config or {}
+        self.patterns = get_registry(self.config)
+        self._tables = self.patterns.tables
+        self.preprocessor = TextPreprocessor(config, self._tables)
+        self.narrative_analyzer = NarrativeAnalyzer(config, self._tables)
+        self.cultural_processor = CulturalProcessor(config, self._tables)
+        self.graph_builder = GraphBuilder(config)
+        self.scheduler = StageScheduler(
+            [
+                Stage('processed_text', self.preprocessor.process, ['text']),
+                Stage('narrative_analysis', self.narrative_analyzer.analyze,
+                      ['processed_text']),
+                Stage('cultural_analysis', self.cultural_processor.process,
+                      ['processed_text']),
+                Stage('narrative_graph', self.graph_builder.build_narrative_graph,
+                      ['narrative_analysis', 'cultural_analysis']),
+                Stage('character_graph', self.graph_builder.build_character_graph,
+                      ['narrative_analysis']),
+            ],
+            executor=self.config.get('stage_executor', 'serial'),
+            max_workers=self.config.get('stage_workers')
+        )
+        
+        self.cache = None
+        if self.config.get('cache_path'):
+            self.cache = ResultCache(
+                self.config['cache_path'],
+                self.config.get('cache_max_bytes', 1 << 30)
+            )
+        
+        self.instrumentation = None
+        if any(self.config.get(key) for key in (
+                'instrument', 'instrument_memory', 'profile', 'metrics_path')):
+            self._enable_instrumentation()
+        if self.config.get('metrics_path'):
+            self.instrumentation.add_callback(PrometheusExporter(
+                self.config['metrics_path'],
+                self.config.get('metrics_flush_every', 1)
+            ))
+        self._fingerprint = self.fingerprint()
+        self._previous = None
+        self._incremental = None
+        
+    def _enable_instrumentation(self) -> Instrumentation:
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(
+                memory=self.config.get('instrument_memory', False),
+                profile=self.config.get('profile'),
+                profile_dir=self.config.get('profile_dir')
+            )
+        return self.instrumentation
+        
+    def add_timings_callback(self, callback: Callable[[Dict], None]):
+        """Call ``callback`` with the timings of every processed document.
+        
+        Args:
+            callback: Callable receiving the 'timings' dictionary
+        """
+        self._enable_instrumentation().add_callback(callback)
+        
+    def fingerprint(self) -> str:
+        """Hash the configuration and every pattern table the pipeline uses.
+        
+        Returns:
+            Hex digest that changes whenever results could change
+        """
+        tables = {
+            'version': __version__,
+            'config': {
+                key: value for key, value in self.config.items()
+                if key not in _RUNTIME_CONFIG_KEYS
+            },
+            'patterns': self.cultural_processor.patterns_digest(),
+            'category_markers': {
+                category: regex.pattern
+                for category, regex in CATEGORY_MARKERS.items()
+            }
+        }
+        encoded = json.dumps(
+            tables, sort_keys=True, default=repr, ensure_ascii=False
+        )
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+        
+    def process_text(self, text: str) -> Dict:
+        """Process Arabic text through the complete ANAR pipeline.
+        
+        Args:
+            text: Raw Arabic text input
+            
+        Returns:
+            Dictionary containing complete analysis results. It holds span
+            records and graph objects; use serialization.result_to_dict
+            for a JSON-serializable copy
+        """
+        start = perf_counter()
+        self._sync_patterns()
+        if self.cache is not None:
+            key = content_key(text, self._fingerprint)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if self.instrumentation is not None:
+                    cached['timings'] = {
+                        'total_time': perf_counter() - start,
+                        'stages': {},
+                        'cached': True
+                    }
+                    self.instrumentation.emit(cached['timings'])
+                self._remember(text, cached)
+                return cached
+                
+        timings = None
+        if self.instrumentation is not None:
+            stages, timings = self.instrumentation.run(self.scheduler, text=text)
+        else:
+            stages = self.scheduler.run(text=text)
+        
+        result = {
+            'processed_text': stages['processed_text'],
+            'narrative_analysis': stages['narrative_analysis'],
+            'cultural_analysis': stages['cultural_analysis'],
+            'narrative_graph': stages['narrative_graph'],
+            'character_graph': stages['character_graph']
+        }
+        
+        if self.cache is not None:
+            self.cache.put(key, result)
+            
+        if timings is not None:
+            result['timings'] = timings
+            
+        self._remember(text, result)
+        return result
+        
+    def reload_patterns(self, pattern_files: Iterable[str] = None):
+        """Reload the shared pattern registry from its lexicon files.
+        
+        The new tables are compiled while other analyses keep running and
+        are picked up by every system sharing the registry at the start of
+        its next document.
+        
+        Args:
+            pattern_files: Replacement lexicon files (defaults to the
+                current ones)
+        """
+        self.patterns.reload(pattern_files)
+        
+    def _sync_patterns(self) -> bool:
+        # Switch all components to the registry's current snapshot at once;
+        # edits to the cultural patterns likewise change the fingerprint
+        tables = self.patterns.tables
+        if tables is self._tables:
+            if not self.cultural_processor.sync_patterns():
+                return False
+            self._fingerprint = self.fingerprint()
+            self._incremental = None
+            return True
+        for component in (self.preprocessor, self.narrative_analyzer,
+                          self.cultural_processor):
+            component.use_tables(tables)
+        self._tables = tables
+        self._fingerprint = self.fingerprint()
+        self._incremental = None
+        return True
+        
+    def _remember(self, text: str, result: Dict):
+        self._previous = (text, result)
+        self._incremental = None
+        
+    def update_text(self, edits) -> Dict:
+        """Re-analyze the last processed document after edits.
+        
+        Only the sentence segments touched by the edits are normalized and
+        scanned again (see IncrementalAnalyzer); the previous result is
+        patched in place, including both graphs, and is equal to what
+        process_text would return for the edited text. Updates bypass the
+        result cache and corpus graph accumulation. The first update after
+        the pattern tables were reloaded re-runs the whole pipeline.
+        
+        Args:
+            edits: The complete edited text, or (start, end, replacement)
+                edits in offsets of the previous raw text
+            
+        Returns:
+            The updated result dictionary
+            
+        Raises:
+            ValueError: If no document has been processed yet
+        """
+        if self._previous is None:
+            raise ValueError("update_text needs a document from process_text")
+        start = perf_counter()
+        
+        text, result = self._previous
+        if self._sync_patterns() or not IncrementalAnalyzer.supports(self):
+            if not isinstance(edits, str):
+                edits = IncrementalAnalyzer.apply(text, edits)
+            return self.process_text(edits)
+            
+        if self._incremental is None:
+            self._incremental = IncrementalAnalyzer(self, text, result)
+        result = self._incremental.update(edits)
+        self._previous = (self._incremental.text, result)
+        
+        if self.instrumentation is not None:
+            result['timings'] = {
+                'total_time': perf_counter() - start,
+                'stages': {},
+                'cached': False,
+                'incremental': True
+            }
+            self.instrumentation.emit(result['timings'])
+        return result
+        
+    def process_file(self, path: str, stream: bool = None) -> Union[Dict, Iterator[Dict]]:
+        """Analyze a UTF-8 text file read through a memory map.
+        
+        Files up to ``file_stream_threshold`` bytes (default 64 MiB) are
+        decoded straight from the mapped pages and go through process_text.
+        Larger files are decoded in windows of ``file_window`` bytes
+        (default 1 MiB) and fed to process_stream, so memory use stays
+        bounded by the window and stream overlap instead of the file size.
+        
+        Args:
+            path: File to analyze
+            stream: Force (True) or prevent (False) streaming regardless
+                of the file size
+            
+        Returns:
+            The process_text result, or the process_stream record generator
+            when the file is streamed
+        """
+        window = self.config.get('file_window', DEFAULT_WINDOW)
+        if stream is None:
+            stream = os.path.getsize(path) > self.config.get(
+                'file_stream_threshold', 64 << 20
+            )
+        if stream:
+            return self.process_stream(iter_file(path, window))
+        with MappedTextFile(path, window) as f:
+            text = f.read()
+        return self.process_text(text)
+        
+    def process_corpus(
+        self,
+        texts: Iterable[str],
+        workers: int = None,
+        chunksize: int = 1,
+        ordered: bool = True
+    ) -> Iterator:
+        """Process a collection of texts, optionally in parallel.
+        
+        Args:
+            texts: Iterable of raw Arabic texts
+            workers: Number of worker processes (None runs sequentially)
+            chunksize: Number of documents sent to a worker per task
+            ordered: Yield results in input order; when False, yield
+                (index, result) tuples as documents complete
+            
+        Returns:
+            Generator of results as returned by process_text, served from
+            the result cache when one is configured
+        """
+        return process_corpus(self, texts, workers, chunksize, ordered)
+        
+    def process_stream(self, source, chunk_size: int = None) -> Iterator[Dict]:
+        """Analyze a large text incrementally with bounded memory.
+        
+        Args:
+            source: Text file object or iterable of raw text chunks
+            chunk_size: Number of characters read per chunk
+            
+        Returns:
+            Generator of narrative segments and cultural matches with
+            absolute positions, see StreamAnalyzer
+        """
+        self._sync_patterns()
+        return StreamAnalyzer(self, chunk_size).process(source)
+        
+    def memo_stats(self) -> Dict:
+        """Report segment memo hit rates of the preprocessing and cultural stages.
+        
+        Returns:
+            Dict with 'preprocessor' and 'cultural' cache_info() entries
+        """
+        return {
+            'preprocessor': self.preprocessor.cache_info(),
+            'cultural': self.cultural_processor.cache_info()
+        }
+        
+    def __getstate__(self):
+        # Worker processes do not need the last document
+        state = self.__dict__.copy()
+        state['_previous'] = None
+        state['_incremental'] = None
+        return state
+        
+    def close(self):
+        """Release executors held by the stage scheduler and the cache."""
+        self.scheduler.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -1 +1,3 @@
-
+from .aho_corasick import AhoCorasick
+from .marker_scanner import MarkerScanner
+from .intervals import containing_intervals
@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern exact string matcher built on an Aho-Corasick automaton.
+
+    The automaton is compiled once from a list of literal patterns and then
+    finds every occurrence of every pattern in a single left-to-right pass
+    over the text, independently of the number of patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._lengths = [len(p) for p in self.patterns]
+        self.max_length = max(self._lengths, default=0)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _build(self):
+        """Build the trie, failure links and merged output sets."""
+        goto, out = self._goto, self._out
+        own: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    own.append([])
+                state = nxt
+            own[state].append(index)
+
+        self._fail = fail = [0] * len(goto)
+        self._out = out = [()] * len(goto)
+        out[0] = tuple(own[0])
+
+        # Breadth-first traversal so that failure targets are always
+        # finalised before the states that point to them.
+        queue = deque()
+        for nxt in goto[0].values():
+            out[nxt] = tuple(own[nxt])
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                target = fail[state]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                fail[nxt] = goto[target].get(ch, 0)
+                out[nxt] = tuple(own[nxt]) + out[fail[nxt]]
+                queue.append(nxt)
+
+    def iter_matches(
+        self,
+        text: str,
+        start: int = 0,
+        end: int = None
+    ) -> Iterator[Tuple[int, int, int]]:
+        """Find all (possibly overlapping) pattern occurrences in text.
+
+        Args:
+            text: Text to scan
+            start: Offset at which scanning starts
+            end: Offset at which scanning stops (defaults to len(text))
+
+        Returns:
+            Iterator of (start, end, pattern_index) tuples ordered by end
+            offset, longest pattern first for a shared end offset
+        """
+        goto, fail, out, lengths = (
+            self._goto, self._fail, self._out, self._lengths
+        )
+        state = 0
+        end = len(text) if end is None else end
+
+        for i in range(start, end):
+            ch = text[i]
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+
+            if out[state]:
+                stop = i + 1
+                for index in out[state]:
+                    yield stop - lengths[index], stop, index
+
+    def findall(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return all pattern occurrences sorted by start offset.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (start, end, pattern_index) tuples
+        """
+        return sorted(self.iter_matches(text), key=lambda m: (m[0], m[2]))
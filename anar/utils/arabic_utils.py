@@ -1 +1,197 @@
+import unicodedata
+from typing import Iterator, List, Sequence, Tuple, Union
 
+import numpy as np
+
+# Lookup table of whitespace code points, as used by str.split()
+_MAX_SPACE = 0x3000
+_SPACE_TABLE = np.array([chr(i).isspace() for i in range(_MAX_SPACE + 1)])
+
+# Characters camel_tools' normalize_unicode expands before NFKC
+_CHAR_FIX = str.maketrans({
+    '\ufdfc': 'ريال',
+    '\ufdfd': 'بسم الله الرحمن الرحيم'
+})
+
+# Token classes for the built-in tokenizer
+_WORD, _SPACE, _SYMBOL = 0, 1, 2
+_MAX_BMP = 0xFFFF
+_CLASS_TABLE = None
+
+
+def code_points(text: str) -> np.ndarray:
+    """Return the code points of a string as a uint32 array.
+
+    Args:
+        text: Text to convert
+
+    Returns:
+        Array with one entry per character
+    """
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+
+def space_mask(codes: np.ndarray) -> np.ndarray:
+    """Flag whitespace characters in a code point array.
+
+    Args:
+        codes: Output of code_points()
+
+    Returns:
+        Boolean array, True where str.isspace() holds
+    """
+    return _SPACE_TABLE[np.minimum(codes, _MAX_SPACE)] & (codes <= _MAX_SPACE)
+
+
+def word_starts(text: str) -> np.ndarray:
+    """Offsets at which whitespace-separated words start.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Sorted int64 array of word start offsets
+    """
+    space = space_mask(code_points(text))
+    starts = ~space
+    starts[1:] &= space[:-1]
+    return np.flatnonzero(starts)
+
+
+def normalize_arabic(text: str) -> str:
+    """Built-in equivalent of camel_tools' ``normalize_unicode``.
+
+    The two ligatures camel_tools spells out are expanded with a
+    translation table before NFKC normalization. Text that is already
+    normalized, which includes all ASCII text, is returned unchanged
+    without being copied.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        NFKC-normalized text
+    """
+    if text.isascii():
+        return text
+    if '\ufdfc' in text or '\ufdfd' in text:
+        text = text.translate(_CHAR_FIX)
+    elif unicodedata.is_normalized('NFKC', text):
+        return text
+    return unicodedata.normalize('NFKC', text)
+
+
+def _token_class(char: str) -> int:
+    if char.isspace():
+        return _SPACE
+    return _SYMBOL if unicodedata.category(char)[0] in 'PS' else _WORD
+
+
+def _class_table() -> np.ndarray:
+    global _CLASS_TABLE
+    if _CLASS_TABLE is None:
+        _CLASS_TABLE = np.array(
+            [_token_class(chr(i)) for i in range(_MAX_BMP + 1)], dtype=np.uint8
+        )
+    return _CLASS_TABLE
+
+
+def token_offsets(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Locate word tokens the way camel_tools' ``simple_word_tokenize`` does.
+
+    Tokens are whitespace-separated words with every punctuation and
+    symbol character split off as a token of its own. Characters are
+    classified through a lookup table over the code point array, so no
+    token strings are created. Unlike camel_tools, multi-character emoji
+    sequences are split into their characters.
+
+    Args:
+        text: Normalized text
+
+    Returns:
+        Tuple of int64 arrays of token start and end offsets
+    """
+    codes = code_points(text)
+    classes = _class_table()[np.minimum(codes, _MAX_BMP)]
+    astral = codes > _MAX_BMP
+    if astral.any():
+        for code in np.unique(codes[astral]).tolist():
+            classes[codes == code] = _token_class(chr(code))
+
+    word = classes == _WORD
+    symbol = classes == _SYMBOL
+    starts = word.copy()
+    starts[1:] &= ~word[:-1]
+    ends = word.copy()
+    ends[:-1] &= ~word[1:]
+    return (np.flatnonzero(starts | symbol),
+            np.flatnonzero(ends | symbol) + 1)
+
+
+class TokenSpans(Sequence):
+    """Tokens of a text held as start and end offset arrays.
+
+    Behaves as a read-only list of token strings (length, indexing,
+    slicing, iteration and equality with lists) but only creates a token
+    string when it is accessed.
+
+    Attributes:
+        text: Text the offsets point into
+        starts: Token start offsets
+        ends: Token end offsets
+    """
+
+    __slots__ = ('text', 'starts', 'ends')
+
+    def __init__(self, text: str, starts: np.ndarray, ends: np.ndarray):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def tokenize(cls, text: str) -> 'TokenSpans':
+        """Tokenize ``text`` with token_offsets()."""
+        return cls(text, *token_offsets(text))
+
+    @classmethod
+    def join(cls, text: str, parts: List['TokenSpans'], offsets: List[int]) -> 'TokenSpans':
+        """Concatenate the tokens of consecutive pieces of ``text``.
+
+        Args:
+            text: Concatenation of the pieces
+            parts: Tokens of each piece
+            offsets: Offset of each piece in ``text``
+
+        Returns:
+            TokenSpans over ``text``
+        """
+        if not parts:
+            return cls.tokenize(text[:0])
+        shifts = np.repeat(np.asarray(offsets, dtype=np.int64),
+                           [len(part) for part in parts])
+        return cls(
+            text,
+            np.concatenate([part.starts for part in parts]) + shifts,
+            np.concatenate([part.ends for part in parts]) + shifts
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return TokenSpans(self.text, self.starts[index], self.ends[index])
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        return (text[start:end] for start, end in
+                zip(self.starts.tolist(), self.ends.tolist()))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f'TokenSpans({list(self)!r})'
@@ -0,0 +1,41 @@
+import heapq
+from typing import Hashable, Iterable, Iterator, Tuple
+
+Interval = Tuple[int, int, Hashable]
+
+
+def containing_intervals(
+    intervals: Iterable[Interval],
+    queries: Iterable[Interval]
+) -> Iterator[Tuple[Hashable, Hashable]]:
+    """Find, for every query span, the intervals that fully contain it.
+
+    Both inputs are swept once in start order while a heap keeps the
+    intervals that are still open, so the cost is close to linear in the
+    number of spans when intervals overlap only locally.
+
+    Args:
+        intervals: (start, end, key) spans to search in
+        queries: (start, end, key) spans to look up
+
+    Returns:
+        Iterator of (query_key, interval_key) pairs, ordered by query start
+    """
+    intervals = sorted(intervals, key=lambda x: (x[0], x[1]))
+    active = []
+    i = 0
+
+    for start, end, query_key in sorted(queries, key=lambda x: (x[0], x[1])):
+        while i < len(intervals) and intervals[i][0] <= start:
+            interval_start, interval_end, key = intervals[i]
+            heapq.heappush(active, (interval_end, i, key))
+            i += 1
+
+        # Intervals ending at or before this start cannot contain any
+        # later query either
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+
+        for interval_end, _, key in sorted(active, key=lambda x: x[1]):
+            if interval_end >= end:
+                yield query_key, key
@@ -0,0 +1,30 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module whose body only runs on first attribute access.
+
+    Args:
+        name: Absolute module name, e.g. 'networkx'
+
+    Returns:
+        The module, loaded already if it was imported before
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
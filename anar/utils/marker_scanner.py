@@ -0,0 +1,79 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+class MarkerScanner:
+    """Single-pass scanner for a table of regular expressions.
+
+    All patterns are merged into one lookahead alternation with a named group
+    per pattern, so the regex engine walks the text once and only stops at
+    positions where at least one pattern matches. The result is identical to
+    running ``re.finditer`` separately for each pattern.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(p) for p in self.patterns]
+        self._group_index = {f'm{i}': i for i in range(len(self.patterns))}
+        self._scanner = re.compile('(?=' + '|'.join(
+            f'(?P<m{i}>{p})' for i, p in enumerate(self.patterns)
+        ) + ')') if self.patterns else None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def scan(
+        self,
+        text: str,
+        start: int = 0,
+        end: int = None,
+        state: Dict[int, int] = None,
+        stop: int = None
+    ) -> List[Tuple[int, int, int]]:
+        """Find all pattern matches in text in one pass.
+
+        Args:
+            text: Text to scan
+            start: Offset at which scanning starts
+            end: Offset at which scanning stops (defaults to len(text))
+            state: Optional mapping of pattern index to the end offset of
+                its last accepted match, updated in place. Passing the same
+                mapping to consecutive calls continues the scan seamlessly.
+            stop: Only report matches starting before this offset, while
+                still letting them extend up to ``end``
+
+        Returns:
+            List of (start, end, pattern_index) tuples ordered by start
+            offset and then by pattern index
+        """
+        if self._scanner is None:
+            return []
+
+        end = len(text) if end is None else end
+        stop = end if stop is None else stop
+        last_end = {} if state is None else state
+        compiled = self._compiled
+        matches = []
+
+        for hit in self._scanner.finditer(text, start, end):
+            pos = hit.start()
+            if pos >= stop:
+                break
+            first = self._group_index[hit.lastgroup]
+
+            for index in range(first, len(compiled)):
+                if index == first:
+                    match_end = hit.end(hit.lastgroup)
+                else:
+                    match = compiled[index].match(text, pos, end)
+                    if match is None:
+                        continue
+                    match_end = match.end()
+
+                # Matches of one pattern never overlap, as with re.finditer
+                if pos < last_end.get(index, 0):
+                    continue
+                last_end[index] = match_end
+                matches.append((pos, match_end, index))
+
+        return matches
@@ -0,0 +1,149 @@
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Tuple
+
+try:
+    from re import _constants as _sre, _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as _sre
+    import sre_parse as _sre_parse
+
+# Sentence delimiters at which texts are cut into memoizable segments. The
+# built-in marker, element and cultural patterns never match across them;
+# see regex_crosses_segments for lexicon patterns.
+SEGMENT_DELIMITERS = '.،'
+
+_SEGMENT_RE = re.compile(r'[^.،]*[.،]|[^.،]+')
+
+_CATEGORIES = {
+    _sre.CATEGORY_DIGIT: re.compile(r'\d'),
+    _sre.CATEGORY_NOT_DIGIT: re.compile(r'\D'),
+    _sre.CATEGORY_SPACE: re.compile(r'\s'),
+    _sre.CATEGORY_NOT_SPACE: re.compile(r'\S'),
+    _sre.CATEGORY_WORD: re.compile(r'\w'),
+    _sre.CATEGORY_NOT_WORD: re.compile(r'\W')
+}
+
+# Anchors whose outcome differs between a segment and the whole text
+_TEXT_ANCHORS = {
+    _sre.AT_BEGINNING, _sre.AT_BEGINNING_STRING, _sre.AT_END, _sre.AT_END_STRING
+}
+
+
+def iter_segments(text: str, start: int = 0, end: int = None) -> Iterator[Tuple[int, int]]:
+    """Split text into segments ending at a sentence delimiter.
+
+    Args:
+        text: Text to split
+        start: Offset of the first segment
+        end: Offset at which splitting stops (defaults to len(text))
+
+    Returns:
+        Iterator of (start, end) offsets covering the text contiguously
+    """
+    end = len(text) if end is None else end
+    for match in _SEGMENT_RE.finditer(text, start, end):
+        yield match.span()
+
+
+def regex_crosses_segments(pattern: str) -> bool:
+    """Whether a regular expression may behave differently per segment.
+    
+    The check is conservative: it is True when the pattern can consume a
+    segment delimiter, and also for lookarounds, string anchors and any
+    construct it does not know, all of which may see past a segment.
+    
+    Args:
+        pattern: Regular expression
+        
+    Returns:
+        False only if every match lies within one segment
+    """
+    return _items_cross(_sre_parse.parse(pattern))
+
+
+def _items_cross(items) -> bool:
+    for op, av in items:
+        if op is _sre.LITERAL:
+            crosses = chr(av) in SEGMENT_DELIMITERS
+        elif op is _sre.NOT_LITERAL:
+            crosses = any(delimiter != chr(av) for delimiter in SEGMENT_DELIMITERS)
+        elif op is _sre.IN:
+            crosses = any(_class_contains(av, d) for d in SEGMENT_DELIMITERS)
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) or (
+                op is getattr(_sre, 'POSSESSIVE_REPEAT', None)):
+            crosses = _items_cross(av[2])
+        elif op is _sre.SUBPATTERN:
+            crosses = _items_cross(av[-1])
+        elif op is getattr(_sre, 'ATOMIC_GROUP', None):
+            crosses = _items_cross(av)
+        elif op is _sre.BRANCH:
+            crosses = any(_items_cross(branch) for branch in av[1])
+        elif op is _sre.GROUPREF_EXISTS:
+            crosses = any(_items_cross(branch) for branch in av[1:] if branch)
+        elif op is _sre.AT:
+            crosses = av in _TEXT_ANCHORS
+        elif op is _sre.GROUPREF:
+            # Repeats a group that has been checked already
+            crosses = False
+        else:
+            # ANY, lookarounds and anything unknown
+            crosses = True
+        if crosses:
+            return True
+    return False
+
+
+def _class_contains(items, char: str) -> bool:
+    negate, found = False, False
+    for op, av in items:
+        if op is _sre.NEGATE:
+            negate = True
+        elif op is _sre.LITERAL:
+            found |= chr(av) == char
+        elif op is _sre.RANGE:
+            found |= av[0] <= ord(char) <= av[1]
+        elif op is _sre.CATEGORY and av in _CATEGORIES:
+            found |= _CATEGORIES[av].match(char) is not None
+        else:
+            return True
+    return found != negate
+
+
+class SegmentMemo:
+    """Bounded LRU memo of per-segment analysis results with hit counters."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def cache_info(self) -> Dict:
+        """Return hit/miss counts, current size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,11 @@
+"""Performance benchmarks for ANAR.
+
+Run the scripts as modules from the repository root, e.g.::
+
+    python -m benchmarks.bench_stages
+    python -m benchmarks.bench_end_to_end --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_pattern_matcher
+    python -m benchmarks.bench_startup
+
+All inputs come from the deterministic generator in ``benchmarks.corpus``.
+"""
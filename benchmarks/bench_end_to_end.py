@@ -0,0 +1,92 @@
+"""End-to-end throughput and memory benchmark with baseline comparison.
+
+A synthetic corpus is processed with ANARSystem.process_text. Throughput
+is measured with memos and caches disabled, peak memory is measured on a
+separate pass under tracemalloc. Results are written as JSON; when a
+baseline file is given, any metric that regresses by more than the
+tolerance is reported and the script exits with status 1.
+
+Usage:
+    python -m benchmarks.bench_end_to_end [--documents N] [--size CHARS]
+        [--output FILE] [--baseline FILE] [--tolerance 0.2] [--save-baseline]
+"""
+import argparse
+import sys
+
+from anar import ANARSystem
+
+from .common import (
+    compare_to_baseline, load_json, peak_memory, save_json, timed
+)
+from .corpus import generate_corpus
+
+HIGHER_IS_BETTER = ('chars_per_second', 'documents_per_second')
+
+
+def run(texts, config):
+    system = ANARSystem(config)
+    try:
+        for text in texts:
+            system.process_text(text)
+    finally:
+        system.close()
+
+
+def measure(documents, size, seed=0):
+    texts = generate_corpus(documents, size, seed=seed)
+    config = {'segment_memo_size': 0}
+    chars = sum(map(len, texts))
+
+    run(texts[:1], config)  # warm up imports and pattern compilation
+    seconds, _ = timed(run, texts, config)
+    return {
+        'documents': documents,
+        'chars': chars,
+        'seconds': seconds,
+        'chars_per_second': chars / seconds,
+        'documents_per_second': documents / seconds,
+        'peak_memory_bytes': peak_memory(run, texts[:1], config),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--size', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='write the results to --baseline instead of comparing'
+    )
+    args = parser.parse_args(argv)
+
+    results = measure(args.documents, args.size, args.seed)
+    for name, value in results.items():
+        print(f'{name:>22} {value:14.4g}')
+
+    if args.output:
+        save_json(args.output, results)
+
+    if args.baseline and args.save_baseline:
+        save_json(args.baseline, results)
+        print(f'baseline written to {args.baseline}')
+    elif args.baseline:
+        failures = compare_to_baseline(
+            results,
+            {key: value for key, value in load_json(args.baseline).items()
+             if key not in ('documents', 'chars', 'seconds')},
+            args.tolerance,
+            HIGHER_IS_BETTER
+        )
+        for failure in failures:
+            print(f'REGRESSION {failure}', file=sys.stderr)
+        if failures:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Benchmark multi-pattern matching against the per-pattern regex loop.
+
+Usage:
+    python -m benchmarks.bench_pattern_matcher [--text-size N] [--sizes 10,100,...]
+"""
+import argparse
+import random
+import re
+
+from anar.utils.aho_corasick import AhoCorasick
+
+from .common import timed
+from .corpus import ARABIC_LETTERS
+
+
+def make_patterns(count, rng):
+    """Generate `count` distinct pseudo-Arabic phrases of one to three words."""
+    patterns = set()
+    while len(patterns) < count:
+        words = [
+            ''.join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(3, 6)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        patterns.add(' '.join(words))
+    return sorted(patterns)
+
+
+def make_text(size, patterns, rng, density=0.05):
+    """Generate a text of roughly `size` characters seeded with patterns."""
+    parts, length = [], 0
+    while length < size:
+        if rng.random() < density:
+            word = rng.choice(patterns)
+        else:
+            word = ''.join(
+                rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(2, 7))
+            )
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)
+
+
+def regex_loop(patterns, text):
+    return sum(
+        1 for pattern in patterns for _ in re.finditer(re.escape(pattern), text)
+    )
+
+
+def automaton(matcher, text):
+    return sum(1 for _ in matcher.iter_matches(text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--text-size', type=int, default=100_000)
+    parser.add_argument('--sizes', default='10,100,1000,10000,50000')
+    parser.add_argument(
+        '--regex-limit', type=int, default=10000,
+        help='skip the regex loop above this many patterns'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',')]
+    all_patterns = make_patterns(max(sizes), rng)
+
+    print(f"{'patterns':>9} {'compile':>9} {'automaton':>10} {'regex':>10} {'matches':>8}")
+    for size in sizes:
+        patterns = all_patterns[:size]
+        text = make_text(args.text_size, patterns, rng)
+
+        compile_time, matcher = timed(AhoCorasick, patterns)
+        scan_time, matches = timed(automaton, matcher, text)
+
+        if size <= args.regex_limit:
+            regex_time, _ = timed(regex_loop, patterns, text)
+            regex_col = f'{regex_time:10.3f}'
+        else:
+            regex_col = f"{'-':>10}"
+
+        print(f'{size:9d} {compile_time:9.3f} {scan_time:10.3f} {regex_col} {matches:8d}')
+
+
+if __name__ == '__main__':
+    main()
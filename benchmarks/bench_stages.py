@@ -0,0 +1,67 @@
+"""Microbenchmarks of the individual pipeline stages.
+
+Each stage is timed on its own, on the outputs of the previous stages,
+for a range of synthetic document sizes. Segment memos are disabled by
+default so repeated runs measure real work.
+
+Usage:
+    python -m benchmarks.bench_stages [--sizes 10000,100000] [--repeat N]
+        [--memo] [--output FILE]
+"""
+import argparse
+
+from anar.cultural_processor import CulturalProcessor
+from anar.graph_builder import GraphBuilder
+from anar.narrative_analyzer import NarrativeAnalyzer
+from anar.preprocessor import TextPreprocessor
+
+from .common import median_time, save_json
+from .corpus import generate_text
+
+STAGES = ('preprocess', 'narrative', 'cultural', 'graph')
+
+
+def bench_size(size, repeat, config, seed=0):
+    """Median seconds per stage for one generated document of ``size`` chars."""
+    text = generate_text(size, seed=seed)
+    preprocessor = TextPreprocessor(config)
+    narrative_analyzer = NarrativeAnalyzer(config)
+    cultural_processor = CulturalProcessor(config)
+    graph_builder = GraphBuilder(config)
+
+    processed = preprocessor.process(text)
+    narrative = narrative_analyzer.analyze(processed)
+    cultural = cultural_processor.process(processed)
+
+    return {
+        'preprocess': median_time(preprocessor.process, text, repeat=repeat),
+        'narrative': median_time(narrative_analyzer.analyze, processed, repeat=repeat),
+        'cultural': median_time(cultural_processor.process, processed, repeat=repeat),
+        'graph': median_time(
+            graph_builder.build_narrative_graph, narrative, cultural, repeat=repeat
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--memo', action='store_true', help='keep segment memos on')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args(argv)
+
+    config = {} if args.memo else {'segment_memo_size': 0}
+    results = {}
+    print(f"{'chars':>9} " + ' '.join(f'{stage:>11}' for stage in STAGES))
+    for size in (int(s) for s in args.sizes.split(',')):
+        timings = bench_size(size, args.repeat, config)
+        results[str(size)] = timings
+        print(f'{size:9d} ' + ' '.join(f'{timings[s] * 1000:9.2f}ms' for s in STAGES))
+
+    if args.output:
+        save_json(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
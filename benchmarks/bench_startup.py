@@ -0,0 +1,109 @@
+"""Benchmark the cost of ``import anar`` in a fresh interpreter.
+
+Each run starts a new Python process, so the numbers include interpreter
+startup; the bare interpreter is timed as well and subtracted. The script
+also checks that importing the package loads none of the heavy
+dependencies, and exits non-zero on a regression.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--max-ms MS]
+        [--baseline FILE] [--tolerance 0.25] [--save]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import load_json, save_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that `import anar` must not load
+HEAVY_MODULES = ('camel_tools', 'networkx', 'numpy', 'scipy')
+
+STATEMENTS = {
+    'interpreter': 'pass',
+    'import anar': 'import anar',
+    'import anar.system': 'import anar.system',
+}
+
+
+def time_statement(statement, runs):
+    """Median wall time in milliseconds of running `statement` in a new process."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=ROOT, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def loaded_heavy_modules():
+    """Names of heavy modules present in sys.modules after `import anar`."""
+    probe = (
+        'import anar, json, sys; '
+        f'print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', probe], cwd=ROOT, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument(
+        '--max-ms', type=float, default=None,
+        help='fail if `import anar` costs more than this over the bare interpreter'
+    )
+    parser.add_argument('--baseline', default=os.path.join(
+        ROOT, 'benchmarks', 'startup_baseline.json'
+    ))
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument(
+        '--save', action='store_true', help='write the results as the new baseline'
+    )
+    args = parser.parse_args(argv)
+
+    results = {name: time_statement(statement, args.runs)
+               for name, statement in STATEMENTS.items()}
+    base = results['interpreter']
+    for name, elapsed in results.items():
+        print(f'{name:>20} {elapsed:8.1f} ms  (+{elapsed - base:7.1f} ms)')
+
+    failures = []
+    heavy = loaded_heavy_modules()
+    if heavy:
+        failures.append(f"`import anar` loaded {', '.join(heavy)}")
+
+    import_cost = results['import anar'] - base
+    if args.max_ms is not None and import_cost > args.max_ms:
+        failures.append(f'`import anar` took {import_cost:.1f} ms > {args.max_ms} ms')
+
+    if args.save:
+        save_json(args.baseline, {'import_ms': import_cost})
+        print(f'baseline written to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        baseline = load_json(args.baseline)['import_ms']
+        # Sub-millisecond baselines are noise; allow a small absolute slack
+        limit = baseline * (1 + args.tolerance) + 5.0
+        if import_cost > limit:
+            failures.append(
+                f'`import anar` took {import_cost:.1f} ms, baseline {baseline:.1f} ms'
+            )
+    else:
+        print(f'no baseline at {args.baseline}, skipping the regression check '
+              f'(run with --save to create one)')
+
+    for failure in failures:
+        print(f'REGRESSION: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Timing, memory and baseline helpers shared by the benchmark scripts."""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+
+def timed(func: Callable, *args):
+    """Run ``func(*args)`` once and return (seconds, result)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def median_time(func: Callable, *args, repeat: int = 5) -> float:
+    """Median wall time in seconds of ``repeat`` calls of ``func(*args)``."""
+    return statistics.median(timed(func, *args)[0] for _ in range(repeat))
+
+
+def peak_memory(func: Callable, *args) -> int:
+    """Peak bytes allocated by Python objects during ``func(*args)``."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_json(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: Dict):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float,
+    higher_is_better: Tuple[str, ...] = ()
+) -> List[str]:
+    """List metrics that regressed by more than ``tolerance`` (a fraction).
+
+    Args:
+        results: Current metric values
+        baseline: Stored metric values
+        tolerance: Allowed relative regression, e.g. 0.2 for 20%
+        higher_is_better: Metrics where a decrease is a regression;
+            for all others an increase is
+
+    Returns:
+        One message per regressed metric
+    """
+    failures = []
+    for name, expected in baseline.items():
+        if name not in results or not expected:
+            continue
+        actual = results[name]
+        if name in higher_is_better:
+            regressed = actual < expected * (1 - tolerance)
+        else:
+            regressed = actual > expected * (1 + tolerance)
+        if regressed:
+            change = (actual - expected) / expected * 100
+            failures.append(
+                f'{name}: {actual:.4g} vs baseline {expected:.4g} ({change:+.1f}%)'
+            )
+    return failures
@@ -0,0 +1,127 @@
+"""Deterministic synthetic Classical Arabic corpus for benchmarks.
+
+Texts are built from filler sentences into which instances of the
+package's own pattern tables are inserted: frame markers, character and
+event mentions, preprocessor cultural markers and CulturalProcessor
+patterns. The same arguments always produce the same text.
+"""
+import random
+import re
+from typing import Dict, List
+
+from anar.cultural_processor import CulturalProcessor
+from anar.narrative_analyzer import CHARACTER_PATTERNS, EVENT_PATTERNS
+from anar.preprocessor import CULTURAL_MARKER_PATTERNS, FRAME_PATTERNS
+
+ARABIC_LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+
+NAMES = ['شهريار', 'شاه زمان', 'جعفر', 'سعيد', 'علي', 'حسن', 'نور الدين',
+         'قمر الزمان', 'السندباد', 'أبي الحسن']
+
+FILLER_WORDS = ['كان', 'في', 'مدينة', 'بغداد', 'رجل', 'من', 'الناس', 'له',
+                'مال', 'كثير', 'وأولاد', 'فخرج', 'يوما', 'إلى', 'السوق',
+                'فرأى', 'شيخا', 'جالسا', 'على', 'باب', 'الدار', 'فسلم', 'عليه',
+                'وقال', 'يا', 'سيدي', 'هذه', 'حكاية', 'عجيبة']
+
+
+def _filler(rng: random.Random, low: int = 2, high: int = 5) -> str:
+    return ' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(low, high)))
+
+
+def instantiate(pattern: str, rng: random.Random) -> str:
+    """Produce a concrete string matched by one of the package's patterns.
+
+    Only the regex constructs used in the pattern tables are supported:
+    the optional article class, ``\\s+``, ``\\w+`` and ``[^،.]+``.
+
+    Args:
+        pattern: Regex from a pattern table, or a literal phrase
+        rng: Random source
+
+    Returns:
+        A string containing a match of the pattern
+    """
+    text = pattern.replace('[الـ]?', 'ال').replace(r'\s+', ' ')
+    text = text.replace(r'\w+', '\0name\0').replace('[^،.]+', '\0filler\0')
+    return re.sub(
+        '\0(name|filler)\0',
+        lambda m: rng.choice(NAMES).split()[0] if m.group(1) == 'name' else _filler(rng),
+        text
+    )
+
+
+def pattern_pools() -> Dict[str, List[str]]:
+    """Group every pattern the pipeline detects by the kind of marker."""
+    cultural = CulturalProcessor().cultural_patterns
+    return {
+        'frame': list(FRAME_PATTERNS),
+        'character': list(CHARACTER_PATTERNS),
+        'event': list(EVENT_PATTERNS),
+        'cultural_marker': [
+            pattern for patterns in CULTURAL_MARKER_PATTERNS.values()
+            for pattern in patterns
+        ],
+        'cultural': [
+            pattern for patterns in cultural.values() for pattern in patterns
+        ]
+    }
+
+
+def generate_text(
+    size: int,
+    density: float = 0.3,
+    frame_density: float = 0.05,
+    seed: int = 0
+) -> str:
+    """Generate a synthetic narrative text.
+
+    Args:
+        size: Approximate length in characters
+        density: Probability that a sentence carries a character, event
+            or cultural marker
+        frame_density: Probability that a sentence opens with a frame marker
+        seed: Random seed
+
+    Returns:
+        Text of at least ``size`` characters made of whole sentences
+    """
+    rng = random.Random(seed)
+    pools = pattern_pools()
+    kinds = ['character', 'event', 'cultural_marker', 'cultural']
+
+    sentences, length = [], 0
+    while length < size:
+        parts = []
+        if rng.random() < frame_density:
+            parts.append(instantiate(rng.choice(pools['frame']), rng) + ':')
+        parts.append(_filler(rng))
+        if rng.random() < density:
+            kind = rng.choice(kinds)
+            parts.append(instantiate(rng.choice(pools[kind]), rng))
+            if kind == 'cultural':
+                # Social context lets the cultural validator accept matches
+                parts.append('أمام الملك')
+        sentence = ' '.join(parts) + rng.choice('.،')
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def generate_corpus(
+    documents: int,
+    size: int,
+    seed: int = 0,
+    **kwargs
+) -> List[str]:
+    """Generate ``documents`` texts with consecutive seeds.
+
+    Args:
+        documents: Number of texts
+        size: Approximate length of each text
+        seed: Seed of the first text
+        **kwargs: Passed on to generate_text
+
+    Returns:
+        List of texts
+    """
+    return [generate_text(size, seed=seed + i, **kwargs) for i in range(documents)]
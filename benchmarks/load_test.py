@@ -0,0 +1,109 @@
+"""Local load test of the asyncio service API.
+
+For each concurrency level, ``concurrency`` client tasks send requests
+back to back through one AsyncANARSystem until ``requests`` documents are
+done. The script reports p50/p99 latency, throughput and the number of
+timed out or rejected requests.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,4,16,64] [--requests N]
+        [--size CHARS] [--workers N] [--max-queue N] [--timeout S]
+        [--reject] [--output FILE]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from anar.aio import AsyncANARSystem, OverloadedError
+
+from .common import save_json
+from .corpus import generate_corpus
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_level(anar, texts, concurrency, requests, timeout):
+    latencies, failures = [], {'timeout': 0, 'rejected': 0}
+    next_request = iter(range(requests))
+
+    async def client():
+        for index in next_request:
+            start = time.perf_counter()
+            try:
+                await anar.process_text(texts[index % len(texts)], timeout=timeout)
+            except asyncio.TimeoutError:
+                failures['timeout'] += 1
+                continue
+            except OverloadedError:
+                failures['rejected'] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'completed': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else None,
+        'throughput_rps': len(latencies) / elapsed,
+        **failures
+    }
+
+
+async def main_async(args):
+    texts = generate_corpus(args.documents, args.size)
+    results = []
+    async with AsyncANARSystem(
+        workers=args.workers,
+        max_queue=args.max_queue,
+        reject_when_full=args.reject
+    ) as anar:
+        # Start the workers and compile their patterns before measuring
+        await asyncio.gather(*(anar.process_text(t) for t in texts[:anar.workers]))
+
+        print(f"{'conc':>5} {'done':>6} {'p50 ms':>9} {'p99 ms':>9} "
+              f"{'req/s':>8} {'timeout':>8} {'reject':>7}")
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            level = await run_level(
+                anar, texts, concurrency, args.requests, args.timeout
+            )
+            results.append(level)
+            p50 = f"{level['p50_ms']:9.1f}" if level['p50_ms'] is not None else f"{'-':>9}"
+            p99 = f"{level['p99_ms']:9.1f}" if level['p99_ms'] is not None else f"{'-':>9}"
+            print(f"{concurrency:5d} {level['completed']:6d} {p50} {p99} "
+                  f"{level['throughput_rps']:8.1f} {level['timeout']:8d} "
+                  f"{level['rejected']:7d}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', default='1,4,16,64')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--size', type=int, default=20_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-queue', type=int, default=64)
+    parser.add_argument('--timeout', type=float, default=None)
+    parser.add_argument('--reject', action='store_true',
+                        help='reject requests when the queue is full')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        save_json(args.output, {'levels': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,12 @@
-from anar import ANARSystem
+from anar import ANARSystem, CorpusReader
 
 def analyze_sindbad():
     """Example analysis of a Sindbad story."""
-    # Load sample text
-    with open('examples/sample_texts/sindbad.txt', 'r', encoding='utf-8') as f:
-        text = f.read()
-        
     # Initialize system
     anar = ANARSystem()
     
-    # Process text
-    result = anar.process_text(text)
+    # Process the sample text, read through a memory map
+    result = anar.process_file('examples/sample_texts/sindbad.txt')
     
     # Print narrative structure
     print("=== Narrative Structure ===")
@@ -32,7 +28,21 @@ def analyze_sindbad():
     for char1 in char_graph.nodes():
         for char2 in char_graph.neighbors(char1):
             print(f"{char1} <-> {char2}")
+            
+def analyze_corpus(directory='examples/sample_texts'):
+    """Example analysis of every text file in a directory."""
+    anar = ANARSystem()
+    
+    # Files are read by the workers themselves; very large files are streamed
+    print("\n=== Corpus ===")
+    for path, result in CorpusReader(directory).process(anar, workers=2):
+        if isinstance(result, dict):
+            patterns = result['cultural_analysis']['patterns']
+        else:
+            patterns = [r for r in result if r['kind'] == 'cultural_pattern']
+        print(f"{path}: {len(patterns)} cultural patterns")
 
 if __name__ == "__main__":
     analyze_sindbad()
+    analyze_corpus()
 
@@ -5,12 +5,14 @@ setup(
     name="anar",
     version="0.1.0",
     packages=find_packages(),
+    package_data={'anar': ['data/*.json']},
     install_requires=[
         'torch>=1.9.0',
         'transformers>=4.15.0',
         'camel-tools>=1.2.0',
         'networkx>=2.6.3',
         'numpy>=1.19.5',
+        'scipy>=1.5.0',
         'pandas>=1.3.3',
         'scikit-learn>=0.24.2',
         'arabic-reshaper>=2.1.3',
@@ -0,0 +1,51 @@
+import random
+import re
+import unittest
+from anar.cultural_processor import CulturalProcessor
+from anar.utils.aho_corasick import AhoCorasick
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_overlapping_patterns(self):
+        matcher = AhoCorasick(['في الأرض', 'الأرض', 'ضرب في'])
+        matches = matcher.findall("ضرب في الأرض")
+        
+        self.assertEqual(
+            [(m[0], m[1], matcher.patterns[m[2]]) for m in matches],
+            [(0, 6, 'ضرب في'), (4, 12, 'في الأرض'), (7, 12, 'الأرض')]
+        )
+        
+    def test_matches_regex_reference(self):
+        rng = random.Random(7)
+        alphabet = 'ابت '
+        patterns = list({
+            ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            for _ in range(30)
+        })
+        text = ''.join(rng.choice(alphabet) for _ in range(2000))
+        matcher = AhoCorasick(patterns)
+        
+        found = set(matcher.iter_matches(text))
+        expected = {
+            (m.start(), m.start() + len(p), i)
+            for i, p in enumerate(patterns)
+            for m in re.finditer('(?=%s)' % re.escape(p), text)
+        }
+        
+        self.assertEqual(found, expected)
+        
+    def test_cultural_processor_records_unchanged(self):
+        processor = CulturalProcessor()
+        text = "ضرب في الأرض ثم ضرب في الأرض في عهد هارون الرشيد"
+        
+        expected = []
+        for category, patterns in processor.cultural_patterns.items():
+            for pattern, info in patterns.items():
+                for match in re.finditer(re.escape(pattern), text):
+                    expected.append((category, pattern, match.start()))
+                    
+        detected = processor._detect_patterns(text)
+        
+        self.assertEqual(
+            sorted((d['category'], d['pattern'], d['position']) for d in detected),
+            sorted(expected)
+        )
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from anar import ANARSystem
+from anar.aio import AsyncANARSystem, OverloadedError
+
+class TestAsyncANARSystem(unittest.TestCase):
+    def setUp(self):
+        self.text = "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد"
+        
+    def test_results_match_sync_pipeline(self):
+        async def main():
+            async with AsyncANARSystem(workers=2) as anar:
+                results = await asyncio.gather(
+                    *(anar.process_text(self.text) for _ in range(4))
+                )
+                return results, anar.stats()
+                
+        results, stats = asyncio.run(main())
+        
+        expected = ANARSystem().process_text(self.text)['processed_text']
+        self.assertTrue(all(r['processed_text'] == expected for r in results))
+        self.assertEqual(stats['completed'], 4)
+        self.assertEqual(stats['in_flight'], 0)
+        
+    def test_timeout_and_rejection(self):
+        async def main():
+            async with AsyncANARSystem(
+                workers=1, max_queue=0, reject_when_full=True
+            ) as anar:
+                slow = asyncio.ensure_future(
+                    anar.process_text(self.text * 2000, timeout=0.001)
+                )
+                await asyncio.sleep(0)
+                with self.assertRaises(OverloadedError):
+                    await anar.process_text(self.text)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await slow
+                return anar.stats()
+                
+        stats = asyncio.run(main())
+        
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['timed_out'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
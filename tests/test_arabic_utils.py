@@ -0,0 +1,83 @@
+import random
+import unittest
+from anar.preprocessor import TextPreprocessor
+from anar.utils.arabic_utils import TokenSpans, normalize_arabic
+
+try:
+    from camel_tools.tokenizers.word import simple_word_tokenize
+    from camel_tools.utils.normalize import normalize_unicode
+except ImportError:
+    simple_word_tokenize = normalize_unicode = None
+
+SAMPLES = [
+    "قالت شهرزاد: بلغني أيها الملك السعيد، أن التاجر سافر.",
+    "قالَ الملِكُ: يا وزيرُ!",
+    "ضربـــــ في الأرض (بين حانا ومانا) «حكاية» ١٢٣ و456",
+    "ﷺ ﷲ ﷽ ﷼ ﻻ ﻹ ﺍﻟﻤﻠﻚ",
+    "tab\there\nnew line\u00a0nbsp\u2003em\u200cزwnj",
+    "...؟؛،!—–-\"'[]{}<>/\\|@#$%^&*_+=~`",
+    "الملك ١٠٠١ ليلة وليلة 3.14 ٣٫١٤ Ⅻ ² ½",
+    "",
+    "   ",
+]
+
+# Characters the fuzz test draws from: Arabic letters, diacritics,
+# presentation forms, digits, punctuation, symbols and whitespace
+FUZZ_ALPHABET = (
+    "ابتثجحخدذرزسشصضطظعغفقكلمنهويءآأإؤئةى" "ًٌٍَُِّْـ"
+    "ﻻﻹﺍﻟﻤﻚﷲﷺﷻ﷼﷽" "0123456789٠١٢٣٤٥٦٧٨٩" "abcXYZ"
+    ".,:;!?()«»،؛؟-_/*#%$&+=<>|~^`'\"" "²½Ⅻﬁ" "  \t\n\u00a0\u2003\u200c\u200d"
+)
+
+@unittest.skipIf(normalize_unicode is None, "camel_tools is not installed")
+class TestBuiltinNormalizerEquivalence(unittest.TestCase):
+    def assertEquivalent(self, text):
+        normalized = normalize_unicode(text)
+        self.assertEqual(normalize_arabic(text), normalized)
+        self.assertEqual(list(TokenSpans.tokenize(normalized)), simple_word_tokenize(normalized))
+
+    def test_samples(self):
+        for text in SAMPLES:
+            with self.subTest(text=text):
+                self.assertEquivalent(text)
+
+    def test_random_texts(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            text = ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 60)))
+            with self.subTest(text=text):
+                self.assertEquivalent(text)
+
+    def test_preprocessor_output(self):
+        text = ' '.join(SAMPLES) * 3
+        for memo_size in (4096, 0):
+            camel = TextPreprocessor({'segment_memo_size': memo_size}).process(text)
+            builtin = TextPreprocessor({
+                'normalizer': 'builtin', 'segment_memo_size': memo_size
+            }).process(text)
+            self.assertIsInstance(builtin['tokens'], TokenSpans)
+            self.assertEqual(builtin, camel)
+
+class TestBuiltinNormalizer(unittest.TestCase):
+    def test_normalized_text_is_not_copied(self):
+        text = "قال الملك: يا وزير"
+        self.assertIs(normalize_arabic(text), text)
+        self.assertEqual(normalize_arabic("ﻻ"), "لا")
+
+    def test_token_spans(self):
+        text = "قال الملك، ثم سكت."
+        tokens = TokenSpans.tokenize(text)
+        self.assertEqual(tokens, ['قال', 'الملك', '،', 'ثم', 'سكت', '.'])
+        self.assertEqual(tokens.starts.tolist(), [0, 4, 9, 11, 14, 17])
+        self.assertEqual(tokens[1:3], ['الملك', '،'])
+        self.assertEqual(tokens[-1], '.')
+
+        joined = TokenSpans.join(text + text, [tokens, tokens], [0, len(text)])
+        self.assertEqual(list(joined), list(tokens) * 2)
+
+    def test_unknown_normalizer(self):
+        with self.assertRaises(ValueError):
+            TextPreprocessor({'normalizer': 'icu'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import random
+import re
+import unittest
+from benchmarks.corpus import generate_text, instantiate, pattern_pools
+
+class TestBenchmarkCorpus(unittest.TestCase):
+    def test_instances_match_their_patterns(self):
+        rng = random.Random(0)
+        for kind, patterns in pattern_pools().items():
+            for pattern in patterns:
+                self.assertRegex(instantiate(pattern, rng), pattern, kind)
+                
+    def test_generation_is_deterministic(self):
+        text = generate_text(5000, seed=3)
+        
+        self.assertEqual(text, generate_text(5000, seed=3))
+        self.assertNotEqual(text, generate_text(5000, seed=4))
+        self.assertGreaterEqual(len(text), 5000)
+        self.assertTrue(re.search('قالت شهرزاد|حكى أن', text))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar.cache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'results.sqlite')
+        self.text = "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد"
+        
+    def tearDown(self):
+        self.tmp.cleanup()
+        
+    def test_repeated_document_is_served_from_cache(self):
+        anar = ANARSystem({'cache_path': self.path})
+        first = anar.process_text(self.text)
+        second = ANARSystem({'cache_path': self.path}).process_text(self.text)
+        
+        self.assertEqual(anar.cache.stats()['entries'], 1)
+        self.assertEqual(
+            first['processed_text']['frame_markers'],
+            second['processed_text']['frame_markers']
+        )
+        self.assertEqual(
+            [p['pattern'] for p in second['cultural_analysis']['patterns']],
+            ['في عهد هارون الرشيد']
+        )
+        
+    def test_pattern_edit_changes_fingerprint(self):
+        anar = ANARSystem()
+        before = anar.fingerprint()
+        anar.cultural_processor.cultural_patterns['idiomatic']['يضرب أخماساً في أسداس'] = {
+            'meaning': 'to be perplexed',
+            'context': 'difficulty'
+        }
+        
+        self.assertNotEqual(before, anar.fingerprint())
+        self.assertEqual(before, ANARSystem({'stage_executor': 'thread'}).fingerprint())
+        
+    def test_pattern_edit_is_not_served_stale(self):
+        anar = ANARSystem({'cache_path': self.path})
+        text = self.text + " وكان يضرب أخماساً في أسداس من الحيرة"
+        before = anar.process_text(text)['cultural_analysis']['patterns']
+        anar.cultural_processor.cultural_patterns['idiomatic']['من الحيرة'] = {
+            'meaning': 'confusion', 'context': 'أسداس'
+        }
+        after = anar.process_text(text)['cultural_analysis']['patterns']
+        
+        self.assertNotIn('من الحيرة', [p['pattern'] for p in before])
+        self.assertIn('من الحيرة', [p['pattern'] for p in after])
+        self.assertEqual(anar.cultural_processor.patterns_digest(),
+                         anar.cultural_processor._compiled.digest)
+        self.assertEqual(anar.cache.stats()['entries'], 2)
+        
+    def test_lru_eviction(self):
+        cache = ResultCache(self.path, max_bytes=300)
+        cache.put('a', os.urandom(100))
+        cache.put('b', os.urandom(100))
+        cache.get('a')
+        cache.put('c', os.urandom(100))
+        
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        cache.close()
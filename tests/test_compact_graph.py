@@ -0,0 +1,63 @@
+import pickle
+import unittest
+import networkx as nx
+from anar.compact_graph import CompactGraph, CompactGraphBuilder
+from anar.spans import NarrativeElement
+
+class TestCompactGraph(unittest.TestCase):
+    def setUp(self):
+        self.doc = "قالت شهرزاد: كان الملك شهريار ثم خرج"
+        self.elements = [
+            NarrativeElement(self.doc, kind, self.doc.index(text),
+                             self.doc.index(text) + len(text))
+            for kind, text in (('frame', 'قالت شهرزاد'),
+                               ('character', 'الملك شهريار'),
+                               ('event', 'ثم خرج'))
+        ]
+        
+    def test_chain_matches_networkx_view(self):
+        graph = CompactGraph.chain(
+            self.doc, self.elements, {'character': ('type', 'text')}
+        )
+        view = graph.to_networkx()
+        
+        self.assertEqual(list(graph), ['frame_0', 'character_1', 'event_2'])
+        self.assertEqual(list(view.edges), [('frame_0', 'character_1'),
+                                            ('character_1', 'event_2')])
+        self.assertEqual(view.nodes['character_1'],
+                         {'type': 'character', 'text': 'الملك شهريار'})
+        self.assertEqual(graph.successors_of(2).tolist(), [])
+        self.assertIs(graph.nodes, view.nodes)
+        
+    def test_networkx_algorithms(self):
+        graph = CompactGraph.chain(self.doc, self.elements, {})
+        view = graph.to_networkx(cache=False)
+        
+        self.assertEqual(nx.number_weakly_connected_components(graph), 1)
+        self.assertEqual(nx.shortest_path_length(graph, 'frame_0'),
+                         {'frame_0': 0, 'character_1': 1, 'event_2': 2})
+        self.assertEqual(list(nx.topological_sort(graph)), list(nx.topological_sort(view)))
+        self.assertEqual(nx.pagerank(graph), nx.pagerank(view))
+        self.assertTrue(nx.is_isomorphic(graph, view))
+        self.assertIsInstance(graph.to_networkx(), nx.DiGraph)
+        
+    def test_builder_extra_attributes_and_pickle(self):
+        builder = CompactGraphBuilder(self.doc, {'story': ('type',)})
+        story = builder.add_node('story', 0, len(self.doc), frame='قالت شهرزاد')
+        event = builder.add_node('event', 0, 4)
+        builder.add_edge(story, event)
+        graph = pickle.loads(pickle.dumps(builder.build()))
+        
+        self.assertEqual(graph.number_of_edges(), 1)
+        self.assertEqual(dict(graph.nodes(data=True))['story_0'],
+                         {'type': 'story', 'frame': 'قالت شهرزاد'})
+        self.assertTrue(graph.has_edge('story_0', 'event_1'))
+        
+    def test_empty_graph(self):
+        graph = CompactGraphBuilder('', {}).build()
+        
+        self.assertEqual(len(graph), 0)
+        self.assertEqual(graph.to_networkx().number_of_nodes(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from anar.cooccurrence import CooccurrenceEngine
+
+def story(*names):
+    return {'elements': [
+        {'type': 'character', 'text': name, 'position': 0} for name in names
+    ]}
+
+class TestCooccurrenceEngine(unittest.TestCase):
+    def test_story_weights(self):
+        stories = [
+            story('الملك شهريار', 'الوزير جعفر', 'الملك شهريار'),
+            story('الملك شهريار', 'الوزير جعفر'),
+            story('التاجر علي'),
+        ]
+        
+        binary = CooccurrenceEngine().from_stories(stories).to_networkx()
+        counts = CooccurrenceEngine(weighting='count').from_stories(stories)
+        counts = counts.to_networkx()
+        
+        self.assertEqual(set(binary.nodes), {'الملك شهريار', 'الوزير جعفر', 'التاجر علي'})
+        self.assertEqual(binary['الملك شهريار']['الوزير جعفر']['weight'], 2)
+        self.assertEqual(counts['الملك شهريار']['الوزير جعفر']['weight'], 3)
+        self.assertEqual(binary.number_of_edges(), 1)
+        
+    def test_window_weights(self):
+        names = ['أ', 'ب', 'أ', 'ج']
+        tokens = [0, 2, 3, 20]
+        
+        graph = CooccurrenceEngine(mode='window', window=3).from_mentions(
+            names, tokens
+        ).to_networkx()
+        
+        self.assertEqual(graph['أ']['ب']['weight'], 2)
+        self.assertNotIn('ج', graph['أ'])
+        self.assertFalse(graph.has_edge('أ', 'أ'))
+        
+    def test_document_window_uses_token_distance(self):
+        text = 'الملك شهريار قال للوزير جعفر كلاما كثيرا جدا ثم التاجر علي'
+        mentions = [
+            {'type': 'character', 'text': name, 'position': text.index(anchor)}
+            for name, anchor in (('الملك شهريار', 'الملك'),
+                                 ('الوزير جعفر', 'للوزير'),
+                                 ('التاجر علي', 'التاجر'))
+        ]
+        
+        graph = CooccurrenceEngine(mode='window', window=3).from_document(
+            text, mentions, []
+        ).to_networkx()
+        
+        self.assertTrue(graph.has_edge('الملك شهريار', 'الوزير جعفر'))
+        self.assertFalse(graph.has_edge('الوزير جعفر', 'التاجر علي'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from anar import ANARSystem
+
+class TestCorpusProcessing(unittest.TestCase):
+    def setUp(self):
+        self.anar = ANARSystem()
+        self.texts = [
+            "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد",
+            "حكى أن التاجر سعيد ضرب في الأرض",
+            "وأدرك شهرزاد الصباح فسكتت عن الكلام المباح",
+        ] * 3
+        
+    def test_sequential_matches_process_text(self):
+        results = list(self.anar.process_corpus(self.texts))
+        
+        self.assertEqual(len(results), len(self.texts))
+        self.assertEqual(
+            results[1]['processed_text'],
+            self.anar.process_text(self.texts[1])['processed_text']
+        )
+        
+    def test_process_pool(self):
+        ordered = list(self.anar.process_corpus(self.texts, workers=2, chunksize=2))
+        unordered = dict(self.anar.process_corpus(
+            self.texts, workers=2, ordered=False
+        ))
+        
+        self.assertEqual(
+            [r['processed_text'] for r in ordered],
+            [unordered[i]['processed_text'] for i in range(len(self.texts))]
+        )
+        self.assertEqual(
+            ordered[0]['processed_text']['frame_markers'],
+            [("قالت شهرزاد", 0)]
+        )
@@ -0,0 +1,92 @@
+import os
+import pickle
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar.corpus_index import (
+    And, Category, Character, CorpusIndex, Frame, Near, Not, Pattern, Query,
+    SameSegment, Term, Within
+)
+
+DOCUMENTS = {
+    'vizier': ("قالت شهرزاد: في عهد هارون الرشيد خرج الوزير جعفر إلى السوق، "
+               "ثم قال كلامًا بين حانا ومانا."),
+    'merchant': "حكى أن التاجر سعيد سافر في عهد هارون الرشيد إلى بغداد.",
+    'king': "كان الملك شهريار جالسًا في قصره ثم نادى الوزير جعفر."
+}
+
+class TestCorpusIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        system = ANARSystem()
+        cls.results = {key: system.process_text(text) for key, text in DOCUMENTS.items()}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = CorpusIndex(os.path.join(self.directory.name, 'index.db'))
+        self.index.add_all(self.results.items())
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def character_name(self, fragment):
+        for result in self.results.values():
+            graph = result['narrative_analysis']['narrative_graph']
+            for node in range(graph.number_of_nodes()):
+                if graph.kind(node) == 'character':
+                    text = graph.doc[graph.starts[node]:graph.ends[node]]
+                    if fragment in text:
+                        return text
+        self.fail(f"no character containing {fragment}")
+
+    def test_boolean_queries(self):
+        harun = Pattern('في عهد هارون الرشيد')
+        self.assertEqual(self.index.search(harun), ['vizier', 'merchant'])
+        self.assertEqual(self.index.search(Category('historical')), ['vizier', 'merchant'])
+        vizier = Character(self.character_name('جعفر'))
+        self.assertEqual(self.index.search(vizier & harun), ['vizier'])
+        self.assertEqual(self.index.search(And(vizier, Not(harun))), ['king'])
+        self.assertEqual(self.index.search(~vizier), ['merchant'])
+        self.assertEqual(self.index.search(vizier | harun), ['vizier', 'merchant', 'king'])
+
+    def test_proximity_and_containment(self):
+        vizier = Character(self.character_name('جعفر'))
+        harun = Pattern('في عهد هارون الرشيد')
+        self.assertEqual(self.index.search(Near(vizier, harun, distance=5)), ['vizier'])
+        self.assertEqual(self.index.search(Near(vizier, harun, distance=5, ordered=True)), [])
+        self.assertEqual(self.index.search(Near(harun, vizier, distance=5, ordered=True)),
+                         ['vizier'])
+        self.assertEqual(self.index.search(Within(vizier, Frame('قالت شهرزاد'))), ['vizier'])
+        self.assertEqual(self.index.search(SameSegment(vizier, harun)), ['vizier'])
+
+        text = DOCUMENTS['vizier']
+        key, start, end = self.index.matches(Within(vizier, Frame('قالت شهرزاد')))[0]
+        self.assertEqual(text[start:end], self.character_name('جعفر'))
+
+    def test_prefix_terms(self):
+        fragment = self.character_name('جعفر').split()[0]
+        self.assertEqual(self.index.search(Character(fragment, prefix=True)),
+                         ['vizier', 'king'])
+
+    def test_incremental_updates_persist(self):
+        harun = Pattern('في عهد هارون الرشيد')
+        self.index.add_result('merchant', self.results['king'])
+        self.assertEqual(self.index.search(harun), ['vizier'])
+        self.assertTrue(self.index.remove('vizier'))
+        self.assertFalse(self.index.remove('vizier'))
+
+        reopened = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(reopened.search(harun), [])
+        self.assertEqual(reopened.stats()['documents'], 2)
+        reopened.close()
+
+    def test_query_classes(self):
+        self.assertIsInstance(Pattern('في عهد هارون الرشيد'), Term)
+        self.assertEqual((Character('جعفر', prefix=True).kind, Frame('حكى أن').value),
+                         ('character', 'حكى أن'))
+        with self.assertRaises(TypeError):
+            Query()
+
+if __name__ == '__main__':
+    unittest.main()
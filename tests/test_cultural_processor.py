@@ -37,3 +37,34 @@ class TestCulturalProcessor(unittest.TestCase):
         self.assertTrue(len(contexts['temporal']) > 0)
         self.assertTrue(len(contexts['social']) > 0)
 
+    def test_batch_scoring_matches_per_pattern(self):
+        text = ("في عهد هارون الرشيد قبّل الأرض بين يديه الوزير ثم "
+                "ضرب في الأرض travel_narrative بين حانا ومانا. " * 5 +
+                " " * 60 + "قبّل الأرض بين يديه")
+        patterns = self.processor._detect_patterns(text)
+        
+        expected = [self.processor._calculate_confidence(p) for p in patterns]
+        scores = self.processor._score_patterns(text, patterns)
+        
+        self.assertEqual(scores.tolist(), expected)
+        self.assertEqual(expected[-1], 0.5)
+        self.assertIn(1.0, expected)
+        
+    def test_edited_patterns_are_matched(self):
+        text = "كان ذلك في زمن المأمون في عهد الخليفة"
+        self.assertEqual(self.processor.process({'normalized_text': text})['patterns'], [])
+        
+        self.processor.cultural_patterns['historical']['في زمن المأمون'] = {
+            'period': 'Abbasid', 'year_range': [813, 833]
+        }
+        result = self.processor.process({'normalized_text': text})
+        self.assertEqual([p['pattern'] for p in result['patterns']], ['في زمن المأمون'])
+        self.assertEqual(result['contexts']['temporal'][0]['years'], (813, 833))
+        self.assertEqual(len(self.processor.tables.pattern_table), 4)
+        
+        del self.processor.cultural_patterns['historical']['في زمن المأمون']
+        self.assertEqual(self.processor.process({'normalized_text': text})['patterns'], [])
+        
+        self.processor.cultural_patterns['idiomatic']['ضرب أخماساً'] = {'meaning': 'perplexed'}
+        with self.assertRaisesRegex(ValueError, 'lacks context'):
+            self.processor.process({'normalized_text': text})
@@ -0,0 +1,89 @@
+import codecs
+import os
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar.file_reader import CorpusReader, MappedTextFile, utf8_boundary
+
+class TestFileReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.anar = ANARSystem()
+        night = ("قالت شهرزاد: بلغني أن الملك شهريار في عهد هارون الرشيد "
+                 "قبّل الأرض بين يديه الوزير جعفر ثم خرج التاجر سعيد إلى السوق. "
+                 "حكى أن التاجر علي ضرب في الأرض بين حانا ومانا، 🌙 "
+                 "وأدرك شهرزاد الصباح فسكتت عن الكلام المباح. ")
+        self.text = night * 10
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text, bom=False):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write((codecs.BOM_UTF8 if bom else b'') + text.encode('utf-8'))
+        return path
+
+    def test_windows_end_on_character_boundaries(self):
+        encoded = 'قال🌙'.encode('utf-8')
+        self.assertEqual([utf8_boundary(encoded, i) for i in range(len(encoded) + 1)],
+                         [0, 0, 2, 2, 4, 4, 6, 6, 6, 6, 10])
+
+        path = self.write('night.txt', self.text, bom=True)
+        for window in (1, 5, 7, 4096):
+            with MappedTextFile(path, window) as f:
+                self.assertEqual(''.join(f.windows()), self.text)
+                self.assertEqual(f.read(), self.text)
+        with MappedTextFile(self.write('empty.txt', '')) as f:
+            self.assertEqual((f.read(), list(f.windows())), ('', []))
+
+    def test_line_endings_are_translated(self):
+        lines = self.text.split('. ')
+        crlf = self.write('crlf.txt', '\r\n'.join(lines) + '\r\n', bom=True)
+        cr = self.write('cr.txt', '\r'.join(lines) + '\r')
+        expected = '\n'.join(lines) + '\n'
+        for path in (crlf, cr):
+            with MappedTextFile(path) as f:
+                self.assertEqual(f.read(), expected)
+            # Small windows split '\r\n' pairs between two windows
+            for window in (1, 2, 5, 7, 4096):
+                with MappedTextFile(path, window) as f:
+                    self.assertEqual(''.join(f.windows()), expected)
+        
+        with open(crlf, encoding='utf-8-sig') as f:
+            self.assertEqual(
+                self.anar.process_file(crlf)['processed_text'],
+                self.anar.process_text(f.read())['processed_text']
+            )
+        
+    def test_process_file(self):
+        path = self.write('night.txt', self.text)
+        self.assertEqual(
+            self.anar.process_file(path)['processed_text'],
+            self.anar.process_text(self.text)['processed_text']
+        )
+
+        streamed = ANARSystem({'file_window': 333}).process_file(path, stream=True)
+        self.assertEqual(list(streamed), list(self.anar.process_stream([self.text])))
+
+    def test_corpus_reader(self):
+        texts = {'b.txt': self.text, 'a/c.txt': 'حكى أن التاجر سعيد ضرب في الأرض',
+                 'a/d.txt': 'قالت شهرزاد: كان الملك شهريار'}
+        for name, text in texts.items():
+            self.write(name, text)
+        self.write('notes.md', 'ignored')
+
+        reader = CorpusReader(self.tmp.name)
+        self.assertEqual(reader.paths(), sorted(texts))
+        self.assertEqual(dict(reader), texts)
+        self.assertEqual(CorpusReader(self.tmp.name, recursive=False).paths(), ['b.txt'])
+
+        sequential = list(reader.process(self.anar))
+        parallel = dict(reader.process(self.anar, workers=2, ordered=False))
+        self.assertEqual([path for path, _ in sequential], sorted(texts))
+        for path, result in sequential:
+            self.assertEqual(result['processed_text'], parallel[path]['processed_text'])
+
+if __name__ == '__main__':
+    unittest.main()
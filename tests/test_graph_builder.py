@@ -0,0 +1,25 @@
+import unittest
+from anar import ANARSystem
+from anar.utils.intervals import containing_intervals
+
+class TestGraphBuilder(unittest.TestCase):
+    def test_containing_intervals(self):
+        intervals = [(0, 10, 'a'), (2, 4, 'b'), (5, 30, 'c')]
+        queries = [(2, 12, 'x'), (3, 4, 'y'), (6, 9, 'z')]
+        
+        self.assertEqual(
+            sorted(containing_intervals(intervals, queries)),
+            [('y', 'a'), ('y', 'b'), ('z', 'a'), ('z', 'c')]
+        )
+        
+    def test_cultural_patterns_linked_to_containing_elements(self):
+        text = ("قالت شهرزاد: ثم قبّل الأرض بين يديه أمام الملك، "
+                "ثم سافر التاجر سعيد")
+        result = ANARSystem().process_text(text)
+        G = result['narrative_graph']
+        
+        cultural = [n for n, a in G.nodes(data=True) if a['type'] == 'cultural']
+        self.assertEqual(len(cultural), 1)
+        
+        linked = [G.nodes[n]['text'] for n in G.predecessors(cultural[0])]
+        self.assertEqual(linked, ["ثم قبّل الأرض بين يديه أمام الملك"])
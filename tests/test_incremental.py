@@ -0,0 +1,104 @@
+import unittest
+from anar import ANARSystem
+from anar.incremental import IncrementalAnalyzer, diff_edit
+
+def summary(result):
+    """Comparable view of everything update_text patches."""
+    processed = result['processed_text']
+    structure = result['narrative_graph']
+    chain = result['narrative_analysis']['narrative_graph']
+
+    def graph(g):
+        sources, targets = g.edge_arrays()
+        return (g.node_ids(), g.starts.tolist(), g.ends.tolist(),
+                sources.tolist(), targets.tolist(), g.extra)
+
+    return {
+        'processed': (processed['normalized_text'], processed['tokens'],
+                      processed['frame_markers'], processed['cultural_markers']),
+        'stories': [
+            ({k: v for k, v in s.items() if k != 'elements'},
+             [e.to_dict() for e in s['elements']])
+            for s in result['narrative_analysis']['nested_stories']
+        ],
+        'chain': graph(chain),
+        'structure': graph(structure),
+        'patterns': [p.to_dict() for p in result['cultural_analysis']['patterns']],
+        'contexts': result['cultural_analysis']['contexts'],
+        'characters': (
+            sorted(result['character_graph'].nodes),
+            sorted((min(u, v), max(u, v), w)
+                   for u, v, w in result['character_graph'].edges(data='weight'))
+        )
+    }
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.anar = ANARSystem()
+        self.reference = ANARSystem()
+        night = ("قالت شهرزاد: بلغني أن الملك شهريار في عهد هارون الرشيد "
+                 "قبّل الأرض بين يديه الوزير جعفر ثم خرج التاجر سعيد إلى السوق. "
+                 "حكى أن التاجر علي ضرب في الأرض بين حانا ومانا، "
+                 "وأدرك شهرزاد الصباح فسكتت عن الكلام المباح. ")
+        self.text = night * 5
+        self.result = self.anar.process_text(self.text)
+
+    def assertMatchesFullRun(self, result, text):
+        self.assertEqual(summary(result), summary(self.reference.process_text(text)))
+
+    def test_edit_inside_a_story(self):
+        position = self.text.index('التاجر سعيد', 300)
+        edits = [(position, position + len('التاجر سعيد'), 'الوزير مسرور')]
+        result = self.anar.update_text(edits)
+
+        self.assertIs(result, self.result)
+        self.assertMatchesFullRun(result, IncrementalAnalyzer.apply(self.text, edits))
+
+    def test_character_graph_is_patched_in_place(self):
+        graph = self.result['character_graph']
+        position = self.text.index('الوزير جعفر')
+        self.anar.update_text([(position, position, 'الملك سليمان ')])
+
+        self.assertIs(self.result['character_graph'], graph)
+        self.assertTrue(any('سليمان' in name for name in graph.nodes))
+
+    def test_frame_marker_changes_restructure_stories(self):
+        position = self.text.index('حكى أن', 200)
+        edits = [(position, position + len('حكى أن'), 'قال إن'),
+                 (len(self.text), len(self.text), 'حكى أن الملك النعمان ثم سافر.')]
+        result = self.anar.update_text(edits)
+        self.assertMatchesFullRun(result, IncrementalAnalyzer.apply(self.text, edits))
+
+    def test_successive_updates_with_full_texts(self):
+        text = self.text
+        for old, new in [('الرشيد', 'المأمون'), ('، ', '. '), ('السوق.', 'السوق')]:
+            position = text.index(old, len(text) // 3)
+            text = text[:position] + new + text[position + len(old):]
+            result = self.anar.update_text(text)
+        self.assertMatchesFullRun(result, text)
+
+    def test_records_behind_the_edit_are_reused(self):
+        last = self.result['cultural_analysis']['patterns'][-1]
+        text = self.text
+        for _ in range(3):
+            position = text.index('التاجر سعيد')
+            edits = [(position, position, 'الوزير مسرور ')]
+            self.anar.update_text(edits)
+            text = IncrementalAnalyzer.apply(text, edits)
+
+        self.assertIs(self.result['cultural_analysis']['patterns'][-1], last)
+        self.assertMatchesFullRun(self.result, text)
+
+    def test_diff_edit(self):
+        self.assertEqual(diff_edit('abcdef', 'abXYef'), (2, 4, 'XY'))
+        self.assertEqual(diff_edit('abc', 'abc'), (3, 3, ''))
+        self.assertEqual(diff_edit('aaa', 'aaaa'), (3, 3, 'a'))
+
+    def test_invalid_edits(self):
+        with self.assertRaises(ValueError):
+            self.anar.update_text([(0, 10, 'x'), (5, 12, 'y')])
+        with self.assertRaises(ValueError):
+            ANARSystem().update_text('نص')
+
+if __name__ == '__main__':
+    unittest.main()
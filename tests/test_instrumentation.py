@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar.instrumentation import PrometheusExporter
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.text = "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد"
+        
+    def test_timings_in_result_and_callback(self):
+        anar = ANARSystem({'instrument': True})
+        received = []
+        anar.add_timings_callback(received.append)
+        
+        timings = anar.process_text(self.text)['timings']
+        
+        self.assertEqual(received, [timings])
+        self.assertEqual(
+            set(timings['stages']),
+            {'processed_text', 'narrative_analysis', 'cultural_analysis',
+             'narrative_graph', 'character_graph'}
+        )
+        calls = timings['stages']['narrative_analysis']['calls']
+        self.assertEqual(calls['detect_nested_stories']['calls'], 1)
+        self.assertEqual(calls['detect_nested_stories']['matches'], 1)
+        self.assertIsNone(timings['stages']['processed_text']['peak_memory'])
+        
+    def test_disabled_by_default(self):
+        self.assertNotIn('timings', ANARSystem().process_text(self.text))
+        
+    def test_prometheus_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'anar.prom')
+            anar = ANARSystem({'metrics_path': path, 'instrument_memory': True})
+            for _ in range(2):
+                anar.process_text(self.text)
+                
+            with open(path, encoding='utf-8') as f:
+                metrics = f.read()
+                
+        self.assertIn('anar_documents_total 2\n', metrics)
+        self.assertIn('anar_stage_runs_total{stage="cultural_analysis"} 2\n', metrics)
+        self.assertIn('# TYPE anar_method_matches_total counter', metrics)
+        self.assertIn('anar_stage_peak_memory_bytes{stage="processed_text"}', metrics)
+        
+    def test_worker_timings_reported_in_parent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = PrometheusExporter(os.path.join(directory, 'anar.prom'))
+            anar = ANARSystem()
+            anar.add_timings_callback(exporter)
+            
+            list(anar.process_corpus([self.text] * 4, workers=2))
+            
+        self.assertEqual(exporter.documents, 4)
+        self.assertEqual(exporter.stage_runs['narrative_graph'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
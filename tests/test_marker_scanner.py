@@ -0,0 +1,36 @@
+import re
+import unittest
+from anar.preprocessor import CULTURAL_MARKER_PATTERNS, FRAME_PATTERNS
+from anar.utils.marker_scanner import MarkerScanner
+
+class TestMarkerScanner(unittest.TestCase):
+    def setUp(self):
+        self.patterns = list(FRAME_PATTERNS) + [
+            p for patterns in CULTURAL_MARKER_PATTERNS.values() for p in patterns
+        ]
+        self.scanner = MarkerScanner(self.patterns)
+        
+    def reference(self, text):
+        return sorted(
+            (m.start(), m.end(), i)
+            for i, p in enumerate(self.patterns)
+            for m in re.finditer(p, text)
+        )
+        
+    def test_matches_per_pattern_finditer(self):
+        text = ("قالت شهرزاد: وكان في عهد هارون الرشيد تاجر ضرب في الأرض "
+                "زمن الخليفة زمن الوزير. حكى أن ملكاً قبّل الأرض، "
+                "وأدرك شهرزاد الصباح")
+        
+        self.assertEqual(self.scanner.scan(text), self.reference(text))
+        
+    def test_resumable_scan(self):
+        text = "في عهد الملك زمن الوزير. في عهد السلطان، زمن الرشيد"
+        split = text.index('.') + 1
+        state = {}
+        
+        matches = (self.scanner.scan(text, 0, split, state) +
+                   self.scanner.scan(text, split, None, state))
+        
+        self.assertEqual(matches, self.scanner.scan(text))
+        self.assertEqual(MarkerScanner([]).scan(text), [])
@@ -0,0 +1,45 @@
+import unittest
+from anar import ANARSystem
+from anar.utils.memo import SegmentMemo, iter_segments
+
+class TestSegmentMemo(unittest.TestCase):
+    def setUp(self):
+        night = ("قالت شهرزاد: بلغني أن الملك شهريار في عهد هارون الرشيد، "
+                 "قبّل الأرض بين يديه الوزير ثم خرج. "
+                 "وأدرك شهرزاد الصباح فسكتت عن الكلام المباح. ")
+        self.text = night * 20 + "حكى أن التاجر ضرب في الأرض"
+        
+    def test_memoized_results_match_whole_text(self):
+        memoized = ANARSystem()
+        plain = ANARSystem({'segment_memo_size': 0})
+        
+        expected = plain.process_text(self.text)
+        result = memoized.process_text(self.text)
+        
+        self.assertEqual(result['processed_text'], expected['processed_text'])
+        self.assertEqual(
+            [(p['pattern'], p['position'], p['confidence'])
+             for p in result['cultural_analysis']['patterns']],
+            [(p['pattern'], p['position'], p['confidence'])
+             for p in expected['cultural_analysis']['patterns']]
+        )
+        
+        stats = memoized.memo_stats()
+        self.assertGreater(stats['preprocessor']['hit_rate'], 0.9)
+        self.assertGreater(stats['cultural']['hit_rate'], 0.9)
+        self.assertEqual(plain.memo_stats()['preprocessor'], {})
+        
+    def test_segments_and_eviction(self):
+        text = "أ.ب،ج"
+        self.assertEqual(
+            [text[a:b] for a, b in iter_segments(text)], ["أ.", "ب،", "ج"]
+        )
+        
+        memo = SegmentMemo(max_entries=2)
+        memo.put('a', 1)
+        memo.put('b', 2)
+        memo.get('a')
+        memo.put('c', 3)
+        
+        self.assertIsNone(memo.get('b'))
+        self.assertEqual(memo.cache_info()['size'], 2)
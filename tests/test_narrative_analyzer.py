@@ -28,3 +28,35 @@ class TestNarrativeAnalyzer(unittest.TestCase):
         
         self.assertTrue(char_network.number_of_nodes() > 0)
         self.assertTrue(char_network.number_of_edges() > 0)
+        
+    def test_graph_isolated_per_call(self):
+        processed_text = {
+            'normalized_text': "قالت شهرزاد: كان الملك شهريار ثم خرج الوزير",
+            'frame_markers': [("قالت شهرزاد", 0)]
+        }
+        
+        first = self.analyzer.analyze(processed_text)['narrative_graph']
+        second = self.analyzer.analyze(processed_text)['narrative_graph']
+        
+        self.assertEqual(sorted(first.nodes), sorted(second.nodes))
+        self.assertEqual(len(self.analyzer.analyze(processed_text)['nested_stories']), 1)
+        nodes = first.nodes(data=True)
+        self.assertEqual([a['text'] for _, a in nodes], [a['element']['text'] for _, a in nodes])
+        self.assertEqual(first.nodes['frame_0']['text'], 'قالت شهرزاد')
+        
+    def test_corpus_accumulation_evicts_oldest(self):
+        analyzer = NarrativeAnalyzer({
+            'accumulate_corpus': True,
+            'corpus_max_documents': 2
+        })
+        processed_text = {
+            'normalized_text': "قالت شهرزاد: كان الملك شهريار",
+            'frame_markers': [("قالت شهرزاد", 0)]
+        }
+        
+        for _ in range(3):
+            result = analyzer.analyze(processed_text)
+            
+        per_document = result['narrative_graph'].number_of_nodes()
+        self.assertEqual(analyzer.corpus_graph.number_of_nodes(), 2 * per_document)
+        self.assertFalse(any(n.startswith('doc0/') for n in analyzer.corpus_graph))
@@ -0,0 +1,136 @@
+import csv
+import os
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar.neo4j_export import GraphExporter, Neo4jCSVExporter, Neo4jCypherWriter
+
+class FakeSession:
+    def __init__(self, queries):
+        self.queries = queries
+
+    def run(self, query, **parameters):
+        self.queries.append((query, parameters))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+class FakeDriver:
+    def __init__(self):
+        self.queries = []
+
+    def session(self, **kwargs):
+        return FakeSession(self.queries)
+
+class TestNeo4jExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        system = ANARSystem()
+        cls.results = [
+            system.process_text(
+                "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد، "
+                "ثم خرج الوزير جعفر مع الملك شهريار."
+            ),
+            system.process_text(
+                "حكى أن الملك شهريار في عهد هارون الرشيد ثم لقي التاجر سعيد."
+            )
+        ]
+
+    def read(self, directory, name):
+        with open(os.path.join(directory, name), encoding='utf-8', newline='') as f:
+            return list(csv.reader(f))
+
+    def test_csv_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with Neo4jCSVExporter(directory, batch_size=3) as exporter:
+                exporter.add_all(self.results, ['a', 'b'])
+
+            documents = self.read(directory, 'nodes_documents.csv')
+            self.assertEqual(documents[0], ['id:ID', 'doc_id', 'length:int'])
+            self.assertEqual([row[0] for row in documents[1:]], ['doc/a', 'doc/b'])
+
+            # Characters and patterns shared by both documents appear once
+            characters = self.read(directory, 'nodes_characters.csv')
+            names = [row[1] for row in characters[1:]]
+            self.assertEqual(len(names), len(set(names)))
+            self.assertEqual(sum('شهريار' in name for name in names), 1)
+            patterns = self.read(directory, 'nodes_patterns.csv')
+            self.assertEqual(
+                [row[0] for row in patterns[1:]].count('pattern/historical/في عهد هارون الرشيد'), 1
+            )
+
+            # Every relationship endpoint is a node id of some node file
+            node_ids = set()
+            for name in os.listdir(directory):
+                if name.startswith('nodes_'):
+                    node_ids.update(row[0] for row in self.read(directory, name)[1:])
+            for name in os.listdir(directory):
+                if name.startswith('relationships_'):
+                    rows = self.read(directory, name)
+                    self.assertEqual(rows[0][:2], [':START_ID', ':END_ID'])
+                    for row in rows[1:]:
+                        self.assertIn(row[0], node_ids)
+                        self.assertIn(row[1], node_ids)
+
+            has_pattern = self.read(directory, 'relationships_has_pattern.csv')
+            self.assertEqual(len(has_pattern) - 1, sum(
+                len(r['cultural_analysis']['patterns']) for r in self.results
+            ))
+            self.assertIn(
+                f"--nodes=Character={os.path.join(directory, 'nodes_characters.csv')}",
+                exporter.import_arguments()
+            )
+
+    def test_close_is_idempotent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with Neo4jCSVExporter(directory) as exporter:
+                exporter.add_all(self.results, ['a', 'b'])
+                exporter.close()
+            exporter.close()
+
+            self.assertEqual(len(self.read(directory, 'nodes_documents.csv')), 3)
+            self.assertEqual(len(self.read(directory, 'relationships_has_pattern.csv')) - 1,
+                             sum(len(r['cultural_analysis']['patterns']) for r in self.results))
+            self.assertEqual(len(self.read(directory, 'relationships_nested_in.csv')), 1)
+            with self.assertRaises(ValueError):
+                exporter.add(self.results[0])
+            with self.assertRaises(ValueError):
+                exporter.flush()
+
+    def test_incomplete_exporter_cannot_be_created(self):
+        class Incomplete(GraphExporter):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_ids_are_stable(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            for directory in (first, second):
+                with Neo4jCSVExporter(directory) as exporter:
+                    exporter.add_all(self.results)
+            for name in os.listdir(first):
+                self.assertEqual(self.read(first, name), self.read(second, name))
+
+    def test_cypher_writer_batches(self):
+        driver = FakeDriver()
+        with Neo4jCypherWriter(driver, batch_size=2) as writer:
+            writer.add_all(self.results, ['a', 'b'])
+
+        self.assertTrue(all(len(p['rows']) <= 2 for _, p in driver.queries))
+        queries = [query for query, _ in driver.queries]
+        first_relationship = next(i for i, q in enumerate(queries) if 'MATCH' in q)
+        self.assertTrue(all('MERGE (n:' in q for q in queries[:first_relationship]))
+
+        documents = [p['rows'] for q, p in driver.queries if ':Document {id' in q]
+        self.assertEqual(
+            [row for rows in documents for row in rows][0],
+            {'id': 'doc/a', 'properties': {'doc_id': 'a', 'length': len(
+                self.results[0]['processed_text']['normalized_text'])}}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
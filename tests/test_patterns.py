@@ -0,0 +1,145 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from anar import ANARSystem
+from anar.patterns import (
+    BUILTIN_PATTERNS_PATH, PatternRegistry, get_registry, load_pattern_file
+)
+
+LEXICON = (
+    "# kind\tgroup\tpattern\tinfo\n"
+    "frame\t\tقال الراوي\n"
+    "character\t\t[الـ]?صياد\\s+\\w+\n"
+    "cultural\thistorical\tفي زمن المأمون\t"
+    '{"period": "Abbasid", "year_range": [813, 833]}\n'
+)
+
+# Regexes that match across the segment delimiter '.'
+CROSSING_LEXICON = (
+    "cultural_marker\thistorical\tفي عهد [^،]+\n"
+    "event\t\tثم [^،]+\n"
+)
+
+class TestPatternRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lexicon = os.path.join(self.tmp.name, 'extra.tsv')
+        with open(self.lexicon, 'w', encoding='utf-8') as f:
+            f.write(LEXICON)
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        self.text = "قال الراوي: كان الصياد خليفة في زمن المأمون بعد عهد هارون الرشيد"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tsv_lexicon_extends_builtin_tables(self):
+        tables = load_pattern_file(self.lexicon)
+        self.assertEqual(tables['frame'], ['قال الراوي'])
+        self.assertEqual(tables['cultural']['historical']['في زمن المأمون']['year_range'],
+                         (813, 833))
+
+        anar = ANARSystem({'pattern_files': [BUILTIN_PATTERNS_PATH, self.lexicon]})
+        result = anar.process_text(self.text)
+        self.assertEqual(result['processed_text']['frame_markers'], [('قال الراوي', 0)])
+        self.assertIn('في زمن المأمون',
+                      [p['pattern'] for p in result['cultural_analysis']['patterns']])
+        self.assertNotEqual(anar.fingerprint(), ANARSystem().fingerprint())
+
+    def test_pattern_info_is_checked_on_load(self):
+        lexicon = os.path.join(self.tmp.name, 'broken.tsv')
+        with open(lexicon, 'w', encoding='utf-8') as f:
+            f.write("frame\t\tقال الراوي\n"
+                    "cultural\tsocial_custom\tقبّل يده\t{\"meaning\": \"respect\"}\n")
+        with self.assertRaisesRegex(ValueError, r'broken\.tsv:2: .*lacks context'):
+            load_pattern_file(lexicon)
+
+        lexicon = os.path.join(self.tmp.name, 'broken.json')
+        with open(lexicon, 'w', encoding='utf-8') as f:
+            json.dump({'cultural': {'historical': {'في زمن المأمون': {'period': 'Abbasid'}}}}, f)
+        with self.assertRaisesRegex(ValueError, r'broken\.json: cultural/historical/.*year_range'):
+            load_pattern_file(lexicon)
+
+    def test_compiled_tables_are_cached_and_shared(self):
+        sources = [BUILTIN_PATTERNS_PATH, self.lexicon]
+        compiled = PatternRegistry(sources, self.cache_dir).tables
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        cold = PatternRegistry(sources, self.cache_dir).tables
+        self.assertEqual(cold.digest, compiled.digest)
+        self.assertEqual(len(cold.matcher), len(compiled.matcher))
+
+        config = {'pattern_files': sources, 'pattern_cache_dir': self.cache_dir}
+        first, second = ANARSystem(config), ANARSystem(config)
+        self.assertIs(first.patterns, second.patterns)
+        self.assertIs(first.cultural_processor.tables, second.preprocessor.tables)
+        self.assertIs(pickle.loads(pickle.dumps(first.patterns)), get_registry(config))
+
+    def test_cache_entries_are_versioned_and_recompiled_when_broken(self):
+        sources = [BUILTIN_PATTERNS_PATH, self.lexicon]
+        PatternRegistry(sources, self.cache_dir).tables
+        [name] = os.listdir(self.cache_dir)
+        with mock.patch('anar.patterns.__version__', '0.0.0'):
+            PatternRegistry(sources, self.cache_dir).tables
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        
+        # An entry referring to a class this version no longer defines
+        with open(os.path.join(self.cache_dir, name), 'wb') as f:
+            f.write(b'canar.patterns\nRemovedTables\n.')
+        tables = PatternRegistry(sources, self.cache_dir).tables
+        self.assertEqual(tables.data['frame'][-1], 'قال الراوي')
+        with open(os.path.join(self.cache_dir, name), 'rb') as f:
+            self.assertEqual(pickle.load(f).digest, tables.digest)
+        
+    def test_reload_applies_at_next_document(self):
+        # A private copy of the built-in lexicon keeps the default registry untouched
+        base = os.path.join(self.tmp.name, 'base.json')
+        shutil.copy(BUILTIN_PATTERNS_PATH, base)
+        config = {'pattern_files': [base]}
+        anar, other = ANARSystem(config), ANARSystem(config)
+        old_tables, old_fingerprint = anar.cultural_processor.tables, anar.fingerprint()
+
+        anar.reload_patterns([base, self.lexicon])
+        # Components keep their snapshot until the next document starts
+        self.assertIs(other.cultural_processor.tables, old_tables)
+        self.assertEqual(len(old_tables.pattern_table), 4)
+
+        result = other.process_text(self.text)
+        self.assertIsNot(other.cultural_processor.tables, old_tables)
+        self.assertNotEqual(other.fingerprint(), old_fingerprint)
+        self.assertEqual(result['processed_text']['frame_markers'], [('قال الراوي', 0)])
+
+    def test_crossing_lexicon_disables_segment_memos(self):
+        lexicon = os.path.join(self.tmp.name, 'crossing.tsv')
+        with open(lexicon, 'w', encoding='utf-8') as f:
+            f.write(CROSSING_LEXICON)
+        sources = [BUILTIN_PATTERNS_PATH, lexicon]
+        tables = PatternRegistry(sources).tables
+        self.assertEqual(tables.crossing_tables, {'cultural_marker', 'event'})
+        self.assertEqual(PatternRegistry([BUILTIN_PATTERNS_PATH]).tables.crossing_tables,
+                         frozenset())
+
+        text = "في عهد هارون الرشيد. ثم خرج التاجر. وعاد إلى بغداد، فقال"
+        memo = ANARSystem({'pattern_files': sources})
+        plain = ANARSystem({'pattern_files': sources, 'segment_memo_size': 0})
+        result = memo.process_text(text)
+        self.assertEqual(result['processed_text'], plain.process_text(text)['processed_text'])
+        self.assertIn('في عهد هارون الرشيد. ثم خرج التاجر. وعاد إلى بغداد',
+                      [m['text'] for m in result['processed_text']['cultural_markers']])
+
+        edited = text.replace("التاجر", "التاجر سعيد")
+        updated = memo.update_text(edited)
+        expected = plain.process_text(edited)
+        elements = [
+            [graph.node_attributes(i)['element'].to_dict() for i in range(len(graph))]
+            for graph in (updated['narrative_analysis']['narrative_graph'],
+                          expected['narrative_analysis']['narrative_graph'])
+        ]
+        self.assertIn({'type': 'event', 'text': 'ثم خرج التاجر سعيد. وعاد إلى بغداد',
+                       'position': 21}, elements[1])
+        self.assertEqual(elements[0], elements[1])
+
+if __name__ == '__main__':
+    unittest.main()
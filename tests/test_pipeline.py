@@ -0,0 +1,40 @@
+import threading
+import unittest
+from anar import ANARSystem
+from anar.pipeline import Stage, StageScheduler
+
+class TestStageScheduler(unittest.TestCase):
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def branch(value):
+            barrier.wait()
+            return value + 1
+            
+        scheduler = StageScheduler([
+            Stage('a', branch, ['source']),
+            Stage('b', branch, ['source']),
+            Stage('total', lambda a, b: a + b, ['a', 'b']),
+        ], executor='thread', max_workers=2)
+        
+        self.assertEqual(scheduler.run(source=1)['total'], 4)
+        scheduler.close()
+        
+    def test_dependency_validation(self):
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage('a', len, ['b']), Stage('b', len, ['a'])])
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage('a', len, ['missing'])]).run()
+            
+    def test_thread_executor_matches_serial(self):
+        text = "قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد"
+        serial = ANARSystem().process_text(text)
+        threaded_system = ANARSystem({'stage_executor': 'thread'})
+        threaded = threaded_system.process_text(text)
+        threaded_system.close()
+        
+        self.assertEqual(serial['processed_text'], threaded['processed_text'])
+        self.assertEqual(
+            sorted(serial['narrative_graph'].nodes),
+            sorted(threaded['narrative_graph'].nodes)
+        )
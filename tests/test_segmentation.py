@@ -0,0 +1,55 @@
+import unittest
+from anar.segmentation import StorySegmenter
+
+def element(element_type, text, position):
+    return {'type': element_type, 'text': text, 'position': position}
+
+class TestStorySegmenter(unittest.TestCase):
+    def test_nested_tales_and_narrator_reset(self):
+        elements = [
+            element('frame', 'قالت شهرزاد', 0),
+            element('character', 'الملك شهريار', 10),
+            element('frame', 'حكى أن', 20),
+            element('character', 'التاجر علي', 30),
+            element('frame', 'وحكى الحمال', 40),
+            element('event', 'ثم خرج', 50),
+            element('frame', 'وأدرك شهرزاد الصباح', 60),
+        ]
+        
+        stories = StorySegmenter().segment(elements, 80)
+        
+        self.assertEqual(
+            [(s['depth'], s['parent'], s['position'], s['end']) for s in stories],
+            [(0, None, 0, 60), (1, 0, 20, 60), (2, 1, 40, 60), (0, None, 60, 80)]
+        )
+        self.assertEqual([e['text'] for e in stories[1]['elements']], ['التاجر علي'])
+        
+    def test_repeated_marker_opens_sibling_tales(self):
+        elements = [element('frame', 'قالت شهرزاد', 0)]
+        for position in (10, 30, 50):
+            elements.append(element('frame', 'حكى أن', position))
+            elements.append(element('character', 'التاجر علي', position + 10))
+        
+        stories = StorySegmenter().segment(elements, 70)
+        
+        self.assertEqual(
+            [(s['depth'], s['parent'], s['position'], s['end']) for s in stories],
+            [(0, None, 0, 70), (1, 0, 10, 30), (1, 0, 30, 50), (1, 0, 50, 70)]
+        )
+        self.assertTrue(all(len(s['elements']) == 1 for s in stories[1:]))
+        
+    def test_close_marker_resumes_parent(self):
+        segmenter = StorySegmenter({'فلما فرغ من حكايته': 'close'})
+        elements = [
+            element('frame', 'قالت شهرزاد', 0),
+            element('frame', 'حكى أن', 10),
+            element('character', 'التاجر علي', 20),
+            element('frame', 'فلما فرغ من حكايته', 30),
+            element('character', 'الملك شهريار', 40),
+        ]
+        
+        stories = segmenter.segment(elements, 50)
+        
+        self.assertEqual(len(stories), 2)
+        self.assertEqual(stories[1]['end'], 30)
+        self.assertEqual([e['text'] for e in stories[0]['elements']], ['الملك شهريار'])
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from anar import ANARSystem
+from anar import serialization
+
+class TestSerialization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        text = ("قالت شهرزاد: كان الملك شهريار في عهد هارون الرشيد أمام الملك، "
+                "ثم خرج الوزير جعفر. حكى أن التاجر سعيد ضرب في الأرض أمام السلطان.")
+        cls.result = ANARSystem({'instrument': True}).process_text(text)
+        
+    def test_round_trip_through_memory_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.anar')
+            serialization.dump(self.result, path)
+            with serialization.load(path) as stored:
+                loaded = stored.to_dict()
+                
+                self.assertEqual(loaded['processed_text'], self.result['processed_text'])
+                self.assertEqual(
+                    [p.to_dict() for p in loaded['cultural_analysis']['patterns']],
+                    [p.to_dict() for p in self.result['cultural_analysis']['patterns']]
+                )
+                self.assertEqual(loaded['cultural_analysis']['contexts'],
+                                 self.result['cultural_analysis']['contexts'])
+                self.assertEqual(loaded['timings'], self.result['timings'])
+                
+                stories = loaded['narrative_analysis']['nested_stories']
+                expected = self.result['narrative_analysis']['nested_stories']
+                self.assertEqual(
+                    [[e.to_dict() for e in s.pop('elements')] for s in stories],
+                    [[e.to_dict() for e in s['elements']] for s in expected]
+                )
+                self.assertEqual(
+                    stories, [{k: v for k, v in s.items() if k != 'elements'}
+                              for s in expected]
+                )
+                
+                graph = loaded['narrative_graph']
+                self.assertEqual(list(graph.edges), list(self.result['narrative_graph'].edges))
+                self.assertEqual(dict(graph.nodes(data=True)),
+                                 dict(self.result['narrative_graph'].nodes(data=True)))
+                self.assertEqual(
+                    sorted(loaded['character_graph'].edges(data='weight')),
+                    sorted(self.result['character_graph'].edges(data='weight'))
+                )
+                
+    def test_queries_without_rebuilding(self):
+        stored = serialization.loads(serialization.dumps(self.result))
+        text = self.result['processed_text']['normalized_text']
+        
+        self.assertEqual(stored.text_slice(5, 120), text[5:120])
+        self.assertEqual(len(stored.patterns_between(0, len(text))),
+                         len(self.result['cultural_analysis']['patterns']))
+        self.assertFalse(stored.array('text.utf8').flags.writeable)
+        self.assertEqual(stored._sections, {})
+        
+    def test_result_to_dict_is_json_serializable(self):
+        exported = json.loads(json.dumps(serialization.result_to_dict(self.result)))
+        stored = serialization.loads(serialization.dumps(self.result))
+        self.assertEqual(serialization.result_to_dict(stored), exported)
+        
+        processed = exported['processed_text']
+        self.assertEqual(processed['tokens'], list(self.result['processed_text']['tokens']))
+        self.assertEqual(processed['cultural_markers'][0],
+                         self.result['processed_text']['cultural_markers'][0].to_dict())
+        pattern = exported['cultural_analysis']['patterns'][0]
+        self.assertEqual(set(pattern), {'category', 'pattern', 'position', 'info',
+                                        'context_window', 'confidence'})
+        
+        graph = exported['narrative_graph']
+        self.assertTrue(graph['directed'])
+        self.assertEqual(len(graph['nodes']), len(self.result['narrative_graph']))
+        self.assertEqual({'source', 'target'}, set(graph['edges'][0]))
+        self.assertFalse(exported['character_graph']['directed'])
+        
+    def test_rejects_foreign_data(self):
+        with self.assertRaises(ValueError):
+            serialization.loads(b'\0' * 64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import pickle
+import unittest
+from anar.cultural_processor import CulturalProcessor
+from anar.spans import NarrativeElement, PatternMatch, Revision
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        self.doc = "وكان في عهد هارون الرشيد تاجر عظيم"
+        self.table = [('historical', 'في عهد هارون الرشيد', {'period': 'Abbasid'})]
+        
+    def test_pattern_match_reads_like_dict(self):
+        match = PatternMatch(self.doc, 5, 24, 0, self.table)
+        match['confidence'] = 0.9
+        
+        self.assertEqual(match['pattern'], self.doc[5:24])
+        self.assertEqual(match['context_window'], self.doc)
+        self.assertEqual(match.to_dict()['info'], {'period': 'Abbasid'})
+        self.assertEqual(set(match), {
+            'category', 'pattern', 'position', 'info', 'context_window', 'confidence'
+        })
+        with self.assertRaises(KeyError):
+            match['position'] = 3
+            
+    def test_element_pickles_with_shared_buffer(self):
+        start = self.doc.index("تاجر")
+        elements = [
+            NarrativeElement(self.doc, 'character', start, start + 9),
+            NarrativeElement(self.doc, 'event', 0, 4),
+        ]
+        restored = pickle.loads(pickle.dumps(elements))
+        
+        self.assertEqual(restored[0]['text'], "تاجر عظيم")
+        self.assertIs(restored[0]._doc, restored[1]._doc)
+        
+    def test_records_follow_revisions(self):
+        start = self.doc.index("تاجر")
+        element = NarrativeElement(self.doc, 'character', start, start + 4)
+        revision = Revision(self.doc)
+        element.follow(revision)
+        
+        edited = "وقد كان" + self.doc[3:]
+        revision.supersede(edited, 3, len(edited) - len(self.doc))
+        self.assertEqual((element['text'], element['position']),
+                         ("تاجر", start + 4))
+        self.assertIsNone(pickle.loads(pickle.dumps(element))._revision)
+        
+    def test_confidence_uses_offsets(self):
+        processor = CulturalProcessor()
+        result = processor.process({'normalized_text': self.doc})
+        
+        self.assertEqual(len(result['patterns']), 1)
+        self.assertEqual(result['patterns'][0]['confidence'], 1.0)
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestStartup(unittest.TestCase):
+    def run_python(self, code):
+        return subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT, check=True,
+            capture_output=True, text=True
+        ).stdout.split()
+        
+    def test_import_does_not_load_heavy_dependencies(self):
+        loaded = self.run_python(
+            'import sys, anar; anar.__version__; '
+            'print(*[m for m in ("camel_tools", "networkx", "numpy", "scipy") '
+            'if m in sys.modules])'
+        )
+        self.assertEqual(loaded, [])
+        
+    def test_lazy_attributes(self):
+        import anar
+        from anar.system import ANARSystem
+        
+        self.assertIs(anar.ANARSystem, ANARSystem)
+        self.assertIn('CulturalProcessor', dir(anar))
+        with self.assertRaises(AttributeError):
+            anar.missing_name
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import unittest
+from anar import ANARSystem
+from anar.streaming import StreamAnalyzer
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.anar = ANARSystem()
+        night = ("قالت شهرزاد: بلغني أن الملك شهريار في عهد هارون الرشيد "
+                 "قبّل الأرض بين يديه الوزير جعفر ثم خرج التاجر سعيد إلى السوق. "
+                 "حكى أن التاجر علي ضرب في الأرض بين حانا ومانا، "
+                 "وأدرك شهرزاد الصباح فسكتت عن الكلام المباح. ")
+        self.text = night * 40
+        
+    def test_stream_matches_whole_text(self):
+        expected = self.anar.process_text(self.text)
+        records = list(self.anar.process_stream(io.StringIO(self.text), chunk_size=97))
+        
+        # Segments are yielded when closed, so nested tales come before
+        # the stories that contain them
+        segments = sorted(
+            (r for r in records if r['kind'] == 'segment'),
+            key=lambda s: s['position']
+        )
+        self.assertEqual(
+            [(s['frame_marker'], [(e['type'], e['text']) for e in s['elements']])
+             for s in segments],
+            [(s['frame_marker'], [(e['type'], e['text']) for e in s['elements']])
+             for s in expected['narrative_analysis']['nested_stories']]
+        )
+        
+        patterns = [r for r in records if r['kind'] == 'cultural_pattern']
+        self.assertEqual(
+            [(p['pattern'], p['position'], p['confidence']) for p in patterns],
+            [(p['pattern'], p['position'], p['confidence'])
+             for p in expected['cultural_analysis']['patterns']]
+        )
+        
+        markers = [r for r in records if r['kind'] == 'cultural_marker']
+        self.assertEqual(
+            [(m['type'], m['text'], m['position']) for m in markers],
+            [(m['type'], m['text'], m['position'])
+             for m in expected['processed_text']['cultural_markers']]
+        )
+        
+    def test_positions_are_absolute(self):
+        records = self.anar.process_stream([self.text[:500], self.text[500:]])
+        
+        for record in records:
+            if record['kind'] == 'segment':
+                position = record['position']
+                self.assertTrue(self.text.startswith(record['frame_marker'], position))
+                
+    def test_long_matches_are_not_cut(self):
+        text = "قالت شهرزاد: ثم " + "خرج التاجر " * 300 + ". حكى أن الملك شهريار"
+        expected = self.anar.process_text(text)['narrative_analysis']['nested_stories']
+        records = self.anar.process_stream(io.StringIO(text), chunk_size=97)
+        segments = sorted((r for r in records if r['kind'] == 'segment'),
+                          key=lambda s: s['position'])
+        self.assertEqual([[e['text'] for e in s['elements']] for s in segments],
+                         [[e['text'] for e in s['elements']] for s in expected])
+        self.assertGreater(len(segments[0]['elements'][0]['text']), 3000)
+        
+    def test_text_without_whitespace_is_read_in_bounded_pieces(self):
+        analyzer = StreamAnalyzer(self.anar, chunk_size=100)
+        pieces = list(analyzer._read_normalized(io.StringIO("مَلِكٌ" * 200)))
+        self.assertEqual(''.join(pieces), self.anar.preprocessor.normalize("مَلِكٌ" * 200))
+        self.assertTrue(all(len(piece) < 200 for piece in pieces))